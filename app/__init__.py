@@ -1,24 +1,51 @@
 # app/__init__.py
-import markdown
 from babel import support
-from flask import Flask, render_template, session, request, current_app
+from flask import Flask, render_template, session, request, current_app, flash, redirect
+from markupsafe import Markup
 from flask_babel import Babel
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from flask_migrate import Migrate
 from flask_moment import Moment
 import os
+import click
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 from flask_mail import Mail
+from app.export_cache import ExportCache
+from app.jobs import GenerationQueue
+from app.llm import LLM
+from app.response_cache import ResponseCache
+from app.document import render_html
+from app.http_cache import HTTPCache
+from app.janitor import DownloadsJanitor
+from app.bulk_export import BulkExporter
+from app.batch import BatchGenerator
+from app.metrics import Metrics
+from app.search import ProposalSearch
+from app.mail_outbox import MailOutbox
+from app.fragment_cache import FragmentCache
+from app.database import DatabaseProfile
+from app.deployment import instance_secret_key
 
 # Initialize extensions (but don't tie them to an app yet)
 db = SQLAlchemy()
 load_dotenv()
 login_manager = LoginManager()
-migrate = Migrate()
 moment = Moment()
 mail = Mail()
+export_cache = ExportCache()
+generation_queue = GenerationQueue()
+llm = LLM()
+response_cache = ResponseCache()
+http_cache = HTTPCache()
+downloads_janitor = DownloadsJanitor()
+bulk_exporter = BulkExporter()
+batch_generator = BatchGenerator()
+metrics = Metrics()
+proposal_search = ProposalSearch()
+mail_outbox = MailOutbox()
+fragment_cache = FragmentCache()
+database_profile = DatabaseProfile()
 
 def create_app():
     app = Flask(__name__)
@@ -55,17 +82,43 @@ def create_app():
         )
 
     # Configurations
-    app.config['SECRET_KEY'] = os.urandom(24)
+    # Every worker process has to sign sessions with the same key (app/deployment.py)
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY') or instance_secret_key(app.instance_path)
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///site.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'temp_downloads')
+    app.config['PDF_ENGINE'] = os.getenv('PDF_ENGINE', 'fpdf')  # or 'wkhtmltopdf'
+    app.config['WKHTMLTOPDF_PATH'] = os.getenv('WKHTMLTOPDF_PATH')
     app.config['SESSION_COOKIE_SECURE'] = True
     app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
     app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=1)
+    # Request bodies (batch uploads included) larger than this are refused with 413
+    app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 2 * 1024 * 1024))
     # Initialize extensions with the app
-    db.init_app(app)
+    # Pool sizing / SQLite pragmas for the configured database, then db.init_app()
+    database_profile.init_app(app, db)
     login_manager.init_app(app)
-    migrate.init_app(app, db)
+    # Alembic is only needed by `flask db ...`; servers and workers skip importing it
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    # Stage timings, /metrics and structured timing logs
+    metrics.init_app(app)
+    export_cache.init_app(app)
+    generation_queue.init_app(app, db)
+    batch_generator.init_app(app, db)
+    llm.init_app(app)
+    response_cache.init_app(app, db)
+    # Per-endpoint Cache-Control, fingerprinted static URLs and ETags
+    http_cache.init_app(app)
+    downloads_janitor.init_app(app)
+    bulk_exporter.init_app(app, export_cache)
+    # FTS5 search over proposals; `flask search rebuild` backfills the index
+    proposal_search.init_app(app, db)
+    # Outgoing mail is queued in the database and sent by a background thread
+    mail_outbox.init_app(app, db)
+    # {% cache %} blocks for the layout chrome and dashboard rows
+    fragment_cache.init_app(app)
 
 
     # Register blueprints
@@ -79,6 +132,12 @@ def create_app():
     def not_found_error(error):
         return render_template('errors/404.html'), 404
 
+    @app.errorhandler(413)
+    def request_too_large(error):
+        limit = app.config['MAX_CONTENT_LENGTH'] // 1024
+        flash(f'The upload is too large; the limit is {limit} KB.', 'danger')
+        return redirect(request.url)
+
     @app.errorhandler(500)
     def internal_error(error):
         db.session.rollback()
@@ -88,11 +147,10 @@ def create_app():
     def inject_now():
         return {'now': datetime.utcnow()}
 
-        # Add markdown filter
-
-    @app.template_filter('markdown')
-    def markdown_filter(text):
-        return markdown.markdown(text)
+    @app.template_filter('document_html')
+    def document_html_filter(document):
+        # Walks the blocks parsed when the proposal was saved (app/document.py)
+        return Markup(render_html(document))
 
     @app.context_processor
     def inject_global_data():
@@ -101,11 +159,6 @@ def create_app():
             get_locale=get_locale  # Your custom get_locale function
         )
 
-    @app.after_request
-    def add_header(response):
-        response.cache_control.no_store = True
-        return response
-
     return app
 
 
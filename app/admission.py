@@ -0,0 +1,190 @@
+# app/admission.py
+import asyncio
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class RetryableLLMError(Exception):
+    """A provider failure worth retrying (connection reset, timeout, 5xx)."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimitedError(RetryableLLMError):
+    """The provider answered 429; retry_after is its Retry-After in seconds, if it sent one."""
+
+
+class LLMBusyError(Exception):
+    """No concurrency slot became free within LLM_QUEUE_TIMEOUT."""
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit with a per-user fair queue.
+
+    The limit grows by roughly one slot per round of calls while latency stays
+    within `tolerance` times the best latency seen recently, and is cut by
+    `backoff_ratio` on a 429 or when latency climbs past that. Callers that
+    cannot get a slot wait in a queue per user, and freed slots go to the
+    users round-robin, so one user's backlog can't starve everybody else.
+    """
+
+    def __init__(self, initial=8, minimum=1, maximum=20, tolerance=2.0, backoff_ratio=0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tolerance = tolerance
+        self.backoff_ratio = backoff_ratio
+        self.in_flight = 0
+        self._best_latency = None
+        self._last_decrease = 0.0
+        self._queues = OrderedDict()  # user key -> deque of waiting Events, in round-robin order
+        self._lock = threading.Lock()
+        self.counters = {'admitted': 0, 'queued': 0, 'timeouts': 0, 'rate_limited': 0, 'decreases': 0}
+
+    def acquire(self, key=None, timeout=None):
+        """Blocks until a slot is free for key. Raises LLMBusyError after timeout seconds."""
+        with self._lock:
+            if not self._queues and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                self.counters['admitted'] += 1
+                return
+            waiter = threading.Event()
+            self._queues.setdefault(key, deque()).append(waiter)
+            self.counters['queued'] += 1
+
+        if waiter.wait(timeout):
+            return
+        with self._lock:
+            if waiter.is_set():  # Granted just as the wait timed out
+                return
+            queue = self._queues.get(key)
+            if queue is not None:
+                queue.remove(waiter)
+                if not queue:
+                    del self._queues[key]
+            self.counters['timeouts'] += 1
+        raise LLMBusyError("Timed out waiting for an LLM slot")
+
+    async def acquire_async(self, key=None, timeout=None):
+        """
+        acquire() for coroutines: waits on the event loop instead of blocking
+        a thread. Shares the limit and the fair queue with threaded callers.
+        """
+        with self._lock:
+            if not self._queues and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                self.counters['admitted'] += 1
+                return
+            waiter = _AsyncWaiter(asyncio.get_running_loop())
+            self._queues.setdefault(key, deque()).append(waiter)
+            self.counters['queued'] += 1
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+            return
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self._lock:
+                if waiter.is_set():
+                    # Granted as the wait ended: a cancelled caller hands its slot back
+                    if isinstance(e, asyncio.CancelledError):
+                        self.in_flight -= 1
+                        self._dispatch()
+                        raise
+                    return
+                queue = self._queues.get(key)
+                if queue is not None:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._queues[key]
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                self.counters['timeouts'] += 1
+        raise LLMBusyError("Timed out waiting for an LLM slot")
+
+    def release(self, latency=None, rate_limited=False):
+        """Frees a slot and feeds the outcome of the call into the limit."""
+        with self._lock:
+            self.in_flight -= 1
+            if rate_limited:
+                self.counters['rate_limited'] += 1
+                self._decrease()
+            elif latency is not None:
+                self._observe(latency)
+            self._dispatch()
+
+    def _observe(self, latency):
+        # The baseline drifts up slowly so one unusually fast call doesn't pin it forever
+        if self._best_latency is None or latency < self._best_latency:
+            self._best_latency = latency
+        else:
+            self._best_latency *= 1.01
+
+        if latency > self._best_latency * self.tolerance:
+            self._decrease()
+        else:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+    def _decrease(self):
+        # Calls already in flight report the same congestion; cut at most once per window
+        now = time.monotonic()
+        window = self._best_latency or 1.0
+        if now - self._last_decrease < window:
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit * self.backoff_ratio)
+        self.counters['decreases'] += 1
+
+    def _dispatch(self):
+        while self._queues and self.in_flight < int(self.limit):
+            key, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            if queue:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            self.in_flight += 1
+            self.counters['admitted'] += 1
+            waiter.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters, limit=round(self.limit, 2), in_flight=self.in_flight,
+                        waiting=sum(len(q) for q in self._queues.values()), waiting_users=len(self._queues),
+                        best_latency=self._best_latency)
+
+
+class _AsyncWaiter:
+    """Queue entry for acquire_async(); set() may be called from any thread."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self._set = False
+
+    def set(self):
+        self._set = True
+        self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+    def is_set(self):
+        return self._set
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0, retry_after=None):
+    """
+    Full-jitter exponential backoff for the given retry (0-based). A server's
+    Retry-After is treated as a floor, with jitter on top so the clients it
+    throttled at the same moment don't all come back at the same moment.
+    """
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = retry_after + random.uniform(0, min(base, retry_after or base))
+    return delay
@@ -1,32 +1,44 @@
 #ai_generator.py
 from flask_babel import get_locale
-from openai import OpenAI, AuthenticationError
 from flask import current_app
 from datetime import datetime
+from app import llm, response_cache
+from app.admission import LLMBusyError, RateLimitedError
+from app.database import run_blocking
+from app.metrics import timed
 
-def generate_proposal(proposal_data):
+# Sampling parameters shared by the blocking and streaming calls
+COMPLETION_PARAMS = {
+    'model': "gpt-3.5-turbo-1106",  # or "gpt-4-turbo"
+    'seed': 42,
+    'temperature': 0.7,
+    'max_tokens': 2000,
+    'response_format': {"type": "text"}  # Explicitly request text output (new in 1.9.5)
+}
 
-    """Generates a project proposal using OpenAI's latest API (v1.9.5+)"""
-    try:
-        # Initialize the OpenAI client (automatically reads OPENAI_API_KEY from env)
-        client = OpenAI(api_key=current_app.config['OPENAI_API_KEY'])
-
-        # Test the key first
-        try:
-            client.models.list()  # Simple API call to verify key
-        except AuthenticationError as auth_err:
-            current_app.logger.error(f"API Key Validation Failed: {str(auth_err)}")
-            raise ValueError("Invalid OpenAI API key configured")
-
-        # Determine the language based on the current session/locale
-        current_language = get_locale()
-        if current_language == "en":
-            language_instruction = "Generate the proposal in English."  # Default
-        else:
-            language_instruction = "Generate the proposal in Swahili."
-
-        # Prepare the prompt
-        prompt = f"""
+# One section instead of the whole proposal; no seed, since the point is a different answer
+SECTION_PARAMS = {
+    'model': COMPLETION_PARAMS['model'],
+    'temperature': 0.8,
+    'max_tokens': 600,
+    'response_format': {"type": "text"}
+}
+
+
+def _resolve_locale(locale=None):
+    # Determine the language based on the current session/locale
+    return locale or str(get_locale())
+
+
+def _build_messages(proposal_data, locale=None):
+    current_language = _resolve_locale(locale)
+    if current_language == "en":
+        language_instruction = "Generate the proposal in English."  # Default
+    else:
+        language_instruction = "Generate the proposal in Swahili."
+
+    # Prepare the prompt
+    prompt = f"""
         Generate a comprehensive {proposal_data['writing_style']} project proposal for:
 
         **Project Title:** {proposal_data['project_name']}
@@ -58,25 +70,14 @@ def generate_proposal(proposal_data):
         4. Format using Markdown (Arial font, Arial, font heading 12,  body 11 )
         """
 
-        # Make the API call (updated for OpenAI 1.9.5+)
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo-1106",  # or "gpt-4-turbo"
-            messages=[
-                {"role": "system", "content": "You are a professional proposal writer."},
-                {"role": "user", "content": prompt}
-            ],
-            seed=42,
-            temperature=0.7,
-            max_tokens=2000,
-            stream= False,
-            response_format={"type": "text"}  # Explicitly request text output (new in 1.9.5)
-        )
-
-        # Extract the content (same as v1.0.0)
-        generated_content = response.choices[0].message.content
+    return [
+        {"role": "system", "content": "You are a professional proposal writer."},
+        {"role": "user", "content": prompt}
+    ]
 
-        # Add metadata
-        proposal_meta = f"""# {proposal_data['project_name']}
+
+def _proposal_meta(proposal_data):
+    return f"""# {proposal_data['project_name']}
 
 **Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M')}  
 **Author:** {proposal_data.get('contact_email', '')}  
@@ -86,8 +87,149 @@ __Duration:__ {proposal_data['duration_weeks']} weeks
 
 ---
 """
-        return proposal_meta + generated_content
 
+
+def generate_proposal(proposal_data, locale=None, use_cache=True, user_id=None):
+
+    """
+    Generates a project proposal through the configured LLM provider (see app/llm.py)
+    locale overrides the request locale, for generations run outside a request
+    use_cache=False skips the response cache lookup (the fresh result is still stored)
+    user_id is the caller's key in the LLM fair queue
+    """
+    try:
+        locale = _resolve_locale(locale)
+        cache_key = response_cache.make_key(proposal_data, locale, COMPLETION_PARAMS)
+        with timed('generate', 'cache_lookup') as stage:
+            generated_content = response_cache.get(cache_key, bypass=not use_cache)
+            stage['hit'] = generated_content is not None
+
+        if generated_content is None:
+            # The provider is shared by the process: pooled connection, key validated once per TTL
+            # (admission wait, key validation and the completion itself are timed in app/llm.py)
+            generated_content = llm.complete(_build_messages(proposal_data, locale), user=user_id,
+                                             **COMPLETION_PARAMS)
+            with timed('generate', 'cache_store'):
+                response_cache.put(cache_key, generated_content, COMPLETION_PARAMS['model'])
+
+        # Add metadata
+        return _proposal_meta(proposal_data) + generated_content
+
+    except (RateLimitedError, LLMBusyError) as e:
+        current_app.logger.warning(f"AI generation throttled: {str(e)}")
+        raise Exception("The AI service is busy right now. Please try again in a few minutes.")
+    except Exception as e:
+        current_app.logger.error(f"AI generation failed: {str(e)}")
+        raise Exception("Failed to generate proposal. Please try again later.")
+
+
+def stream_proposal(proposal_data, locale=None, use_cache=True, user_id=None):
+    """
+    Streaming variant of generate_proposal: yields the metadata header first,
+    then each content delta as the model produces it (or the whole cached
+    completion at once on a cache hit).
+    """
+    try:
+        # The header needs no model output, so the caller gets it immediately
+        yield _proposal_meta(proposal_data)
+
+        locale = _resolve_locale(locale)
+        cache_key = response_cache.make_key(proposal_data, locale, COMPLETION_PARAMS)
+        with timed('generate', 'cache_lookup') as stage:
+            cached = response_cache.get(cache_key, bypass=not use_cache)
+            stage['hit'] = cached is not None
+        if cached is not None:
+            yield cached
+            return
+
+        deltas = []
+        for delta in llm.stream(_build_messages(proposal_data, locale), user=user_id, **COMPLETION_PARAMS):
+            deltas.append(delta)
+            yield delta
+        with timed('generate', 'cache_store'):
+            response_cache.put(cache_key, ''.join(deltas), COMPLETION_PARAMS['model'])
+
+    except (RateLimitedError, LLMBusyError) as e:
+        current_app.logger.warning(f"AI generation throttled: {str(e)}")
+        raise Exception("The AI service is busy right now. Please try again in a few minutes.")
+    except Exception as e:
+        current_app.logger.error(f"AI generation failed: {str(e)}")
+        raise Exception("Failed to generate proposal. Please try again later.")
+
+
+async def astream_proposal(proposal_data, locale=None, use_cache=True, user_id=None):
+    """
+    stream_proposal for coroutines (GenerationQueue in GENERATION_ASYNC mode)
+    Deltas come from the async LLM client and the response cache is read and
+    written on a worker thread, so the event loop stays free for other
+    generations. locale is required: there is no request to take it from.
+    """
+    try:
+        yield _proposal_meta(proposal_data)
+
+        cache_key = response_cache.make_key(proposal_data, locale, COMPLETION_PARAMS)
+        with timed('generate', 'cache_lookup') as stage:
+            cached = await run_blocking(response_cache.get, cache_key, bypass=not use_cache)
+            stage['hit'] = cached is not None
+        if cached is not None:
+            yield cached
+            return
+
+        deltas = []
+        async for delta in llm.astream(_build_messages(proposal_data, locale), user=user_id,
+                                       **COMPLETION_PARAMS):
+            deltas.append(delta)
+            yield delta
+        with timed('generate', 'cache_store'):
+            await run_blocking(response_cache.put, cache_key, ''.join(deltas), COMPLETION_PARAMS['model'])
+
+    except (RateLimitedError, LLMBusyError) as e:
+        current_app.logger.warning(f"AI generation throttled: {str(e)}")
+        raise Exception("The AI service is busy right now. Please try again in a few minutes.")
     except Exception as e:
         current_app.logger.error(f"AI generation failed: {str(e)}")
         raise Exception("Failed to generate proposal. Please try again later.")
+
+
+def _build_section_messages(content, section_title, instructions=None, locale=None):
+    if _resolve_locale(locale) == "en":
+        language_instruction = "Write the section in English."
+    else:
+        language_instruction = "Write the section in Swahili."
+
+    prompt = f"""
+        Below is a complete project proposal in Markdown. Rewrite only its "{section_title}" section.
+
+        **Instructions:**
+        1. {language_instruction}
+        2. Keep it consistent with the rest of the proposal (figures, dates, names)
+        3. Return only the rewritten section: its heading followed by its body, in Markdown
+        {f"4. {instructions}" if instructions else ""}
+
+        Proposal:
+        {content}
+        """
+
+    return [
+        {"role": "system", "content": "You are a professional proposal writer."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def regenerate_section(content, section_title, instructions=None, locale=None, user_id=None):
+    """
+    Asks the LLM for a new version of one section, with the whole proposal as
+    context, and returns just that section's markdown (splice it in with
+    app.revisions.replace_section). Costs one section's worth of output tokens.
+    """
+    try:
+        with timed('regenerate_section', 'llm', section=section_title):
+            return llm.complete(_build_section_messages(content, section_title, instructions, locale),
+                                user=user_id, **SECTION_PARAMS)
+
+    except (RateLimitedError, LLMBusyError) as e:
+        current_app.logger.warning(f"Section regeneration throttled: {str(e)}")
+        raise Exception("The AI service is busy right now. Please try again in a few minutes.")
+    except Exception as e:
+        current_app.logger.error(f"Section regeneration failed: {str(e)}")
+        raise Exception("Failed to regenerate the section. Please try again later.")
@@ -0,0 +1,245 @@
+# app/batch.py
+import csv
+import io
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+# Columns accepted in an uploaded file, named after the ProposalForm fields
+BATCH_FIELDS = ('project_name', 'project_type', 'description', 'budget', 'duration_weeks',
+                'writing_style', 'complexity', 'audience', 'mobile_number', 'contact_email')
+
+
+def parse_batch_file(filename, stream, max_rows=None):
+    """
+    Reads an uploaded .csv or .json file into a list of {field: str} rows.
+    JSON may be a list of objects or {"rows": [...]}. Raises ValueError for
+    anything that cannot be read as rows. With max_rows, reading stops after
+    max_rows + 1 rows, enough for the caller to tell the file is too long.
+    """
+    limit = None if max_rows is None else max_rows + 1
+
+    if filename.lower().endswith('.json'):
+        # Has to be parsed whole; its size is capped by MAX_CONTENT_LENGTH
+        try:
+            data = json.loads(stream.read().decode('utf-8-sig'))
+        except UnicodeDecodeError:
+            raise ValueError('The file must be UTF-8 encoded.')
+        except ValueError as e:
+            raise ValueError(f'Invalid JSON: {str(e)}')
+        if isinstance(data, dict):
+            data = data.get('rows')
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise ValueError('JSON must be a list of objects, one per proposal.')
+        data = data[:limit]
+    else:
+        # Decoded and split into rows as it is read, so a long file is not parsed past the limit
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        try:
+            reader = csv.DictReader(text)
+            missing = [field for field in BATCH_FIELDS if field not in (reader.fieldnames or [])]
+            if missing:
+                raise ValueError(f"Missing CSV column(s): {', '.join(missing)}")
+            data = list(itertools.islice(reader, limit))
+        except UnicodeDecodeError:
+            raise ValueError('The file must be UTF-8 encoded.')
+        finally:
+            text.detach()  # leave the upload's stream open for its owner
+
+    return [{field: '' if row.get(field) is None else str(row[field]).strip() for field in BATCH_FIELDS}
+            for row in data]
+
+
+class BatchGenerator:
+    """
+    Generates every row of a ProposalBatch against the LLM.
+
+    All batches share one pool of BATCH_GENERATION_CONCURRENCY threads, which
+    caps concurrent LLM calls however many batches are running. A coordinator
+    thread per batch collects finished rows and saves them, together with
+    their Proposal rows, in one commit per BATCH_COMMIT_SIZE rows (or every
+    BATCH_COMMIT_INTERVAL seconds). Unfinished batches resume after a restart.
+    """
+
+    def __init__(self, app=None, db=None):
+        self._app = None
+        self._db = None
+        self._executor = None
+        self._resumed = False
+        self._running = set()  # ProposalBatchRow ids being generated or waiting to be saved
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        app.config.setdefault('BATCH_GENERATION_CONCURRENCY', 4)
+        app.config.setdefault('BATCH_COMMIT_SIZE', 10)
+        app.config.setdefault('BATCH_COMMIT_INTERVAL', 2.0)  # seconds
+        app.config.setdefault('BATCH_MAX_ROWS', 200)
+        app.config.setdefault('BATCH_JOB_TIMEOUT', timedelta(minutes=30))
+
+        self._app = app
+        self._db = db
+        self._executor = ThreadPoolExecutor(max_workers=app.config['BATCH_GENERATION_CONCURRENCY'],
+                                            thread_name_prefix='proposal-batch')
+        app.before_request(self._resume_pending)
+        app.extensions['batch_generator'] = self
+
+    def submit(self, user_id, rows, locale, filename=None, bypass_cache=False):
+        """Persists validated (row_number, proposal_data) pairs as a batch and starts it. Returns the ProposalBatch."""
+        from app.models import ProposalBatch, ProposalBatchRow
+
+        db = self._db
+        batch = ProposalBatch(user_id=user_id, filename=filename, locale=str(locale),
+                              bypass_cache=bypass_cache, total=len(rows))
+        db.session.add(batch)
+        db.session.flush()
+        db.session.add_all([ProposalBatchRow(batch_id=batch.id, row_number=number, proposal_data=data)
+                            for number, data in rows])
+        db.session.commit()
+        self._start(batch.id)
+        return batch
+
+    def is_running(self, row_id):
+        return row_id in self._running
+
+    def _start(self, batch_id):
+        threading.Thread(target=self._run_batch, args=(batch_id,), name=f'proposal-batch-{batch_id[:8]}',
+                         daemon=True).start()
+
+    def _resume_pending(self):
+        """Restarts unfinished batches once, on the first request after startup."""
+        if self._resumed:
+            return
+        with self._lock:
+            if self._resumed:
+                return
+            self._resumed = True
+
+        from app.models import ProposalBatch
+
+        db = self._db
+        # A batch still 'running' past the timeout belonged to a process that died
+        stale_before = datetime.utcnow() - self._app.config['BATCH_JOB_TIMEOUT']
+        db.session.query(ProposalBatch) \
+            .filter(ProposalBatch.status == 'running', ProposalBatch.updated_at < stale_before) \
+            .update({'status': 'queued'}, synchronize_session=False)
+        db.session.commit()
+
+        pending = db.session.query(ProposalBatch.id).filter_by(status='queued').all()
+        for (batch_id,) in pending:
+            self._start(batch_id)
+        if pending:
+            self._app.logger.info(f"Resumed {len(pending)} pending proposal batch(es)")
+
+    def _run_batch(self, batch_id):
+        from app.models import ProposalBatch, ProposalBatchRow
+
+        db = self._db
+        with self._app.app_context():
+            try:
+                # Claim atomically so a batch resumed by two processes only runs once
+                claimed = db.session.query(ProposalBatch) \
+                    .filter_by(id=batch_id, status='queued') \
+                    .update({'status': 'running', 'updated_at': datetime.utcnow()}, synchronize_session=False)
+                db.session.commit()
+                if not claimed:
+                    return
+
+                batch = db.session.get(ProposalBatch, batch_id)
+                user_id, locale, bypass_cache = batch.user_id, batch.locale, batch.bypass_cache
+                rows = db.session.query(ProposalBatchRow.id, ProposalBatchRow.proposal_data) \
+                    .filter_by(batch_id=batch_id, status='queued') \
+                    .order_by(ProposalBatchRow.row_number) \
+                    .all()
+                db.session.rollback()
+
+                futures = {
+                    self._executor.submit(self._generate, row_id, data, user_id, locale, bypass_cache): (row_id, data)
+                    for row_id, data in rows
+                }
+
+                commit_size = self._app.config['BATCH_COMMIT_SIZE']
+                commit_interval = self._app.config['BATCH_COMMIT_INTERVAL']
+                finished = []
+                saved = True
+                last_commit = time.monotonic()
+                for future in as_completed(futures):
+                    row_id, data = futures[future]
+                    try:
+                        finished.append((row_id, data, future.result(), None))
+                    except Exception as e:
+                        finished.append((row_id, data, None, str(e)[:255]))
+                    if len(finished) >= commit_size or time.monotonic() - last_commit >= commit_interval:
+                        saved = self._save(batch_id, user_id, finished) and saved
+                        finished = []
+                        last_commit = time.monotonic()
+                saved = self._save(batch_id, user_id, finished) and saved
+                if not saved:
+                    # Left 'running' so the unsaved rows are picked up once the batch goes stale
+                    return
+
+                db.session.query(ProposalBatch).filter_by(id=batch_id) \
+                    .update({'status': 'done', 'updated_at': datetime.utcnow()}, synchronize_session=False)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self._app.logger.error(f"Proposal batch {batch_id} crashed: {str(e)}")
+            finally:
+                db.session.remove()
+
+    def _generate(self, row_id, data, user_id, locale, bypass_cache):
+        from app.ai_generator import generate_proposal
+
+        self._running.add(row_id)
+        with self._app.app_context():
+            try:
+                return generate_proposal(data, locale=locale, use_cache=not bypass_cache, user_id=user_id)
+            finally:
+                self._db.session.remove()
+
+    def _save(self, batch_id, user_id, finished):
+        """Writes finished rows, their proposals and the batch counters in one commit."""
+        from app.models import Proposal, ProposalBatch, ProposalBatchRow
+
+        if not finished:
+            return True
+        db = self._db
+        try:
+            completed = failed = 0
+            for row_id, data, content, error in finished:
+                row = db.session.get(ProposalBatchRow, row_id)
+                if error is None:
+                    proposal = Proposal(
+                        title=data['project_name'],
+                        content=content,
+                        user_id=user_id,
+                        generated_at=datetime.utcnow(),
+                        project_type=data['project_type']
+                    )
+                    db.session.add(proposal)
+                    db.session.flush()
+                    row.proposal_id = proposal.id
+                    row.status = 'done'
+                    completed += 1
+                else:
+                    row.status = 'failed'
+                    row.error = error
+                    failed += 1
+            db.session.query(ProposalBatch).filter_by(id=batch_id).update({
+                'completed': ProposalBatch.completed + completed,
+                'failed': ProposalBatch.failed + failed,
+                'updated_at': datetime.utcnow()
+            }, synchronize_session=False)
+            db.session.commit()
+            return True
+        except Exception as e:
+            # The rows stay queued and are generated again (from the response cache) on resume
+            db.session.rollback()
+            self._app.logger.error(f"Saving {len(finished)} row(s) of batch {batch_id} failed: {str(e)}")
+            return False
+        finally:
+            self._running.difference_update(row_id for row_id, _, _, _ in finished)
@@ -0,0 +1,180 @@
+# app/bulk_export.py
+import multiprocessing
+import os
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.utils import secure_filename
+
+# Settings the worker processes need to build their own PDF/DOCX renderers
+WORKER_CONFIG_KEYS = ('PDF_ENGINE', 'WKHTMLTOPDF_PATH', 'PDF_FONT_REGULAR', 'PDF_FONT_BOLD',
+                      'PDF_FONT_ITALIC', 'PDF_FONT_BOLD_ITALIC', 'DOCX_TEMPLATE_PATH', 'DOCX_FONT_NAME')
+# PDF and DOCX are already compressed; deflating them again only costs CPU
+COMPRESSION = {'pdf': zipfile.ZIP_STORED, 'docx': zipfile.ZIP_STORED, 'md': zipfile.ZIP_DEFLATED}
+
+_worker_config = {}
+
+
+def _init_worker(config):
+    """Runs once in each worker process: loads fonts and the DOCX template up front."""
+    from app.pdf_engine import get_pdf_engine
+    from app.docx_engine import get_docx_renderer
+
+    _worker_config.update(config)
+    get_pdf_engine(_worker_config).warm()
+    get_docx_renderer(_worker_config).warm()
+
+
+def _render(fmt, data, content):
+    # data is the document stored with the proposal; content is only parsed
+    # if it is missing or was built by an older parser. Markdown is content as is
+    from app.document import load, render_html
+
+    if fmt == 'md':
+        return content.encode('utf-8')
+    document = load(data, content)
+    if fmt == 'pdf':
+        from app.pdf_engine import get_pdf_engine
+        return get_pdf_engine(_worker_config).render(render_html(document))
+    from app.docx_engine import get_docx_renderer
+    return get_docx_renderer(_worker_config).render(document)
+
+
+class _ZipStream:
+    """
+    Write-only file object for zipfile. Having no tell()/seek() makes zipfile
+    write data descriptors after each member, so the archive can be sent as it
+    is built; take() hands over whatever has been written since the last call.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class BulkExporter:
+    """
+    Streams a ZIP of many proposals, rendering PDF/DOCX on a process pool.
+
+    At most BULK_EXPORT_MAX_IN_FLIGHT renders are pending at any time and each
+    member is flushed to the client as soon as it is written, so memory stays
+    flat however many proposals are exported. Exports already in the in-memory
+    export cache are reused rather than rendered again.
+    """
+
+    def __init__(self, app=None, export_cache=None):
+        self._app = None
+        self._export_cache = None
+        self._pool = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, export_cache)
+
+    def init_app(self, app, export_cache=None):
+        app.config.setdefault('BULK_EXPORT_WORKERS', os.cpu_count() or 2)
+        app.config.setdefault('BULK_EXPORT_MAX_IN_FLIGHT', app.config['BULK_EXPORT_WORKERS'] * 2)
+        # 'spawn' keeps workers from inheriting the server's threads and locks
+        app.config.setdefault('BULK_EXPORT_START_METHOD', 'spawn')
+
+        self._app = app
+        self._export_cache = export_cache
+        app.extensions['bulk_exporter'] = self
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                config = {key: self._app.config.get(key) for key in WORKER_CONFIG_KEYS}
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self._app.config['BULK_EXPORT_WORKERS'],
+                    mp_context=multiprocessing.get_context(self._app.config['BULK_EXPORT_START_METHOD']),
+                    initializer=_init_worker,
+                    initargs=(config,))
+            return self._pool
+
+    def _discard_pool(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def shutdown(self):
+        self._discard_pool()
+
+    @staticmethod
+    def member_name(proposal_id, title, fmt):
+        return f"{proposal_id:05d}_{secure_filename(title or '')[:60] or 'proposal'}.{fmt}"
+
+    def stream_zip(self, proposals, formats):
+        """
+        Yields the bytes of a ZIP archive holding every proposal in every format.
+        proposals is an iterable of (id, title, content, document, generated_at) rows.
+        """
+        pool = None
+        pending = deque()  # (name, fmt, generated_at, future-or-bytes), in archive order
+        failures = []
+        max_in_flight = self._app.config['BULK_EXPORT_MAX_IN_FLIGHT']
+        sink = _ZipStream()
+
+        with zipfile.ZipFile(sink, 'w', allowZip64=True) as archive:
+            def write_next():
+                name, fmt, generated_at, result = pending.popleft()
+                try:
+                    data = result if isinstance(result, bytes) else result.result()
+                except BrokenProcessPool:
+                    self._discard_pool()
+                    raise
+                except Exception as e:
+                    self._app.logger.error(f"Bulk export failed for {name}: {str(e)}")
+                    failures.append(name)
+                    return
+                info = zipfile.ZipInfo(name, date_time=generated_at.timetuple()[:6])
+                info.compress_type = COMPRESSION[fmt]
+                archive.writestr(info, data)
+
+            for proposal_id, title, content, data, generated_at in proposals:
+                for fmt in formats:
+                    name = self.member_name(proposal_id, title, fmt)
+                    result = None
+                    if self._export_cache is not None:
+                        result = self._export_cache.get(proposal_id, content, fmt)
+                    if result is None:
+                        if fmt == 'md':
+                            result = _render(fmt, data, content)
+                        else:
+                            pool = pool or self._get_pool()
+                            result = pool.submit(_render, fmt, data, content)
+                    pending.append((name, fmt, generated_at, result))
+
+                    while len(pending) > max_in_flight:
+                        write_next()
+                        yield from self._drain(sink)
+
+            while pending:
+                write_next()
+                yield from self._drain(sink)
+
+            if failures:
+                archive.writestr('EXPORT_ERRORS.txt',
+                                 'These files could not be generated:\n' + '\n'.join(failures) + '\n')
+
+        yield from self._drain(sink)
+
+    @staticmethod
+    def _drain(sink):
+        data = sink.take()
+        if data:
+            yield data
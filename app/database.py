@@ -0,0 +1,93 @@
+# app/database.py
+import asyncio
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+class DatabaseProfile:
+    """
+    Engine settings for the configured database, applied around
+    db.init_app() (engine options have to exist before Flask-SQLAlchemy builds
+    the engine, the connect hook is attached right after).
+
+    SQLite: every connection gets WAL journaling, a busy timeout (writers wait
+    for the lock instead of failing with "database is locked"),
+    synchronous=NORMAL (safe with WAL, far fewer fsyncs) and a memory-mapped
+    read window.
+
+    PostgreSQL: a sized connection pool with pre-ping and recycling, and a
+    server-side statement timeout so a runaway query can't pin a connection.
+    """
+
+    def __init__(self, app=None, db=None):
+        self._app = None
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        app.config.setdefault('DB_SQLITE_JOURNAL_MODE', 'WAL')
+        app.config.setdefault('DB_SQLITE_BUSY_TIMEOUT', int(os.getenv('DB_SQLITE_BUSY_TIMEOUT', 5000)))  # ms
+        app.config.setdefault('DB_SQLITE_SYNCHRONOUS', 'NORMAL')
+        app.config.setdefault('DB_SQLITE_MMAP_SIZE', 256 * 1024 * 1024)
+        app.config.setdefault('DB_POOL_SIZE', int(os.getenv('DB_POOL_SIZE', 10)))
+        app.config.setdefault('DB_MAX_OVERFLOW', int(os.getenv('DB_MAX_OVERFLOW', 10)))
+        app.config.setdefault('DB_POOL_TIMEOUT', 30)  # seconds to wait for a pooled connection
+        app.config.setdefault('DB_POOL_RECYCLE', 30 * 60)  # below typical server/proxy idle cut-offs
+        app.config.setdefault('DB_STATEMENT_TIMEOUT', int(os.getenv('DB_STATEMENT_TIMEOUT', 30000)))  # ms
+
+        self._app = app
+        uri = app.config['SQLALCHEMY_DATABASE_URI']
+        if uri.startswith('postgres://'):  # Heroku-style URLs; SQLAlchemy only knows postgresql://
+            uri = app.config['SQLALCHEMY_DATABASE_URI'] = 'postgresql://' + uri[len('postgres://'):]
+        backend = make_url(uri).get_backend_name()
+
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        if backend == 'postgresql':
+            options.setdefault('pool_size', app.config['DB_POOL_SIZE'])
+            options.setdefault('max_overflow', app.config['DB_MAX_OVERFLOW'])
+            options.setdefault('pool_timeout', app.config['DB_POOL_TIMEOUT'])
+            options.setdefault('pool_recycle', app.config['DB_POOL_RECYCLE'])
+            options.setdefault('pool_pre_ping', True)
+            connect_args = options.setdefault('connect_args', {})
+            connect_args.setdefault('options', f"-c statement_timeout={app.config['DB_STATEMENT_TIMEOUT']}")
+            connect_args.setdefault('application_name', 'proposal-generator')
+
+        db.init_app(app)
+
+        if backend == 'sqlite':
+            with app.app_context():
+                event.listen(db.engine, 'connect', self._configure_sqlite)
+        app.extensions['database_profile'] = self
+
+    def _configure_sqlite(self, dbapi_connection, connection_record):
+        config = self._app.config
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA busy_timeout = {int(config['DB_SQLITE_BUSY_TIMEOUT'])}")
+            # In-memory databases can't use WAL; the pragma just reports 'memory'
+            cursor.execute(f"PRAGMA journal_mode = {config['DB_SQLITE_JOURNAL_MODE']}")
+            cursor.execute(f"PRAGMA synchronous = {config['DB_SQLITE_SYNCHRONOUS']}")
+            cursor.execute(f"PRAGMA mmap_size = {int(config['DB_SQLITE_MMAP_SIZE'])}")
+        finally:
+            cursor.close()
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Runs func(*args, **kwargs) on the event loop's default executor, in a
+    fresh app context of the current app, and returns its result. Blocking
+    database work thus never stalls the loop, and the context's session (with
+    its pooled connection) is removed as soon as func returns instead of being
+    held across the awaits in between.
+    """
+    from flask import current_app
+
+    app = current_app._get_current_object()
+
+    def call():
+        with app.app_context():
+            return func(*args, **kwargs)
+
+    return await asyncio.get_running_loop().run_in_executor(None, call)
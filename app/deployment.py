@@ -0,0 +1,80 @@
+# app/deployment.py
+"""
+Helpers for running the app under a pre-forking server (see wsgi.py and
+gunicorn.conf.py): a session secret every worker agrees on, and a warm-up
+that does the first request's one-off work before the workers are forked.
+"""
+import os
+import secrets
+import time
+
+
+def instance_secret_key(instance_path):
+    """
+    The key in <instance>/secret_key, created on first use. Used when
+    SECRET_KEY is not set, so all processes on this host sign sessions alike;
+    across hosts, set SECRET_KEY.
+    """
+    path = os.path.join(instance_path, 'secret_key')
+    try:
+        with open(path) as f:
+            key = f.read().strip()
+        if key:
+            return key
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(instance_path, exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(secrets.token_hex(32))
+    try:
+        # link() fails if another process got there first; everyone then reads its key
+        os.link(temp_path, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(temp_path)
+    with open(path) as f:
+        return f.read().strip()
+
+
+def warm_up(app):
+    """
+    Compiles every template, loads the Babel catalogs, configures the ORM
+    mappers and URL map, and loads the LLM SDK and the PDF and DOCX
+    engines, all of which are otherwise loaded on first use.
+    Run in the master before forking, the workers inherit all of it
+    copy-on-write instead of each paying for it on its first requests.
+    """
+    from flask_babel import force_locale, get_translations
+    from sqlalchemy.orm import configure_mappers
+
+    from app import llm
+    from app.docx_engine import get_docx_renderer
+    from app.pdf_engine import get_pdf_engine
+
+    started = time.perf_counter()
+    configure_mappers()
+
+    templates = 0
+    for name in app.jinja_env.list_templates():
+        try:
+            app.jinja_env.get_template(name)
+            templates += 1
+        except Exception as e:
+            app.logger.warning(f"Template {name} failed to compile during warm-up: {str(e)}")
+
+    with app.test_request_context():  # also builds the URL map's matcher
+        for locale in app.config['LANGUAGES']:
+            with force_locale(locale):
+                get_translations()
+
+    with app.app_context():
+        llm.warm()
+        get_pdf_engine(app.config).warm()
+        get_docx_renderer(app.config).warm()
+
+    app.logger.info(f"Warmed up {templates} templates, {len(app.config['LANGUAGES'])} locales, the LLM SDK "
+                    f"and the export engines in {(time.perf_counter() - started) * 1000:.0f} ms")
@@ -0,0 +1,337 @@
+# app/document.py
+"""
+Structured proposal documents.
+
+A proposal's markdown is parsed once, when the proposal is saved (see the
+Proposal events in app/models.py), into a flat list of blocks that is stored
+zlib-compressed in Proposal.document. The proposal page and the PDF and
+DOCX exports all walk those blocks, so no request re-parses the text. The
+Markdown export is Proposal.content itself, byte for byte.
+
+Blocks are JSON lists, tagged by their first item:
+
+    ["h", level, inline]                heading
+    ["meta", [[label, inline], ...]]    the "**Label:** value" header under the title
+    ["p", inline]                       paragraph
+    ["list", [[depth, ordered, inline], ...]]
+    ["table", [inline, ...], [[inline, ...], ...]]   header cells, body rows
+    ["q", inline]                       block quote
+    ["code", text]
+    ["hr"]
+
+Inline content is a list of spans: plain strings ("\\n" is a soft line break),
+["b", text], ["i", text], ["bi", text], ["c", text] (code), ["a", text, href]
+and ["br"] (hard line break).
+"""
+import json
+import re
+import zlib
+
+from markupsafe import escape
+
+# Bump when the parser changes: documents stored by an older version are
+# parsed again from Proposal.content until they are rebuilt
+VERSION = 1
+
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+BULLET_RE = re.compile(r'^(\s*)[-*+]\s+(.*)$')
+NUMBERED_RE = re.compile(r'^(\s*)\d+[.)]\s+(.*)$')
+HR_RE = re.compile(r'^\s*([-*_])(\s*\1){2,}\s*$')
+TABLE_SEPARATOR_RE = re.compile(r'^\s*\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?\s*$')
+# "**Generated:** 2024-05-01 10:00", as written by ai_generator._proposal_meta
+META_RE = re.compile(r'^(\*\*|__)(?P<label>[^*_]+?):\1[ \t]*(?P<value>.*)$')
+# Inline markup, longest delimiters first so '***x***' is not read as '*' + '**x**' + '*'
+INLINE_RE = re.compile(
+    r'(\*\*\*|___)(?P<bolditalic>.+?)\1'
+    r'|(\*\*|__)(?P<bold>.+?)\3'
+    r'|(?<![\w*])(\*|_)(?P<italic>[^\s*_](?:.*?[^\s*_])?)\5(?![\w*])'
+    r'|`(?P<code>[^`]+)`'
+    r'|\[(?P<link>[^\]]+)\]\((?P<href>[^)]*)\)'
+)
+SAFE_HREF_RE = re.compile(r'^(https?:|mailto:|#|/)', re.IGNORECASE)
+
+
+class Document:
+    """A parsed proposal: the block list plus accessors for its title and metadata."""
+
+    def __init__(self, blocks, version=VERSION):
+        self.blocks = blocks
+        self.version = version
+
+    @classmethod
+    def from_bytes(cls, data):
+        payload = json.loads(zlib.decompress(data))
+        return cls(payload['blocks'], payload['v'])
+
+    def to_bytes(self) -> bytes:
+        payload = {'v': self.version, 'blocks': self.blocks}
+        return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 6)
+
+    @property
+    def title(self):
+        for block in self.blocks:
+            if block[0] == 'h':
+                return plain_text(block[2])
+        return None
+
+    @property
+    def meta(self):
+        """[(label, value)] from the header block, empty if the proposal has none."""
+        for block in self.blocks:
+            if block[0] == 'meta':
+                return [(label, plain_text(value)) for label, value in block[1]]
+        return []
+
+
+def parse(text) -> Document:
+    return _Parser().parse(text)
+
+
+def load(data, content):
+    """The stored document, or a fresh parse of content if there is none or it is outdated."""
+    if data:
+        document = Document.from_bytes(data)
+        if document.version == VERSION:
+            return document
+    return parse(content or '')
+
+
+def parse_inline(text):
+    spans = []
+    position = 0
+    for match in INLINE_RE.finditer(text):
+        if match.start() > position:
+            spans.append(text[position:match.start()])
+        if match.group('bolditalic') is not None:
+            spans.append(['bi', match.group('bolditalic')])
+        elif match.group('bold') is not None:
+            spans.append(['b', match.group('bold')])
+        elif match.group('italic') is not None:
+            spans.append(['i', match.group('italic')])
+        elif match.group('code') is not None:
+            spans.append(['c', match.group('code')])
+        else:
+            spans.append(['a', match.group('link'), match.group('href').strip()])
+        position = match.end()
+    if position < len(text):
+        spans.append(text[position:])
+    return spans
+
+
+def plain_text(spans):
+    return ''.join(span if isinstance(span, str) else (span[1] if len(span) > 1 else '\n') for span in spans)
+
+
+def _extend(spans, more):
+    """Appends spans, merging neighbouring plain strings."""
+    for span in more:
+        if isinstance(span, str) and spans and isinstance(spans[-1], str):
+            spans[-1] += span
+        else:
+            spans.append(span)
+    return spans
+
+
+def _split_row(line):
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|'):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split('|')]
+
+
+class _Parser:
+    """Walks the markdown lines once, emitting blocks as they close."""
+
+    def __init__(self):
+        self.blocks = []
+        self.paragraph_lines = []
+        self.list_indents = []
+        self.last = None  # what the previous line continued: 'item', 'quote' or None
+
+    def parse(self, text):
+        lines = text.replace('\r\n', '\n').split('\n')
+        i = 0
+        while i < len(lines):
+            line = lines[i]
+            stripped = line.strip()
+            last, self.last = self.last, None
+
+            if stripped.startswith('```'):
+                self.flush_paragraph()
+                i = self.code_block(lines, i + 1)
+                continue
+            if not stripped:
+                self.flush_paragraph()
+            elif HEADING_RE.match(stripped):
+                self.flush_paragraph()
+                hashes, heading = HEADING_RE.match(stripped).groups()
+                self.blocks.append(['h', len(hashes), parse_inline(heading)])
+            elif HR_RE.match(stripped):
+                self.flush_paragraph()
+                self.blocks.append(['hr'])
+            elif stripped.startswith('|') and i + 1 < len(lines) and TABLE_SEPARATOR_RE.match(lines[i + 1]):
+                self.flush_paragraph()
+                i = self.table(lines, i)
+                continue
+            elif BULLET_RE.match(line) or NUMBERED_RE.match(line):
+                self.flush_paragraph()
+                self.list_item(line)
+                self.last = 'item'
+            elif stripped.startswith('>'):
+                self.flush_paragraph()
+                spans = parse_inline(stripped.lstrip('>').strip())
+                if last == 'quote':
+                    _extend(self.blocks[-1][1], ['\n'] + spans)
+                else:
+                    self.blocks.append(['q', spans])
+                self.last = 'quote'
+            elif last == 'item':
+                # Lazy continuation of the list item above
+                _extend(self.blocks[-1][1][-1][2], ['\n'] + parse_inline(stripped))
+                self.last = 'item'
+            else:
+                self.paragraph_lines.append(line)
+            i += 1
+        self.flush_paragraph()
+        return Document(self.blocks)
+
+    def flush_paragraph(self):
+        if not self.paragraph_lines:
+            return
+        lines, self.paragraph_lines = self.paragraph_lines, []
+
+        if len(self.blocks) == 1 and self.blocks[0][:2] == ['h', 1]:
+            matches = [META_RE.match(line.strip()) for line in lines]
+            if all(matches):
+                self.blocks.append(['meta', [[match.group('label').strip(),
+                                              parse_inline(match.group('value').rstrip('\\').strip())]
+                                             for match in matches]])
+                return
+
+        spans = []
+        for n, line in enumerate(lines):
+            if n:
+                # Two trailing spaces (or a backslash) mark a markdown hard break
+                previous = lines[n - 1]
+                spans.append(['br'] if previous.endswith('  ') or previous.endswith('\\') else '\n')
+            _extend(spans, parse_inline(line.strip().rstrip('\\')))
+        self.blocks.append(['p', spans])
+
+    def list_item(self, line):
+        bullet = BULLET_RE.match(line)
+        indent, text = (bullet or NUMBERED_RE.match(line)).groups()
+        indent = len(indent.expandtabs(4))
+
+        if not self.blocks or self.blocks[-1][0] != 'list':
+            self.blocks.append(['list', []])
+            self.list_indents = []
+        # Nesting follows the indents actually used, whether 2 or 4 spaces per level
+        while self.list_indents and indent < self.list_indents[-1]:
+            self.list_indents.pop()
+        if not self.list_indents or indent > self.list_indents[-1]:
+            self.list_indents.append(indent)
+        self.blocks[-1][1].append([len(self.list_indents) - 1, 0 if bullet else 1, parse_inline(text)])
+
+    def table(self, lines, start):
+        header = [parse_inline(cell) for cell in _split_row(lines[start])]
+        rows = []
+        i = start + 2
+        while i < len(lines) and lines[i].strip().startswith('|'):
+            rows.append([parse_inline(cell) for cell in _split_row(lines[i])])
+            i += 1
+        self.blocks.append(['table', header, rows])
+        return i
+
+    def code_block(self, lines, start):
+        i = start
+        code = []
+        while i < len(lines) and not lines[i].strip().startswith('```'):
+            code.append(lines[i])
+            i += 1
+        self.blocks.append(['code', '\n'.join(code)])
+        return i + 1
+
+
+# HTML, for the proposal page and the PDF engines
+
+_HTML_TAGS = {'b': ('<strong>', '</strong>'), 'i': ('<em>', '</em>'), 'bi': ('<strong><em>', '</em></strong>'),
+              'c': ('<code>', '</code>')}
+
+
+def inline_html(spans):
+    parts = []
+    for span in spans:
+        if isinstance(span, str):
+            parts.append(str(escape(span)))
+        elif span[0] == 'br':
+            parts.append('<br />\n')
+        elif span[0] == 'a':
+            text = escape(span[1])
+            # Model output is not trusted: only plain web and mail links become anchors
+            parts.append(f'<a href="{escape(span[2])}">{text}</a>' if SAFE_HREF_RE.match(span[2]) else str(text))
+        else:
+            opening, closing = _HTML_TAGS[span[0]]
+            parts.append(f'{opening}{escape(span[1])}{closing}')
+    return ''.join(parts)
+
+
+def _list_html(items):
+    parts, open_lists = [], []  # open_lists: tags of the lists enclosing the current item
+    for depth, ordered, spans in items:
+        tag = 'ol' if ordered else 'ul'
+        depth = min(depth, len(open_lists))
+        while len(open_lists) > depth + 1:
+            parts[-1] += '</li>'
+            parts.append(f'</{open_lists.pop()}>')
+        if len(open_lists) == depth + 1:
+            parts[-1] += '</li>'
+            if open_lists[-1] != tag:
+                parts.append(f'</{open_lists.pop()}>')
+        if len(open_lists) == depth:
+            parts.append(f'<{tag}>')
+            open_lists.append(tag)
+        parts.append(f'<li>{inline_html(spans)}')
+    while open_lists:
+        parts[-1] += '</li>'
+        parts.append(f'</{open_lists.pop()}>')
+    return '\n'.join(parts)
+
+
+def _table_html(header, rows):
+    columns = max([len(header)] + [len(row) for row in rows])
+    lines = ['<table>', '<thead>', '<tr>']
+    lines += [f'<th>{inline_html(header[c]) if c < len(header) else ""}</th>' for c in range(columns)]
+    lines += ['</tr>', '</thead>', '<tbody>']
+    for row in rows:
+        lines.append('<tr>')
+        lines += [f'<td>{inline_html(row[c]) if c < len(row) else ""}</td>' for c in range(columns)]
+        lines.append('</tr>')
+    lines += ['</tbody>', '</table>']
+    return '\n'.join(lines)
+
+
+def render_html(document) -> str:
+    parts = []
+    for block in document.blocks:
+        kind = block[0]
+        if kind == 'h':
+            parts.append(f'<h{block[1]}>{inline_html(block[2])}</h{block[1]}>')
+        elif kind == 'meta':
+            parts.append('<p>' + '<br />\n'.join(f'<strong>{escape(label)}:</strong> {inline_html(value)}'
+                                                 for label, value in block[1]) + '</p>')
+        elif kind == 'p':
+            parts.append(f'<p>{inline_html(block[1])}</p>')
+        elif kind == 'list':
+            parts.append(_list_html(block[1]))
+        elif kind == 'table':
+            parts.append(_table_html(block[1], block[2]))
+        elif kind == 'q':
+            parts.append(f'<blockquote>\n<p>{inline_html(block[1])}</p>\n</blockquote>')
+        elif kind == 'code':
+            parts.append(f'<pre><code>{escape(block[1])}\n</code></pre>')
+        elif kind == 'hr':
+            parts.append('<hr />')
+    return '\n'.join(parts)
+
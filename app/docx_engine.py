@@ -0,0 +1,178 @@
+# app/docx_engine.py
+import copy
+import io
+import threading
+
+STYLE_NAMES = {'Heading 1', 'Heading 2', 'Heading 3', 'Quote', 'Table Grid',
+               'List Bullet', 'List Bullet 2', 'List Bullet 3', 'List Number', 'List Number 2', 'List Number 3'}
+
+
+class DocxRenderer:
+    """
+    Structured document (see app/document.py) -> DOCX converter.
+
+    The base template (python-docx's default, or DOCX_TEMPLATE_PATH) is read
+    and styled once; every export works on a deep copy of it and is saved into
+    an in-memory buffer. Handles the metadata header, headings, paragraphs with
+    hard line breaks, bold/italic/code/link inlines, nested bullet and
+    numbered lists, tables, block quotes, code blocks and horizontal rules.
+    """
+
+    name = 'docx'
+
+    def __init__(self, template_path=None, font_name='Arial', body_size=11, heading_size=12):
+        self.template_path = template_path
+        self.font_name = font_name
+        self.body_size = body_size
+        self.heading_size = heading_size
+        self._template = None
+        self._style_ids = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(template_path=config.get('DOCX_TEMPLATE_PATH'),
+                   font_name=config.get('DOCX_FONT_NAME', 'Arial'))
+
+    def _build_template(self):
+        from docx import Document
+        from docx.shared import Pt
+
+        document = Document(self.template_path)
+        styles = document.styles
+        styles['Normal'].font.name = self.font_name
+        styles['Normal'].font.size = Pt(self.body_size)
+        for level, size in ((1, self.heading_size + 4), (2, self.heading_size + 2), (3, self.heading_size)):
+            styles[f'Heading {level}'].font.name = self.font_name
+            styles[f'Heading {level}'].font.size = Pt(size)
+
+        # python-docx resolves style names with a linear scan of styles.xml on
+        # every add_paragraph(style=...); resolve the ids used here once instead
+        self._style_ids = {style.name: style.style_id for style in styles
+                           if style.name in STYLE_NAMES}
+        return document
+
+    def _new_document(self):
+        if self._template is None:
+            with self._lock:
+                if self._template is None:
+                    self._template = self._build_template()
+        return copy.deepcopy(self._template)
+
+    def warm(self):
+        """Loads and styles the template ahead of the first export."""
+        self._new_document()
+
+    def render(self, proposal_document) -> bytes:
+        document = self._new_document()
+        _DocxWriter(document, self._style_ids).write(proposal_document)
+        buffer = io.BytesIO()
+        document.save(buffer)
+        return buffer.getvalue()
+
+
+class _DocxWriter:
+    """Emits one paragraph or table per document block."""
+
+    def __init__(self, document, style_ids):
+        self.document = document
+        self.style_ids = style_ids
+
+    def add_paragraph(self, style=None):
+        paragraph = self.document.add_paragraph()
+        if style in self.style_ids:
+            paragraph._p.style = self.style_ids[style]
+        return paragraph
+
+    def write(self, proposal_document):
+        for block in proposal_document.blocks:
+            kind = block[0]
+            if kind == 'h':
+                self.add_inline(self.add_paragraph(f'Heading {min(block[1], 3)}'), block[2])
+            elif kind == 'meta':
+                self.meta(block[1])
+            elif kind == 'p':
+                self.add_inline(self.add_paragraph(), block[1])
+            elif kind == 'list':
+                for depth, ordered, spans in block[1]:
+                    style = 'List Number' if ordered else 'List Bullet'
+                    if depth:
+                        style = f'{style} {min(depth, 2) + 1}'
+                    self.add_inline(self.add_paragraph(style), spans)
+            elif kind == 'table':
+                self.table(block[1], block[2])
+            elif kind == 'q':
+                self.add_inline(self.add_paragraph('Quote'), block[1])
+            elif kind == 'code':
+                self.add_paragraph().add_run(block[1]).font.name = 'Courier New'
+            elif kind == 'hr':
+                self.horizontal_rule()
+
+    def meta(self, entries):
+        paragraph = self.add_paragraph()
+        for n, (label, value) in enumerate(entries):
+            if n:
+                paragraph.add_run().add_break()
+            paragraph.add_run(f'{label}:').bold = True
+            paragraph.add_run(' ')
+            self.add_inline(paragraph, value)
+
+    def table(self, header, rows):
+        columns = max([len(header)] + [len(row) for row in rows])
+        table = self.document.add_table(rows=1 + len(rows), cols=columns)
+        if 'Table Grid' in self.style_ids:
+            table._tbl.tblStyle_val = self.style_ids['Table Grid']
+        for r, cells in enumerate([header] + rows):
+            row_cells = table.rows[r].cells
+            for c in range(columns):
+                paragraph = row_cells[c].paragraphs[0]
+                self.add_inline(paragraph, cells[c] if c < len(cells) else [])
+                if r == 0:
+                    for run in paragraph.runs:
+                        run.bold = True
+
+    def horizontal_rule(self):
+        from docx.oxml import OxmlElement
+        from docx.oxml.ns import qn
+
+        paragraph = self.add_paragraph()
+        borders = OxmlElement('w:pBdr')
+        bottom = OxmlElement('w:bottom')
+        for key, value in (('w:val', 'single'), ('w:sz', '6'), ('w:space', '1'), ('w:color', 'auto')):
+            bottom.set(qn(key), value)
+        borders.append(bottom)
+        paragraph._p.get_or_add_pPr().append(borders)
+
+    @staticmethod
+    def add_inline(paragraph, spans):
+        for span in spans:
+            if isinstance(span, str):
+                # Soft line breaks are spaces in Word, as in the rendered page
+                paragraph.add_run(span.replace('\n', ' '))
+            elif span[0] == 'br':
+                paragraph.add_run().add_break()
+            elif span[0] == 'bi':
+                run = paragraph.add_run(span[1])
+                run.bold = run.italic = True
+            elif span[0] == 'b':
+                paragraph.add_run(span[1]).bold = True
+            elif span[0] == 'i':
+                paragraph.add_run(span[1]).italic = True
+            elif span[0] == 'c':
+                paragraph.add_run(span[1]).font.name = 'Courier New'
+            else:
+                paragraph.add_run(span[1])
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_docx_renderer(config):
+    """Returns the process-wide DocxRenderer."""
+    global _renderer
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = DocxRenderer.from_config(config)
+    return _renderer
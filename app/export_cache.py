@@ -0,0 +1,155 @@
+# app/export_cache.py
+import glob
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+class ExportCache:
+    """
+    Content-addressed, in-memory LRU cache of rendered proposal exports.
+
+    Entries are keyed by (proposal_id, format) and remember the SHA-256 of the
+    content they were rendered from, so an edited proposal misses the cache and
+    its stale bytes are dropped on the next download.
+
+    With EXPORT_CACHE_DIR set (wsgi.py does for multi-worker deployments),
+    renders are also written there, one file per proposal, format and digest,
+    so a render done by one worker process is reused by the others. The
+    downloads janitor keeps that directory bounded.
+    """
+
+    def __init__(self, app=None):
+        self._entries = OrderedDict()  # (proposal_id, fmt) -> (digest, data)
+        self._total_size = 0
+        self._lock = threading.Lock()
+        self.max_bytes = 0
+        self.max_entries = 0
+        self.directory = None
+        self._app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('EXPORT_CACHE_MAX_BYTES', 200 * 1024 * 1024)
+        app.config.setdefault('EXPORT_CACHE_MAX_ENTRIES', 2000)
+        app.config.setdefault('EXPORT_CACHE_DIR', os.getenv('EXPORT_CACHE_DIR'))
+
+        self._app = app
+        self.max_bytes = app.config['EXPORT_CACHE_MAX_BYTES']
+        self.max_entries = app.config['EXPORT_CACHE_MAX_ENTRIES']
+        self.directory = app.config['EXPORT_CACHE_DIR']
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+        app.extensions['export_cache'] = self
+
+    @staticmethod
+    def content_digest(content: str) -> str:
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+    def get(self, proposal_id: int, content: str, fmt: str):
+        """Returns the cached export if it matches content, without rendering on a miss."""
+        digest = self.content_digest(content)
+        key = (proposal_id, fmt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == digest:
+                self._entries.move_to_end(key)
+                return entry[1]
+        data = self._read_shared(proposal_id, fmt, digest)
+        if data is not None:
+            self._store(key, digest, data)
+        return data
+
+    def fetch(self, proposal_id: int, content: str, fmt: str, render) -> bytes:
+        """Returns the rendered export, calling render(content) only on a miss."""
+        digest = self.content_digest(content)
+        key = (proposal_id, fmt)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == digest:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                # Content changed: drop the stale render
+                self._remove(key)
+
+        data = self._read_shared(proposal_id, fmt, digest)
+        if data is None:
+            data = render(content)
+            self._write_shared(proposal_id, fmt, digest, data)
+        self._store(key, digest, data)
+        return data
+
+    def invalidate(self, proposal_id: int):
+        """Drops every cached format of a proposal."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == proposal_id]:
+                self._remove(key)
+        if self.directory:
+            for path in glob.glob(os.path.join(self.directory, f'{proposal_id}-*')):
+                self._unlink(path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._total_size}
+
+    def _store(self, key, digest, data):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if len(data) <= self.max_bytes:
+                self._entries[key] = (digest, data)
+                self._total_size += len(data)
+                self._evict()
+
+    def _shared_path(self, proposal_id, fmt, digest):
+        return os.path.join(self.directory, f'{proposal_id}-{fmt}-{digest}')
+
+    def _read_shared(self, proposal_id, fmt, digest):
+        if not self.directory:
+            return None
+        path = self._shared_path(proposal_id, fmt, digest)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # the janitor evicts the least recently used files first
+            return data
+        except OSError:
+            return None
+
+    def _write_shared(self, proposal_id, fmt, digest, data):
+        if not self.directory:
+            return
+        path = self._shared_path(proposal_id, fmt, digest)
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            # Written aside and renamed, so other workers never read a partial file
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            self._app.logger.warning(f"Could not write {path}: {str(e)}")
+            self._unlink(temp_path)
+            return
+        # Renders of older versions of this proposal are dead weight
+        for stale in glob.glob(os.path.join(self.directory, f'{proposal_id}-{fmt}-*')):
+            if stale != path and not stale.endswith('.tmp'):
+                self._unlink(stale)
+
+    @staticmethod
+    def _unlink(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _remove(self, key):
+        digest, data = self._entries.pop(key)
+        self._total_size -= len(data)
+
+    def _evict(self):
+        while self._entries and (self._total_size > self.max_bytes or len(self._entries) > self.max_entries):
+            self._remove(next(iter(self._entries)))
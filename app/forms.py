@@ -1,23 +1,27 @@
 # app/forms.py
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileRequired, FileAllowed
 from wtforms import (StringField, TextAreaField, FloatField, IntegerField, SelectField,
-                     SubmitField, PasswordField)
-from wtforms.validators import DataRequired, Email, NumberRange, Length, EqualTo
+                     SubmitField, PasswordField, BooleanField, DateField, HiddenField)
+from wtforms.validators import DataRequired, Email, NumberRange, Length, EqualTo, Optional
 from flask_babel import lazy_gettext as _
 
 
+PROJECT_TYPE_CHOICES = [
+    ('Agriculture', _('Agriculture')),
+    ('Livestock', _('Livestock')),
+    ('Fishing', _('Fishing')),
+    ('Transportation', _('Transportation')),
+    ('Food and Beverage', _('Food and Beverage')),
+    ('Culture and Arts', _('Culture and Arts')),
+    ('Other Business', _('Other Business')),
+]
+
+
 class ProposalForm(FlaskForm):
 
     project_name = StringField((_('Project Name')), validators=[DataRequired(), Length(min=2, max=100)])
-    project_type = SelectField(_('Project Type'), choices=[
-        ('Agriculture', _('Agriculture')),
-        ('Livestock', _('Livestock')),
-        ('Fishing', _('Fishing')),
-        ('Transportation', _('Transportation')),
-        ('Food and Beverage', _('Food and Beverage')),
-        ('Culture and Arts', _('Culture and Arts')),
-        ('Other Business', _('Other Business')),
-    ], validators=[DataRequired()])
+    project_type = SelectField(_('Project Type'), choices=PROJECT_TYPE_CHOICES, validators=[DataRequired()])
     description = TextAreaField((_('Brief Description')), validators=[DataRequired(), Length(min=20, max=500)])
     budget = FloatField((_('Estimated Budget (Tsh)')), validators=[DataRequired(), NumberRange(min=0.01)])
     duration_weeks = IntegerField((_('Estimated Duration (weeks)')), validators=[DataRequired(), NumberRange(min=1)])
@@ -35,7 +39,37 @@ class ProposalForm(FlaskForm):
     audience = StringField((_('Target Audience')), validators=[DataRequired(), Length(min=2, max=100)])
     contact_email = StringField((_('Contact Email for Proposal')), validators=[DataRequired(), Email()])
     mobile_number = StringField((_('Contact Mobile Number ')), validators=[DataRequired(),Length(min=11, max=12)])
+    bypass_cache = BooleanField(_('Generate a fresh proposal (ignore saved results)'))
     submit = SubmitField(_('Generate Proposal'))
 
 
+class SearchForm(FlaskForm):
+    class Meta:
+        csrf = False  # Submitted with GET, so results can be bookmarked
+
+    q = StringField(_('Search'), validators=[DataRequired(), Length(max=200)])
+    project_type = SelectField(_('Project Type'), choices=[('', _('All types'))] + PROJECT_TYPE_CHOICES,
+                               validators=[Optional()])
+    date_from = DateField(_('From'), validators=[Optional()])
+    date_to = DateField(_('To'), validators=[Optional()])
+    submit = SubmitField(_('Search'))
+
+
+class SectionRegenerateForm(FlaskForm):
+    section = SelectField(_('Section'), choices=[], validators=[DataRequired()])  # filled in by the view
+    instructions = TextAreaField(_('What should change? (optional)'), validators=[Optional(), Length(max=300)])
+    # Proposal.version the form was rendered for; the edit is refused if the proposal has moved on
+    version = HiddenField(validators=[DataRequired()])
+    submit = SubmitField(_('Regenerate Section'))
+
+
+class RevisionRestoreForm(FlaskForm):
+    version = HiddenField(validators=[DataRequired()])
+    submit = SubmitField(_('Restore'))
+
 
+class BatchUploadForm(FlaskForm):
+    rows_file = FileField(_('Projects file (CSV or JSON)'), validators=[
+        FileRequired(), FileAllowed(['csv', 'json'], _('Upload a .csv or .json file'))])
+    bypass_cache = BooleanField(_('Generate fresh proposals (ignore saved results)'))
+    submit = SubmitField(_('Generate Proposals'))
@@ -0,0 +1,106 @@
+# app/fragment_cache.py
+import threading
+from collections import OrderedDict
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+
+class FragmentCacheExtension(Extension):
+    """
+    {% cache 'name', part, ... %}...{% endcache %}
+
+    Renders the block once and reuses the HTML while the key is unchanged.
+    The key is the template and line of the tag, the request locale, the
+    current user, that user's content version (see FragmentCache), and the
+    parts given in the tag. Anything else the block shows must be a part.
+    """
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [nodes.Const(parser.name), nodes.Const(lineno), parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.List(parts)]), [], [], body).set_lineno(lineno)
+
+    def _render(self, parts, caller):
+        return self.environment.fragment_cache.fetch(parts, caller)
+
+
+class FragmentCache:
+    """
+    Bounded LRU of rendered template fragments, shared by all requests of the
+    process. Changing a user's proposals bumps that user's content version
+    (SQLAlchemy events on Proposal), which retires all of their fragments;
+    switching language changes the locale in the key. Fragments also include
+    what they display in their key, so another worker's stale copy is never
+    served after an edit. It just falls out of the LRU.
+    """
+
+    def __init__(self, app=None):
+        self._app = None
+        self._cache = OrderedDict()
+        self._versions = {}  # user id -> content version
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0}
+        self.max_entries = 5000
+        self.enabled = True
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # Off while debugging, where templates are edited and reloaded in place
+        app.config.setdefault('FRAGMENT_CACHE_ENABLED', not app.debug)
+        app.config.setdefault('FRAGMENT_CACHE_SIZE', 5000)
+
+        self._app = app
+        self.enabled = app.config['FRAGMENT_CACHE_ENABLED']
+        self.max_entries = app.config['FRAGMENT_CACHE_SIZE']
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        app.jinja_env.fragment_cache = self
+        app.extensions['fragment_cache'] = self
+
+    def version(self, user_id):
+        return self._versions.get(user_id, 0)
+
+    def invalidate_user(self, user_id):
+        """Retires every fragment rendered for this user."""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def fetch(self, parts, render):
+        if not self.enabled:
+            return render()
+
+        from flask_babel import get_locale
+        from flask_login import current_user
+
+        user_id = current_user.get_id() if current_user else None
+        user_id = int(user_id) if user_id is not None else None
+        key = (str(get_locale()), user_id, self.version(user_id), *parts)
+
+        with self._lock:
+            html = self._cache.get(key)
+            if html is not None:
+                self._cache.move_to_end(key)
+                self._counters['hits'] += 1
+                return Markup(html)
+            self._counters['misses'] += 1
+
+        html = render()
+        with self._lock:
+            self._cache[key] = str(html)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return Markup(html)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counters, entries=len(self._cache))
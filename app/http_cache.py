@@ -0,0 +1,107 @@
+# app/http_cache.py
+import hashlib
+import os
+
+from flask import request, session
+from werkzeug.security import safe_join
+
+
+class HTTPCache:
+    """
+    Per-endpoint Cache-Control policies, content-fingerprinted static URLs and
+    strong ETags for conditional GETs.
+
+    Static files are linked as /static/<file>?v=<hash of file> and served as
+    immutable for a year, as long as v is the file's current hash; a stale
+    or made-up v gets the plain static policy. Endpoints listed in HTTP_CACHE_POLICIES get their
+    own header; everything else stays 'private, no-store'.
+    """
+
+    IMMUTABLE = 'public, max-age=31536000, immutable'
+
+    def __init__(self, app=None):
+        self._app = None
+        self._static_hashes = {}
+        self.build_id = ''
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('HTTP_CACHE_DEFAULT_POLICY', 'private, no-store')
+        app.config.setdefault('HTTP_CACHE_POLICIES', {
+            'static': 'public, max-age=3600',  # un-fingerprinted static URLs
+            'main.favicon': 'public, max-age=86400',
+            # Revalidated on every use via ETag; never stored by shared caches
+            'main.view_proposal': 'private, no-cache',
+            'main.download_proposal': 'private, no-cache',
+        })
+
+        self._app = app
+        # Templates are part of every rendered page, so they salt every ETag:
+        # a deploy that changes a template changes the ETags with it
+        self.build_id = self._hash_tree(os.path.join(app.root_path, app.template_folder))
+        app.url_defaults(self._fingerprint_static)
+        app.after_request(self._apply_policy)
+        app.extensions['http_cache'] = self
+
+    def etag_for(self, *parts) -> str:
+        """Strong ETag over the given parts plus the template build id."""
+        digest = hashlib.sha256(self.build_id.encode('utf-8'))
+        for part in parts:
+            digest.update(b'\x00' + str(part).encode('utf-8'))
+        return digest.hexdigest()[:32]
+
+    def not_modified(self, etag):
+        """
+        Returns a 304 response when the client already holds this ETag, else None.
+        Pages with pending flash messages are always rendered so the messages show.
+        """
+        if '_flashes' in session or not request.if_none_match.contains(etag):
+            return None
+        response = self._app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    def _fingerprint_static(self, endpoint, values):
+        if endpoint != 'static' or 'filename' not in values or 'v' in values:
+            return
+        version = self._static_version(values['filename'])
+        if version is not None:
+            values['v'] = version
+
+    def _static_version(self, filename):
+        """The fingerprint of a static file, or None if there is no such file."""
+        version = self._static_hashes.get(filename)
+        if version is None:
+            filepath = safe_join(self._app.static_folder, filename)
+            if filepath is None or not os.path.isfile(filepath):
+                return None
+            with open(filepath, 'rb') as f:
+                version = hashlib.sha256(f.read()).hexdigest()[:12]
+            if not self._app.debug:  # re-read edited files while developing
+                self._static_hashes[filename] = version
+        return version
+
+    def _apply_policy(self, response):
+        endpoint = request.endpoint
+        version = request.args.get('v')
+        if (endpoint == 'static' and version and response.status_code in (200, 304)
+                and version == self._static_version(request.view_args['filename'])):
+            policy = self.IMMUTABLE
+        else:
+            policy = self._app.config['HTTP_CACHE_POLICIES'].get(endpoint,
+                                                                 self._app.config['HTTP_CACHE_DEFAULT_POLICY'])
+        response.headers['Cache-Control'] = policy
+        return response
+
+    @staticmethod
+    def _hash_tree(directory):
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                digest.update(os.path.relpath(path, directory).encode('utf-8'))
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+        return digest.hexdigest()[:16]
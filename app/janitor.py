@@ -0,0 +1,92 @@
+# app/janitor.py
+import os
+import threading
+import time
+
+
+class DownloadsJanitor:
+    """
+    Keeps UPLOAD_FOLDER bounded. Downloads are served from memory, so this
+    only concerns files something explicitly wrote to disk: anything older
+    than EXPORT_MAX_AGE seconds is deleted, then the oldest files go until
+    the folder is under EXPORT_MAX_DISK_BYTES.
+
+    The shared export cache directory (EXPORT_CACHE_DIR, if set) is swept the
+    same way with EXPORT_CACHE_DIR_MAX_AGE and EXPORT_CACHE_DIR_MAX_BYTES; its
+    files are touched when read, so the least recently used go first.
+    """
+
+    def __init__(self, app=None):
+        self._app = None
+        self._thread = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('EXPORT_MAX_AGE', 60 * 60)
+        app.config.setdefault('EXPORT_MAX_DISK_BYTES', 100 * 1024 * 1024)
+        app.config.setdefault('EXPORT_JANITOR_INTERVAL', 5 * 60)
+        app.config.setdefault('EXPORT_CACHE_DIR_MAX_AGE', 7 * 24 * 60 * 60)
+        app.config.setdefault('EXPORT_CACHE_DIR_MAX_BYTES', 500 * 1024 * 1024)
+
+        self._app = app
+        # Started with the first request rather than here, so CLI commands and
+        # pre-forking servers' master processes don't spawn the thread
+        app.before_request(self._ensure_started)
+        app.extensions['downloads_janitor'] = self
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='downloads-janitor', daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                self._app.logger.error(f"Downloads janitor failed: {str(e)}")
+            time.sleep(self._app.config['EXPORT_JANITOR_INTERVAL'])
+
+    def sweep(self):
+        """Applies the age and size limits once. Returns the number of files removed."""
+        config = self._app.config
+        removed = self._sweep_folder(config['UPLOAD_FOLDER'], config['EXPORT_MAX_AGE'],
+                                     config['EXPORT_MAX_DISK_BYTES'])
+        if config.get('EXPORT_CACHE_DIR'):
+            removed += self._sweep_folder(config['EXPORT_CACHE_DIR'], config['EXPORT_CACHE_DIR_MAX_AGE'],
+                                          config['EXPORT_CACHE_DIR_MAX_BYTES'])
+        return removed
+
+    def _sweep_folder(self, folder, max_age, max_bytes):
+        if not os.path.isdir(folder):
+            return 0
+
+        now = time.time()
+        files = []
+        for entry in os.scandir(folder):
+            if entry.is_file(follow_symlinks=False):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        removed = 0
+        total = sum(size for _, size, _ in files)
+        for mtime, size, filepath in sorted(files):  # oldest first
+            if now - mtime <= max_age and total <= max_bytes:
+                break
+            try:
+                os.remove(filepath)
+                removed += 1
+                total -= size
+            except FileNotFoundError:
+                total -= size
+            except OSError as e:
+                self._app.logger.warning(f"Could not remove {filepath}: {str(e)}")
+
+        if removed:
+            self._app.logger.info(f"Downloads janitor removed {removed} file(s) from {folder}")
+        return removed
@@ -0,0 +1,296 @@
+# app/jobs.py
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from app.database import run_blocking
+from app.metrics import observe_stage, timed
+
+
+class GenerationQueue:
+    """
+    Runs proposal generation on a bounded thread pool.
+    Jobs live in the GenerationJob table, so anything still queued (or stuck
+    running) when the process stops is picked up again on the next start.
+
+    With GENERATION_ASYNC, jobs run as coroutines on one event loop thread
+    instead, streaming through the async LLM client (see LLM.astream), so the
+    number in flight is bounded by the LLM concurrency limit
+    (LLM_CONCURRENCY_MAX, LLM_MAX_CONNECTIONS) rather than by
+    GENERATION_WORKERS. Their database work runs in short units on
+    GENERATION_ASYNC_DB_THREADS threads, none of which holds a connection
+    while waiting on the model.
+    """
+
+    def __init__(self, app=None, db=None):
+        self._app = None
+        self._db = None
+        self._executor = None
+        self._loop = None
+        self._resumed = False
+        self._live = {}  # job_id -> chunks streamed so far by this process
+        self._crashed = {}  # job_id -> partial content, for jobs that could not be marked failed
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        app.config.setdefault('GENERATION_WORKERS', 4)
+        app.config.setdefault('GENERATION_JOB_TIMEOUT', timedelta(minutes=10))
+        app.config.setdefault('GENERATION_FLUSH_INTERVAL', 0.5)  # seconds between partial-content saves
+        app.config.setdefault('GENERATION_ASYNC', os.getenv('GENERATION_ASYNC', '').lower() in ('1', 'true', 'yes'))
+        app.config.setdefault('GENERATION_ASYNC_DB_THREADS', 4)
+        app.config.setdefault('GENERATION_FAIL_RETRIES', 3)  # attempts at marking a crashed job failed
+
+        self._app = app
+        self._db = db
+        self._executor = ThreadPoolExecutor(max_workers=app.config['GENERATION_WORKERS'],
+                                            thread_name_prefix='proposal-gen')
+        app.before_request(self._resume_pending)
+        app.extensions['generation_queue'] = self
+
+    def submit(self, user_id, proposal_data, locale, bypass_cache=False):
+        """Persists a new job and schedules it. Returns the GenerationJob."""
+        from app.models import GenerationJob
+
+        db = self._db
+        job = GenerationJob(user_id=user_id, proposal_data=proposal_data, locale=str(locale),
+                            bypass_cache=bypass_cache)
+        db.session.add(job)
+        db.session.commit()
+        self._schedule(job.id)
+        return job
+
+    def progress(self, job_id):
+        """
+        Returns (content_so_far, status) for a job. Jobs running in this
+        process are read from memory; anything else comes from the database.
+        """
+        from app.models import GenerationJob
+
+        chunks = self._live.get(job_id)
+        if chunks is not None:
+            return ''.join(chunks), 'running'
+        if job_id in self._crashed:
+            return self._crashed[job_id], 'failed'
+
+        db = self._db
+        job = db.session.get(GenerationJob, job_id, populate_existing=True)
+        result = (job.content or '', job.status) if job is not None else ('', 'failed')
+        # End the read transaction so a long-lived poller never blocks the writer
+        db.session.rollback()
+        return result
+
+    def _resume_pending(self):
+        """Re-schedules unfinished jobs once, on the first request after startup."""
+        if self._resumed:
+            return
+        with self._lock:
+            if self._resumed:
+                return
+            self._resumed = True
+
+        from app.models import GenerationJob
+
+        db = self._db
+        # A job still 'running' past the timeout belonged to a process that died
+        stale_before = datetime.utcnow() - self._app.config['GENERATION_JOB_TIMEOUT']
+        db.session.query(GenerationJob) \
+            .filter(GenerationJob.status == 'running', GenerationJob.updated_at < stale_before) \
+            .update({'status': 'queued'}, synchronize_session=False)
+        db.session.commit()
+
+        pending = db.session.query(GenerationJob.id) \
+            .filter_by(status='queued') \
+            .order_by(GenerationJob.created_at) \
+            .all()
+        for (job_id,) in pending:
+            self._schedule(job_id)
+        if pending:
+            self._app.logger.info(f"Resumed {len(pending)} pending generation job(s)")
+
+    def _schedule(self, job_id):
+        if self._app.config['GENERATION_ASYNC']:
+            asyncio.run_coroutine_threadsafe(self._run_async(job_id), self._event_loop())
+        else:
+            self._executor.submit(self._run, job_id)
+
+    def _event_loop(self):
+        """The loop async jobs run on, started with its thread on first use."""
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    loop.set_default_executor(ThreadPoolExecutor(
+                        max_workers=self._app.config['GENERATION_ASYNC_DB_THREADS'], thread_name_prefix='proposal-db'))
+                    threading.Thread(target=loop.run_forever, name='proposal-gen-async', daemon=True).start()
+                    self._loop = loop
+        return self._loop
+
+    def _claim(self, job_id):
+        """Marks a queued job running. Returns the GenerationJob, or None if another worker has it."""
+        from app.models import GenerationJob
+
+        db = self._db
+        # Claim atomically so a job resumed by two processes only runs once
+        claimed = db.session.query(GenerationJob) \
+            .filter_by(id=job_id, status='queued') \
+            .update({'status': 'running', 'updated_at': datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+        return db.session.get(GenerationJob, job_id) if claimed else None
+
+    def _save_content(self, job_id, content):
+        from app.models import GenerationJob
+
+        db = self._db
+        db.session.get(GenerationJob, job_id).content = content
+        db.session.commit()
+
+    def _complete(self, job_id, content):
+        """Saves the finished proposal and marks its job done."""
+        from app.models import GenerationJob, Proposal
+
+        db = self._db
+        job = db.session.get(GenerationJob, job_id)
+        data = job.proposal_data
+        proposal = Proposal(
+            title=data['project_name'],
+            content=content,
+            user_id=job.user_id,
+            generated_at=datetime.utcnow(),
+            project_type=data['project_type']
+        )
+        db.session.add(proposal)
+        db.session.flush()
+        job.proposal_id = proposal.id
+        job.content = content
+        job.status = 'done'
+        db.session.commit()
+
+    def _fail(self, job_id, error):
+        from app.models import GenerationJob
+
+        db = self._db
+        db.session.rollback()
+        job = db.session.get(GenerationJob, job_id)
+        job.status = 'failed'
+        job.error = error[:255]
+        db.session.commit()
+
+    def _fail_crashed(self, job_id, error, content=''):
+        """
+        _fail() for the crash handlers, retried with backoff (the database may
+        be locked). If it still cannot be saved, the job is reported failed
+        from memory so pollers and streams waiting on it stop.
+        """
+        db = self._db
+        attempts = self._app.config['GENERATION_FAIL_RETRIES']
+        for attempt in range(attempts):
+            try:
+                self._fail(job_id, error)
+                return
+            except Exception as e:
+                db.session.rollback()
+                self._app.logger.error(f"Marking generation job {job_id} failed (attempt {attempt + 1}) "
+                                       f"failed: {str(e)}")
+                if attempt + 1 < attempts:
+                    time.sleep(0.5 * 2 ** attempt)
+        self._crashed[job_id] = content
+
+    def _run(self, job_id):
+        from app.ai_generator import stream_proposal
+
+        db = self._db
+        chunks = []
+        with self._app.app_context():
+            try:
+                job = self._claim(job_id)
+                if job is None:
+                    return
+
+                data = job.proposal_data
+                chunks = self._live[job_id] = []
+                started = time.monotonic()
+                observe_stage('generate', 'queue_wait', (datetime.utcnow() - job.created_at).total_seconds(),
+                              job_id=job_id)
+                try:
+                    # Stream into memory and save the partial text periodically,
+                    # so readers see progress and a dropped client loses nothing
+                    flush_interval = self._app.config['GENERATION_FLUSH_INTERVAL']
+                    last_flush = time.monotonic()
+                    for delta in stream_proposal(data, locale=job.locale, use_cache=not job.bypass_cache,
+                                                 user_id=job.user_id):
+                        chunks.append(delta)
+                        if time.monotonic() - last_flush >= flush_interval:
+                            job.content = ''.join(chunks)
+                            db.session.commit()
+                            last_flush = time.monotonic()
+                    content = ''.join(chunks)
+
+                    with timed('generate', 'db_commit', job_id=job_id):
+                        self._complete(job_id, content)
+                    observe_stage('generate', 'job_total', time.monotonic() - started, job_id=job_id,
+                                  chars=len(content))
+                except Exception as e:
+                    self._fail(job_id, str(e))
+                    observe_stage('generate', 'job_total', time.monotonic() - started, 'error', job_id=job_id,
+                                  error=type(e).__name__)
+                finally:
+                    self._live.pop(job_id, None)
+            except Exception as e:
+                db.session.rollback()
+                self._app.logger.error(f"Generation job {job_id} crashed: {str(e)}")
+                self._fail_crashed(job_id, str(e), ''.join(chunks))
+            finally:
+                db.session.remove()
+
+    async def _run_async(self, job_id):
+        """_run() as a coroutine; each database step is its own short session (run_blocking)."""
+        from app.ai_generator import astream_proposal
+
+        chunks = []
+        with self._app.app_context():
+            try:
+                job = await run_blocking(self._claim_values, job_id)
+                if job is None:
+                    return
+
+                chunks = self._live[job_id] = []
+                started = time.monotonic()
+                observe_stage('generate', 'queue_wait', (datetime.utcnow() - job['created_at']).total_seconds(),
+                              job_id=job_id)
+                try:
+                    flush_interval = self._app.config['GENERATION_FLUSH_INTERVAL']
+                    last_flush = time.monotonic()
+                    async for delta in astream_proposal(job['proposal_data'], locale=job['locale'],
+                                                        use_cache=not job['bypass_cache'], user_id=job['user_id']):
+                        chunks.append(delta)
+                        if time.monotonic() - last_flush >= flush_interval:
+                            await run_blocking(self._save_content, job_id, ''.join(chunks))
+                            last_flush = time.monotonic()
+                    content = ''.join(chunks)
+
+                    with timed('generate', 'db_commit', job_id=job_id):
+                        await run_blocking(self._complete, job_id, content)
+                    observe_stage('generate', 'job_total', time.monotonic() - started, job_id=job_id,
+                                  chars=len(content))
+                except Exception as e:
+                    await run_blocking(self._fail, job_id, str(e))
+                    observe_stage('generate', 'job_total', time.monotonic() - started, 'error', job_id=job_id,
+                                  error=type(e).__name__)
+                finally:
+                    self._live.pop(job_id, None)
+            except Exception as e:
+                self._app.logger.error(f"Generation job {job_id} crashed: {str(e)}")
+                await run_blocking(self._fail_crashed, job_id, str(e), ''.join(chunks))
+
+    def _claim_values(self, job_id):
+        # Plain values: the claiming session is gone by the time the coroutine reads them
+        job = self._claim(job_id)
+        if job is None:
+            return None
+        return {name: getattr(job, name)
+                for name in ('proposal_data', 'locale', 'bypass_cache', 'user_id', 'created_at')}
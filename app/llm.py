@@ -0,0 +1,504 @@
+# app/llm.py
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from app.admission import AdaptiveLimiter, RateLimitedError, RetryableLLMError, backoff_delay
+from app.metrics import LLM_RETRIES, REGISTRY, Gauge, observe_stage, record_usage, timed
+
+
+class LLMProvider:
+    """
+    A chat-completion backend. One instance is built per process and shared by
+    every generation, so connections and validation state are reused.
+    """
+
+    name = None
+
+    @classmethod
+    def from_config(cls, config):
+        return cls()
+
+    @classmethod
+    def preload(cls):
+        """Imports the backend's SDK without building a client (see LLM.warm)."""
+
+    def validate(self):
+        """Raises ValueError if the backend cannot be used (e.g. a bad API key)."""
+
+    def complete(self, messages, **params) -> str:
+        raise NotImplementedError
+
+    def stream(self, messages, **params):
+        """Yields the completion text in deltas."""
+        yield self.complete(messages, **params)
+
+    async def acomplete(self, messages, **params) -> str:
+        """complete() for coroutines. Backends without an async client run it on a thread."""
+        return await asyncio.to_thread(self.complete, messages, **params)
+
+    async def astream(self, messages, **params):
+        """stream() for coroutines: an async iterator of deltas."""
+        yield await self.acomplete(messages, **params)
+
+    def close(self):
+        pass
+
+
+class OpenAIProvider(LLMProvider):
+    """
+    OpenAI (or any OpenAI-compatible endpoint, via LLM_BASE_URL).
+    Holds a single client with a pooled HTTP connection and only re-checks
+    the API key once the previous validation is older than key_ttl seconds.
+    The async methods use an AsyncOpenAI client, built on first use; its
+    connection pool belongs to the event loop that first used it (the
+    generation queue's, see app/jobs.py).
+    """
+
+    name = 'openai'
+
+    def __init__(self, api_key, base_url=None, timeout=120.0, max_connections=20, key_ttl=3600):
+        import httpx
+        from openai import OpenAI, DefaultHttpxClient
+
+        self._http_client = DefaultHttpxClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        # Retries are done by the LLM extension, which also feeds 429s into its concurrency limit
+        self.client = OpenAI(api_key=api_key, base_url=base_url, http_client=self._http_client, max_retries=0)
+        self.key_ttl = key_ttl
+        self._validated_at = None
+        self._lock = threading.Lock()
+        self._settings = dict(api_key=api_key, base_url=base_url, timeout=timeout, max_connections=max_connections)
+        self._async_client = None
+        self._async_lock = None
+
+    @classmethod
+    def preload(cls):
+        import httpx
+        import openai
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            api_key=config['OPENAI_API_KEY'],
+            base_url=config.get('LLM_BASE_URL'),
+            timeout=config['LLM_TIMEOUT'],
+            max_connections=config['LLM_MAX_CONNECTIONS'],
+            key_ttl=config['LLM_KEY_VALIDATION_TTL']
+        )
+
+    def validate(self):
+        if self._key_is_fresh():
+            return
+        from openai import AuthenticationError
+
+        with self._lock:
+            if self._key_is_fresh():
+                return
+            try:
+                with timed('llm', 'validate_key'):
+                    self.client.models.list()  # Simple API call to verify key
+            except AuthenticationError as auth_err:
+                raise ValueError(f"Invalid OpenAI API key configured: {str(auth_err)}")
+            self._validated_at = time.monotonic()
+
+    async def avalidate(self):
+        if self._key_is_fresh():
+            return
+        from openai import AuthenticationError
+
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        # One check for every coroutine that finds the key unvalidated
+        async with self._async_lock:
+            if self._key_is_fresh():
+                return
+            try:
+                with timed('llm', 'validate_key'):
+                    await self.async_client.models.list()
+            except AuthenticationError as auth_err:
+                raise ValueError(f"Invalid OpenAI API key configured: {str(auth_err)}")
+            self._validated_at = time.monotonic()
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            import httpx
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+            settings = self._settings
+            http_client = DefaultAsyncHttpxClient(
+                timeout=settings['timeout'],
+                limits=httpx.Limits(max_connections=settings['max_connections'],
+                                    max_keepalive_connections=settings['max_connections'])
+            )
+            self._async_client = AsyncOpenAI(api_key=settings['api_key'], base_url=settings['base_url'],
+                                             http_client=http_client, max_retries=0)
+        return self._async_client
+
+    def _key_is_fresh(self):
+        return self._validated_at is not None and time.monotonic() - self._validated_at < self.key_ttl
+
+    def complete(self, messages, **params) -> str:
+        self.validate()
+        with self._translate_errors():
+            response = self.client.chat.completions.create(messages=messages, stream=False, **params)
+        if response.usage is not None:
+            record_usage(response.model, response.usage.prompt_tokens, response.usage.completion_tokens)
+        return response.choices[0].message.content
+
+    def stream(self, messages, **params):
+        self.validate()
+        with self._translate_errors():
+            # include_usage adds a final chunk (with no choices) carrying the token counts
+            stream = self.client.chat.completions.create(messages=messages, stream=True,
+                                                         stream_options={'include_usage': True}, **params)
+        for chunk in stream:
+            if chunk.usage is not None:
+                record_usage(chunk.model, chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def acomplete(self, messages, **params) -> str:
+        await self.avalidate()
+        with self._translate_errors():
+            response = await self.async_client.chat.completions.create(messages=messages, stream=False, **params)
+        if response.usage is not None:
+            record_usage(response.model, response.usage.prompt_tokens, response.usage.completion_tokens)
+        return response.choices[0].message.content
+
+    async def astream(self, messages, **params):
+        await self.avalidate()
+        with self._translate_errors():
+            stream = await self.async_client.chat.completions.create(messages=messages, stream=True,
+                                                                     stream_options={'include_usage': True},
+                                                                     **params)
+        async for chunk in stream:
+            if chunk.usage is not None:
+                record_usage(chunk.model, chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    @contextmanager
+    def _translate_errors(self):
+        """Turns the SDK's retryable failures into RateLimitedError / RetryableLLMError."""
+        import openai
+
+        try:
+            yield
+        except openai.RateLimitError as e:
+            raise RateLimitedError(str(e), retry_after=_retry_after(e.response))
+        except (openai.APIConnectionError, openai.InternalServerError) as e:  # includes APITimeoutError
+            raise RetryableLLMError(str(e), retry_after=_retry_after(getattr(e, 'response', None)))
+
+    def close(self):
+        self._http_client.close()
+
+
+def _retry_after(response):
+    """Seconds from a response's retry-after-ms / Retry-After headers, or None."""
+    if response is None:
+        return None
+    try:
+        if response.headers.get('retry-after-ms'):
+            return float(response.headers['retry-after-ms']) / 1000
+        if response.headers.get('retry-after'):
+            return float(response.headers['retry-after'])
+    except ValueError:
+        pass  # HTTP-date form; fall back to our own backoff
+    return None
+
+
+class StubProvider(LLMProvider):
+    """
+    In-process canned responses for offline development and tests.
+    Output is deterministic for a given prompt; latency and token rate can be
+    simulated with LLM_STUB_LATENCY and LLM_STUB_TOKENS_PER_SECOND.
+    """
+
+    name = 'stub'
+
+    def __init__(self, latency=0.0, tokens_per_second=0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(latency=config['LLM_STUB_LATENCY'], tokens_per_second=config['LLM_STUB_TOKENS_PER_SECOND'])
+
+    def complete(self, messages, **params) -> str:
+        return ''.join(self.stream(messages, **params))
+
+    def stream(self, messages, **params):
+        if self.latency:
+            time.sleep(self.latency)
+        tokens = stub_tokens(messages, params.get('max_tokens', 2000))
+        for token in tokens:
+            if self.tokens_per_second:
+                time.sleep(1.0 / self.tokens_per_second)
+            yield token
+        record_usage('stub', sum(len(m['content'].split()) for m in messages), len(tokens))
+
+    async def acomplete(self, messages, **params) -> str:
+        return ''.join([token async for token in self.astream(messages, **params)])
+
+    async def astream(self, messages, **params):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        tokens = stub_tokens(messages, params.get('max_tokens', 2000))
+        for token in tokens:
+            if self.tokens_per_second:
+                await asyncio.sleep(1.0 / self.tokens_per_second)
+            yield token
+        record_usage('stub', sum(len(m['content'].split()) for m in messages), len(tokens))
+
+
+STUB_SECTIONS = [
+    'Project Description', 'Objectives', 'Methodology', 'Project Activities', 'Budget Breakdown',
+    'Timeline', 'Expected Outcomes', 'Sustainability', 'Conclusion'
+]
+
+
+def stub_tokens(messages, max_tokens=2000):
+    """
+    Deterministic markdown proposal split into word-sized tokens. Shared by
+    StubProvider and the stand-alone stub server (app/llm_stub_server.py).
+    """
+    prompt = messages[-1]['content'] if messages else ''
+    words = [w for w in prompt.split() if w.isalpha()][:40] or ['project']
+    tokens = []
+    for section in STUB_SECTIONS:
+        tokens.append(f"\n## {section}\n\n")
+        for i in range(24):
+            tokens.append(words[(i + len(tokens)) % len(words)] + (". " if i % 8 == 7 else " "))
+        tokens.append("\n")
+    return tokens[:max_tokens]
+
+
+PROVIDERS = {
+    OpenAIProvider.name: OpenAIProvider,
+    StubProvider.name: StubProvider,
+}
+
+
+def register_provider(provider_class):
+    """Makes a custom LLMProvider selectable through LLM_PROVIDER."""
+    PROVIDERS[provider_class.name] = provider_class
+    return provider_class
+
+
+def _concurrency_samples():
+    # Read from the app serving the scrape, so a later create_app() in the same
+    # process reports its own limiter rather than the first app's
+    from flask import current_app, has_app_context
+
+    if not has_app_context() or 'llm' not in current_app.extensions:
+        return {}
+    stats = current_app.extensions['llm'].limiter.stats()
+    return {(state,): stats[state] for state in ('limit', 'in_flight', 'waiting')}
+
+
+REGISTRY.register(Gauge('proposal_llm_concurrency', 'Adaptive LLM concurrency limiter state.', ('state',),
+                        callback=_concurrency_samples))
+
+
+class LLM:
+    """
+    Flask extension holding the process-wide LLM provider.
+
+    complete() and stream() put every call through admission control: an
+    AdaptiveLimiter (AIMD concurrency limit + per-user fair queue, see
+    app/admission.py) and retries with jittered exponential backoff that
+    honour the provider's Retry-After. acomplete() and astream() do the same
+    for coroutines, against the same limiter, without tying up a thread.
+    """
+
+    def __init__(self, app=None):
+        self._app = None
+        self._provider = None
+        self.limiter = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('LLM_PROVIDER', os.getenv('LLM_PROVIDER', 'openai'))
+        app.config.setdefault('LLM_BASE_URL', os.getenv('LLM_BASE_URL'))
+        app.config.setdefault('LLM_TIMEOUT', 120.0)
+        app.config.setdefault('LLM_MAX_CONNECTIONS', int(os.getenv('LLM_MAX_CONNECTIONS', 20)))
+        app.config.setdefault('LLM_KEY_VALIDATION_TTL', 3600)
+        app.config.setdefault('LLM_STUB_LATENCY', 0.0)
+        app.config.setdefault('LLM_STUB_TOKENS_PER_SECOND', 0)
+        # Admission control
+        app.config.setdefault('LLM_CONCURRENCY_INITIAL', 8)
+        app.config.setdefault('LLM_CONCURRENCY_MIN', 1)
+        app.config.setdefault('LLM_CONCURRENCY_MAX', app.config['LLM_MAX_CONNECTIONS'])
+        app.config.setdefault('LLM_LATENCY_TOLERANCE', 2.0)  # x best recent latency before backing off
+        app.config.setdefault('LLM_QUEUE_TIMEOUT', 120.0)  # seconds a call may wait for a slot
+        app.config.setdefault('LLM_MAX_RETRIES', 4)
+        app.config.setdefault('LLM_BACKOFF_BASE', 1.0)
+        app.config.setdefault('LLM_BACKOFF_MAX', 30.0)
+
+        self._app = app
+        self.limiter = AdaptiveLimiter(
+            initial=app.config['LLM_CONCURRENCY_INITIAL'],
+            minimum=app.config['LLM_CONCURRENCY_MIN'],
+            maximum=app.config['LLM_CONCURRENCY_MAX'],
+            tolerance=app.config['LLM_LATENCY_TOLERANCE']
+        )
+        app.extensions['llm'] = self
+
+    def warm(self):
+        """
+        Loads the configured provider's SDK. The SDK is otherwise imported on
+        the first generation; the provider itself is still built per process,
+        since its connection pool can't be shared across a fork.
+        """
+        provider_class = PROVIDERS.get(self._app.config['LLM_PROVIDER'])
+        if provider_class is not None:
+            provider_class.preload()
+
+    @property
+    def provider(self) -> LLMProvider:
+        """Built on first use and then kept for the life of the process."""
+        if self._provider is None:
+            with self._lock:
+                if self._provider is None:
+                    name = self._app.config['LLM_PROVIDER']
+                    if name not in PROVIDERS:
+                        raise ValueError(f"Unknown LLM provider: {name}")
+                    self._provider = PROVIDERS[name].from_config(self._app.config)
+        return self._provider
+
+    def complete(self, messages, user=None, **params) -> str:
+        """provider.complete() under admission control; user is the fair-queue key."""
+        config = self._app.config
+        for attempt in range(config['LLM_MAX_RETRIES'] + 1):
+            with timed('llm', 'admission_wait'):
+                self.limiter.acquire(user, timeout=config['LLM_QUEUE_TIMEOUT'])
+            started = time.monotonic()
+            try:
+                with timed('llm', 'completion', attempt=attempt):
+                    result = self.provider.complete(messages, **params)
+            except RetryableLLMError as e:
+                self.limiter.release(rate_limited=isinstance(e, RateLimitedError))
+                self._backoff(attempt, e)
+                continue
+            except Exception:
+                self.limiter.release()
+                raise
+            self.limiter.release(latency=time.monotonic() - started)
+            return result
+
+    def stream(self, messages, user=None, **params):
+        """
+        provider.stream() under admission control. The slot is held until the
+        stream ends; only failures before the first delta are retried, and the
+        time to that first delta is what the limiter sees as latency.
+        """
+        config = self._app.config
+        for attempt in range(config['LLM_MAX_RETRIES'] + 1):
+            with timed('llm', 'admission_wait'):
+                self.limiter.acquire(user, timeout=config['LLM_QUEUE_TIMEOUT'])
+            started = time.monotonic()
+            latency = None
+            try:
+                for delta in self.provider.stream(messages, **params):
+                    if latency is None:
+                        latency = time.monotonic() - started
+                        observe_stage('llm', 'first_token', latency, attempt=attempt)
+                    yield delta
+            except RetryableLLMError as e:
+                self.limiter.release(latency=latency, rate_limited=isinstance(e, RateLimitedError))
+                observe_stage('llm', 'stream', time.monotonic() - started, 'error', attempt=attempt,
+                              error=type(e).__name__)
+                if latency is not None:
+                    raise
+                self._backoff(attempt, e)
+                continue
+            except BaseException as e:
+                self.limiter.release(latency=latency)
+                observe_stage('llm', 'stream', time.monotonic() - started, 'error', attempt=attempt,
+                              error=type(e).__name__)
+                raise
+            self.limiter.release(latency=latency)
+            observe_stage('llm', 'stream', time.monotonic() - started, attempt=attempt)
+            return
+
+    async def acomplete(self, messages, user=None, **params) -> str:
+        """complete() for coroutines; waits for a slot and between retries on the event loop."""
+        config = self._app.config
+        for attempt in range(config['LLM_MAX_RETRIES'] + 1):
+            with timed('llm', 'admission_wait'):
+                await self.limiter.acquire_async(user, timeout=config['LLM_QUEUE_TIMEOUT'])
+            started = time.monotonic()
+            try:
+                with timed('llm', 'completion', attempt=attempt):
+                    result = await self.provider.acomplete(messages, **params)
+            except RetryableLLMError as e:
+                self.limiter.release(rate_limited=isinstance(e, RateLimitedError))
+                await asyncio.sleep(self._retry_delay(attempt, e))
+                continue
+            except BaseException:
+                self.limiter.release()
+                raise
+            self.limiter.release(latency=time.monotonic() - started)
+            return result
+
+    async def astream(self, messages, user=None, **params):
+        """stream() for coroutines, with the same slot, retry and latency rules."""
+        config = self._app.config
+        for attempt in range(config['LLM_MAX_RETRIES'] + 1):
+            with timed('llm', 'admission_wait'):
+                await self.limiter.acquire_async(user, timeout=config['LLM_QUEUE_TIMEOUT'])
+            started = time.monotonic()
+            latency = None
+            try:
+                async for delta in self.provider.astream(messages, **params):
+                    if latency is None:
+                        latency = time.monotonic() - started
+                        observe_stage('llm', 'first_token', latency, attempt=attempt)
+                    yield delta
+            except RetryableLLMError as e:
+                self.limiter.release(latency=latency, rate_limited=isinstance(e, RateLimitedError))
+                observe_stage('llm', 'stream', time.monotonic() - started, 'error', attempt=attempt,
+                              error=type(e).__name__)
+                if latency is not None:
+                    raise
+                await asyncio.sleep(self._retry_delay(attempt, e))
+                continue
+            except BaseException as e:
+                self.limiter.release(latency=latency)
+                observe_stage('llm', 'stream', time.monotonic() - started, 'error', attempt=attempt,
+                              error=type(e).__name__)
+                raise
+            self.limiter.release(latency=latency)
+            observe_stage('llm', 'stream', time.monotonic() - started, attempt=attempt)
+            return
+
+    def _backoff(self, attempt, error):
+        time.sleep(self._retry_delay(attempt, error))
+
+    def _retry_delay(self, attempt, error):
+        """Seconds to wait before retrying after error; re-raises it once retries run out."""
+        config = self._app.config
+        if attempt >= config['LLM_MAX_RETRIES']:
+            raise error
+        LLM_RETRIES.inc(reason='rate_limited' if isinstance(error, RateLimitedError) else 'transient')
+        delay = backoff_delay(attempt, config['LLM_BACKOFF_BASE'], config['LLM_BACKOFF_MAX'], error.retry_after)
+        self._app.logger.warning(f"LLM call failed ({str(error)[:100]}); retry {attempt + 1} in {delay:.1f}s")
+        return delay
+
+    def stats(self) -> dict:
+        return self.limiter.stats()
+
+    def reset(self):
+        """Drops the current provider, e.g. after changing LLM_* settings."""
+        with self._lock:
+            if self._provider is not None:
+                self._provider.close()
+            self._provider = None
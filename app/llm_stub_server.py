@@ -0,0 +1,183 @@
+# app/llm_stub_server.py
+"""
+Minimal OpenAI-compatible chat completion server for offline testing and
+benchmarks. Point the app at it with:
+
+    python -m app.llm_stub_server --port 8001 --latency 0.5 --tokens-per-second 40
+    LLM_PROVIDER=openai LLM_BASE_URL=http://127.0.0.1:8001/v1 flask run
+
+--max-concurrency makes it answer 429 with Retry-After beyond that many
+simultaneous completions, like a rate-limited upstream.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.llm import stub_tokens
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so pooled clients reuse connections
+
+    # Overridden per server by make_server()
+    latency = 0.0
+    tokens_per_second = 0
+    api_key = None
+    max_concurrency = 0  # 0 means unlimited
+    retry_after = 1
+    active = None  # [count] shared by the server's handler threads
+    active_lock = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _authorized(self):
+        if self.api_key and self.headers.get('Authorization') != f'Bearer {self.api_key}':
+            self._send_json(401, {'error': {'message': 'Incorrect API key provided', 'type': 'invalid_request_error',
+                                            'code': 'invalid_api_key'}})
+            return False
+        return True
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path.rstrip('/').endswith('/models'):
+            self._send_json(200, {'object': 'list', 'data': [
+                {'id': 'gpt-3.5-turbo-1106', 'object': 'model', 'created': 0, 'owned_by': 'stub'}
+            ]})
+        else:
+            self._send_json(404, {'error': {'message': 'Not found'}})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'Not found'}})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+
+        with self.active_lock:
+            if self.max_concurrency and self.active[0] >= self.max_concurrency:
+                self._send_json(429, {'error': {'message': 'Rate limit reached', 'type': 'requests',
+                                                'code': 'rate_limit_exceeded'}},
+                                headers={'Retry-After': str(self.retry_after)})
+                return
+            self.active[0] += 1
+        try:
+            self._complete(request)
+        finally:
+            with self.active_lock:
+                self.active[0] -= 1
+
+    def _complete(self, request):
+        tokens = stub_tokens(request.get('messages', []), request.get('max_tokens') or 2000)
+        model = request.get('model', 'stub')
+        completion_id = f'chatcmpl-stub-{int(time.time() * 1000)}'
+        usage = {'prompt_tokens': sum(len(m.get('content', '').split()) for m in request.get('messages', [])),
+                 'completion_tokens': len(tokens)}
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if not request.get('stream'):
+            if self.tokens_per_second:
+                time.sleep(len(tokens) / self.tokens_per_second)
+            self._send_json(200, {
+                'id': completion_id, 'object': 'chat.completion', 'created': int(time.time()), 'model': model,
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': ''.join(tokens)}}],
+                'usage': usage
+            })
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def send_chunk(delta, finish_reason=None):
+            payload = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                       'model': model, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]}
+            self._write_chunk(f"data: {json.dumps(payload)}\n\n")
+
+        send_chunk({'role': 'assistant', 'content': ''})
+        for token in tokens:
+            if self.tokens_per_second:
+                time.sleep(1.0 / self.tokens_per_second)
+            send_chunk({'content': token})
+        send_chunk({}, finish_reason='stop')
+        if (request.get('stream_options') or {}).get('include_usage'):
+            payload = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                       'model': model, 'choices': [], 'usage': usage}
+            self._write_chunk(f"data: {json.dumps(payload)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b'0\r\n\r\n')
+
+    def _write_chunk(self, text):
+        data = text.encode('utf-8')
+        self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+
+def make_server(host='127.0.0.1', port=8001, latency=0.0, tokens_per_second=0, api_key=None,
+                max_concurrency=0, retry_after=1):
+    """Builds (but does not start) a stub server; port 0 picks a free port."""
+    handler = type('ConfiguredStubHandler', (StubHandler,), {
+        'latency': latency,
+        'tokens_per_second': tokens_per_second,
+        'api_key': api_key,
+        'max_concurrency': max_concurrency,
+        'retry_after': retry_after,
+        'active': [0],
+        'active_lock': threading.Lock(),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(**kwargs):
+    """Starts a stub server on a daemon thread and returns it; its URL is base_url(server)."""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def base_url(server):
+    host, port = server.server_address[:2]
+    return f'http://{host}:{port}/v1'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='OpenAI-compatible stub LLM server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before the first token')
+    parser.add_argument('--tokens-per-second', type=float, default=0, help='0 means no throttling')
+    parser.add_argument('--api-key', default=None, help='reject requests without this bearer token')
+    parser.add_argument('--max-concurrency', type=int, default=0, help='answer 429 beyond this many requests')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with a 429')
+    args = parser.parse_args()
+
+    stub = make_server(args.host, args.port, args.latency, args.tokens_per_second, args.api_key,
+                       args.max_concurrency, args.retry_after)
+    print(f'Stub LLM server listening on {base_url(stub)}')
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
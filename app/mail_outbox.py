@@ -0,0 +1,225 @@
+# app/mail_outbox.py
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.admission import backoff_delay
+from app.metrics import log_event, timed
+
+
+class MailOutbox:
+    """
+    Outbound mail, sent off the request path. enqueue() stores the message in
+    the OutboundEmail table and wakes a background sender, which delivers
+    due messages in batches over one authenticated SMTP connection. The
+    connection is kept open between batches until it has been idle for
+    MAIL_CONNECTION_IDLE_TIMEOUT seconds. Temporary failures (4xx replies,
+    dropped connections) are retried with backoff up to MAIL_MAX_ATTEMPTS;
+    permanent ones (5xx) fail the message at once. SMTP settings are
+    Flask-Mail's MAIL_* config.
+    """
+
+    def __init__(self, app=None, db=None):
+        self._app = None
+        self._db = None
+        self._thread = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._smtp = None
+        self._smtp_used_at = 0.0
+        self._counters = {'sent': 0, 'retried': 0, 'failed': 0, 'connections': 0}
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        app.config.setdefault('MAIL_OUTBOX_BATCH_SIZE', 20)
+        app.config.setdefault('MAIL_OUTBOX_POLL_INTERVAL', 5)  # seconds; enqueue() wakes the sender sooner
+        app.config.setdefault('MAIL_CONNECTION_IDLE_TIMEOUT', 30)
+        app.config.setdefault('MAIL_SMTP_TIMEOUT', 30)
+        app.config.setdefault('MAIL_MAX_ATTEMPTS', 6)
+        app.config.setdefault('MAIL_RETRY_BASE', 30)  # seconds before the first retry, doubling after that
+        app.config.setdefault('MAIL_RETRY_MAX', 60 * 60)
+        app.config.setdefault('MAIL_SENDING_TIMEOUT', timedelta(minutes=10))
+
+        self._app = app
+        self._db = db
+        # Like the janitor: no sender thread in CLI commands or a pre-fork master
+        app.before_request(self._ensure_started)
+        app.extensions['mail_outbox'] = self
+
+    def enqueue(self, recipients, subject, body, html=None, sender=None):
+        """Stores a message for delivery and returns the OutboundEmail. Commits the session."""
+        from app.models import OutboundEmail
+
+        db = self._db
+        if isinstance(recipients, str):
+            recipients = [recipients]
+        message = OutboundEmail(recipients=list(recipients), subject=subject, body=body, html=html, sender=sender)
+        db.session.add(message)
+        db.session.commit()
+        self._ensure_started()
+        self._wake.set()
+        return message
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counters, connected=self._smtp is not None)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='mail-outbox', daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self._app.config['MAIL_OUTBOX_POLL_INTERVAL'])
+            self._wake.clear()
+            with self._app.app_context():
+                try:
+                    while self.send_batch() == self._app.config['MAIL_OUTBOX_BATCH_SIZE']:
+                        pass
+                except Exception as e:
+                    self._app.logger.error(f"Mail outbox failed: {str(e)}")
+                    self._db.session.rollback()
+                finally:
+                    self._db.session.remove()
+            if self._smtp is not None and \
+                    time.monotonic() - self._smtp_used_at > self._app.config['MAIL_CONNECTION_IDLE_TIMEOUT']:
+                self._disconnect()
+
+    def send_batch(self) -> int:
+        """Claims and sends up to MAIL_OUTBOX_BATCH_SIZE due messages. Returns how many it claimed."""
+        from app.models import OutboundEmail
+
+        db = self._db
+        now = datetime.utcnow()
+        # A message still 'sending' past the timeout belonged to a process that died
+        stale_before = now - self._app.config['MAIL_SENDING_TIMEOUT']
+        db.session.query(OutboundEmail) \
+            .filter(OutboundEmail.status == 'sending', OutboundEmail.updated_at < stale_before) \
+            .update({'status': 'queued'}, synchronize_session=False)
+
+        due = db.session.query(OutboundEmail.id) \
+            .filter(OutboundEmail.status == 'queued', OutboundEmail.next_attempt_at <= now) \
+            .order_by(OutboundEmail.next_attempt_at, OutboundEmail.id) \
+            .limit(self._app.config['MAIL_OUTBOX_BATCH_SIZE']) \
+            .all()
+        # Claim each row atomically, so two processes never send the same message
+        claimed = [message_id for (message_id,) in due
+                   if db.session.query(OutboundEmail)
+                   .filter_by(id=message_id, status='queued')
+                   .update({'status': 'sending', 'updated_at': now}, synchronize_session=False)]
+        db.session.commit()
+        if not claimed:
+            return 0
+
+        messages = db.session.query(OutboundEmail).filter(OutboundEmail.id.in_(claimed)) \
+            .order_by(OutboundEmail.id).all()
+        unreachable = None
+        with timed('mail', 'send_batch', messages=len(messages)) as stage:
+            for message in messages:
+                message.attempts += 1
+                try:
+                    if unreachable is not None:
+                        raise unreachable
+                    self._deliver(message)
+                except Exception as e:
+                    # Without a connection, retry the rest of the batch later instead of
+                    # waiting out a connect timeout for every message
+                    if self._smtp is None and not self._app.extensions['mail'].suppress:
+                        unreachable = e
+                    self._failed(message, e)
+                else:
+                    message.status = 'sent'
+                    message.sent_at = datetime.utcnow()
+                    message.error = None
+                    self._count('sent')
+            # One commit for the whole batch
+            db.session.commit()
+            stage['sent'] = sum(1 for message in messages if message.status == 'sent')
+        return len(claimed)
+
+    def _deliver(self, message):
+        from flask_mail import Message
+
+        mail_message = Message(message.subject, recipients=message.recipients, body=message.body,
+                               html=message.html, sender=message.sender)
+        if self._app.extensions['mail'].suppress:  # TESTING / MAIL_SUPPRESS_SEND: nothing leaves the process
+            return
+
+        for attempt in range(2):
+            smtp = self._connection()
+            try:
+                smtp.sendmail(mail_message.sender, mail_message.send_to, mail_message.as_bytes())
+                self._smtp_used_at = time.monotonic()
+                return
+            except OSError as e:  # smtplib's exceptions are OSErrors too
+                dropped = isinstance(e, smtplib.SMTPServerDisconnected) \
+                    or getattr(e, 'smtp_code', None) == 421 \
+                    or not isinstance(e, smtplib.SMTPException)
+                if not dropped:
+                    # smtplib has already reset the transaction after an error reply
+                    raise
+                # The server closed a reused connection; reconnect and try once more
+                self._disconnect()
+                if attempt:
+                    raise
+
+    def _connection(self):
+        if self._smtp is not None:
+            return self._smtp
+
+        state = self._app.extensions['mail']
+        timeout = self._app.config['MAIL_SMTP_TIMEOUT']
+        with timed('mail', 'connect', server=state.server, port=state.port):
+            if state.use_ssl:
+                smtp = smtplib.SMTP_SSL(state.server, state.port, timeout=timeout)
+            else:
+                smtp = smtplib.SMTP(state.server, state.port, timeout=timeout)
+            try:
+                if state.use_tls:
+                    smtp.starttls()
+                if state.username and state.password:
+                    smtp.login(state.username, state.password)
+            except Exception:
+                smtp.close()
+                raise
+        self._smtp = smtp
+        self._smtp_used_at = time.monotonic()
+        self._count('connections')
+        return smtp
+
+    def _disconnect(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is None:
+            return
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+    def _failed(self, message, error):
+        permanent = isinstance(error, smtplib.SMTPRecipientsRefused) or \
+            (getattr(error, 'smtp_code', 0) >= 500 and not isinstance(error, smtplib.SMTPAuthenticationError))
+        message.error = str(error)[:255]
+        if permanent or message.attempts >= self._app.config['MAIL_MAX_ATTEMPTS']:
+            message.status = 'failed'
+            self._count('failed')
+            self._app.logger.error(f"Giving up on email {message.id} to {', '.join(message.recipients)}: "
+                                   f"{message.error}")
+        else:
+            delay = backoff_delay(message.attempts - 1, base=self._app.config['MAIL_RETRY_BASE'],
+                                  cap=self._app.config['MAIL_RETRY_MAX'])
+            message.status = 'queued'
+            message.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+            self._count('retried')
+        log_event('mail_failure', email_id=message.id, attempts=message.attempts, status=message.status,
+                  error=type(error).__name__)
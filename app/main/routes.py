@@ -1,59 +1,79 @@
 # app/main/routes.py
-from flask import (render_template, redirect, url_for, flash, request, current_app,
-                   send_from_directory, jsonify, session, make_response)
+from flask import (render_template, redirect, url_for, flash, request, current_app, abort,
+                   send_from_directory, jsonify, session, make_response, Response, stream_with_context)
 from flask_babel import refresh, get_locale
 from flask_login import login_required, current_user
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.exc import StaleDataError
 from datetime import datetime
-from os import abort, path, makedirs
-from app.forms import ProposalForm # Assuming this is app/forms.py
+import json
+import time
+from os import path
+from app.forms import ProposalForm, BatchUploadForm, SearchForm, SectionRegenerateForm, RevisionRestoreForm # Assuming this is app/forms.py
 from app.main import main_bp
-from app.models import Proposal
-from app import db
+from app.models import Proposal, GenerationJob, ProposalBatch, ProposalRevision
+from app import (db, export_cache, generation_queue, http_cache, bulk_exporter, batch_generator,
+                 proposal_search)
+from app.batch import BATCH_FIELDS, parse_batch_file
+from app.metrics import timed
+from app.document import parse as parse_document, render_html
+from app.ai_generator import regenerate_section
+from app.revisions import list_sections, find_section, replace_section, save_revision, revision_content
+from werkzeug.datastructures import MultiDict
 from werkzeug.utils import redirect
-from app.ai_generator import generate_proposal # Assuming this module exists
 from app.file_export import ProposalExporter # Assuming this module exists
 
 
+def _proposal_data_from_form(form):
+    return {
+        'project_name': form.project_name.data,
+        'project_type': form.project_type.data,
+        'description': form.description.data,
+        'budget': float(form.budget.data),
+        'duration_weeks': int(form.duration_weeks.data),
+        'writing_style': form.writing_style.data,
+        'complexity': form.complexity.data,
+        'audience': form.audience.data,
+        'mobile_number': form.mobile_number.data,
+        'contact_email': form.contact_email.data
+    }
+
+
+def _job_payload(job):
+    payload = {
+        'status': job.status,
+        'job_id': job.id,
+        'status_url': url_for('main.proposal_job_status', job_id=job.id, _external=True),
+        'stream_url': url_for('main.proposal_job_stream', job_id=job.id, _external=True)
+    }
+    if job.status == 'done':
+        payload['redirect'] = url_for('main.view_proposal', proposal_id=job.proposal_id, _external=True)
+    elif job.status == 'failed':
+        payload['message'] = job.error or 'Failed to generate proposal. Please try again later.'
+    return payload
+
+
 @main_bp.route('/', methods=['GET', 'POST'])
 @login_required
 def index():
     form = ProposalForm()
-    if form.validate_on_submit():
+    with timed('index', 'validate_form'):
+        submitted = form.validate_on_submit()
+    if submitted:
 
         try:
-            proposal_data = {
-                'project_name': form.project_name.data,
-                'project_type': form.project_type.data,
-                'description': form.description.data,
-                'budget': float(form.budget.data),
-                'duration_weeks': int(form.duration_weeks.data),
-                'writing_style': form.writing_style.data,
-                'complexity': form.complexity.data,
-                'audience': form.audience.data,
-                'mobile_number': form.mobile_number.data,
-                'contact_email': form.contact_email.data
-            }
-
-            proposal_content = generate_proposal(proposal_data)
-
-            proposal = Proposal(
-                title=proposal_data['project_name'],
-                content=proposal_content,
-                author=current_user,
-                generated_at=datetime.utcnow(),
-                # Assuming these fields exist in Proposal model for dashboard display
-                project_type=proposal_data['project_type']
-            )
-
-            db.session.add(proposal)
-            db.session.commit()
+            # Generation runs on the background queue; the request returns at once
+            with timed('index', 'enqueue') as stage:
+                job = generation_queue.submit(current_user.id, _proposal_data_from_form(form), get_locale(),
+                                              bypass_cache=form.bypass_cache.data)
+                stage['job_id'] = job.id
 
             if request.is_json:  # AJAX request
-                return jsonify({
-                    'status': 'success',
-                    'redirect': url_for('main.dashboard', _external=True)
-                }), 200
+                return jsonify(_job_payload(job)), 202
             else:  # Regular form submission
+                flash('Your proposal is being generated and will appear on your dashboard shortly.', 'info')
                 return redirect(url_for('main.dashboard'))
 
         except Exception as e:
@@ -68,19 +88,252 @@ def index():
     return render_template('main/index.html', form=form)
 
 
+@main_bp.route('/proposals/jobs', methods=['POST'])
+@login_required
+def submit_proposal_job():
+    form = ProposalForm()
+    if not form.validate_on_submit():
+        return jsonify({'status': 'error', 'errors': form.errors}), 400
+
+    job = generation_queue.submit(current_user.id, _proposal_data_from_form(form), get_locale(),
+                                  bypass_cache=form.bypass_cache.data)
+    return jsonify(_job_payload(job)), 202
+
+
+@main_bp.route('/proposals/jobs/<job_id>')
+@login_required
+def proposal_job_status(job_id):
+    job = db.session.get(GenerationJob, job_id)
+    if job is None or job.user_id != current_user.id:
+        return jsonify({'status': 'error', 'message': 'Job not found'}), 404
+    return jsonify(_job_payload(job))
+
+
+@main_bp.route('/proposals/jobs/<job_id>/stream')
+@login_required
+def proposal_job_stream(job_id):
+    """
+    Server-Sent Events feed of a job's output. Each 'delta' event carries the
+    text appended since the last one and its id is the character offset, so a
+    reconnecting EventSource resumes via Last-Event-ID without losing text.
+    'html' events carry the whole text so far rendered by app/document.py
+    (escaped, safe hrefs only) for the live preview, at most every
+    GENERATION_STREAM_HTML_INTERVAL seconds and once more at the end.
+    """
+    job = db.session.get(GenerationJob, job_id)
+    if job is None or job.user_id != current_user.id:
+        return jsonify({'status': 'error', 'message': 'Job not found'}), 404
+
+    offset = request.headers.get('Last-Event-ID', request.args.get('offset', '0'))
+    offset = int(offset) if offset.isdigit() else 0
+    poll_interval = current_app.config.get('GENERATION_STREAM_POLL_INTERVAL', 0.1)
+    html_interval = current_app.config.get('GENERATION_STREAM_HTML_INTERVAL', 0.5)
+
+    def events():
+        sent = offset
+        rendered, last_render = None, 0.0
+        last_heartbeat = time.monotonic()
+        while True:
+            content, status = generation_queue.progress(job_id)
+            if len(content) > sent:
+                yield f"id: {len(content)}\nevent: delta\ndata: {json.dumps({'text': content[sent:]})}\n\n"
+                sent = len(content)
+                last_heartbeat = time.monotonic()
+
+            finished = status in ('done', 'failed')
+            if len(content) != rendered and (finished or time.monotonic() - last_render >= html_interval):
+                html = render_html(parse_document(content))
+                yield f"event: html\ndata: {json.dumps({'html': html})}\n\n"
+                rendered, last_render = len(content), time.monotonic()
+
+            if finished:
+                finished = db.session.get(GenerationJob, job_id)
+                yield f"event: {status}\ndata: {json.dumps(_job_payload(finished))}\n\n"
+                return
+
+            # Comment lines keep idle proxies from closing the connection
+            if time.monotonic() - last_heartbeat > 15:
+                yield ": keep-alive\n\n"
+                last_heartbeat = time.monotonic()
+            time.sleep(poll_interval)
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def _validate_batch_rows(rows):
+    """Checks each uploaded row with the ProposalForm rules. Returns (valid, errors)."""
+    valid, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        form = ProposalForm(formdata=MultiDict(row), meta={'csrf': False})
+        if form.validate():
+            valid.append((number, _proposal_data_from_form(form)))
+        else:
+            errors.append((number, row.get('project_name'), form.errors))
+    return valid, errors
+
+
+def _batch_payload(batch):
+    rows = []
+    for row in batch.rows:
+        status = row.status
+        if status == 'queued' and batch_generator.is_running(row.id):
+            status = 'running'
+        entry = {'row': row.row_number, 'title': row.proposal_data.get('project_name'), 'status': status}
+        if row.proposal_id:
+            entry['url'] = url_for('main.view_proposal', proposal_id=row.proposal_id)
+        if row.error:
+            entry['error'] = row.error
+        rows.append(entry)
+    return {
+        'status': batch.status,
+        'total': batch.total,
+        'completed': batch.completed,
+        'failed': batch.failed,
+        'rows': rows
+    }
+
+
+@main_bp.route('/proposals/batch', methods=['GET', 'POST'])
+@login_required
+def batch_upload():
+    form = BatchUploadForm()
+    row_errors = []
+    if form.validate_on_submit():
+        upload = form.rows_file.data
+        max_rows = current_app.config['BATCH_MAX_ROWS']
+        try:
+            rows = parse_batch_file(upload.filename, upload.stream, max_rows=max_rows)
+        except ValueError as e:
+            rows = None
+            flash(str(e), 'danger')
+
+        if rows is not None:
+            if not rows:
+                flash('The file does not contain any projects.', 'warning')
+            elif len(rows) > max_rows:
+                flash(f'A batch can contain at most {max_rows} projects; this file has more.', 'danger')
+            else:
+                valid, row_errors = _validate_batch_rows(rows)
+                if row_errors:
+                    flash(f'{len(row_errors)} of {len(rows)} rows need fixing before the batch can start.', 'danger')
+                else:
+                    try:
+                        batch = batch_generator.submit(current_user.id, valid, get_locale(),
+                                                       filename=upload.filename,
+                                                       bypass_cache=form.bypass_cache.data)
+                        flash(f'Generating {batch.total} proposals. They will appear on your dashboard as they finish.', 'info')
+                        return redirect(url_for('main.batch_status', batch_id=batch.id))
+                    except Exception as e:
+                        db.session.rollback()
+                        current_app.logger.error(f"Batch submission failed: {str(e)}")
+                        flash('Failed to start the batch. Please try again.', 'danger')
+
+    return render_template('main/batch_upload.html', form=form, row_errors=row_errors, fields=BATCH_FIELDS)
+
+
+@main_bp.route('/proposals/batch/<batch_id>')
+@login_required
+def batch_status(batch_id):
+    batch = db.session.get(ProposalBatch, batch_id)
+    if batch is None or batch.user_id != current_user.id:
+        flash('Batch not found.', 'danger')
+        return redirect(url_for('main.dashboard'))
+
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(_batch_payload(batch))
+    return render_template('main/batch.html', batch=batch, progress=_batch_payload(batch))
+
+
 @main_bp.route('/about') # Removed POST method if it's just an informational page
 def about():
     return render_template('main/about.html') # Removed form=ProposalForm() if not needed on about page
 
 
+def _encode_cursor(proposal):
+    return f"{proposal.generated_at.isoformat()}_{proposal.id}"
+
+
+def _decode_cursor(cursor):
+    """Parses a '<generated_at>_<id>' keyset cursor; returns None if malformed."""
+    try:
+        generated_at, proposal_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(generated_at), int(proposal_id)
+    except (AttributeError, ValueError):
+        return None
+
+
 @main_bp.route('/dashboard')
 @login_required
 def dashboard():
-    proposals = db.session.query(Proposal)\
-                  .filter_by(user_id=current_user.id)\
-                  .order_by(Proposal.generated_at.desc())\
-                  .all()
-    return render_template('main/dashboard.html', proposals=proposals)
+    page_size = current_app.config.get('DASHBOARD_PAGE_SIZE', 25)
+    after = _decode_cursor(request.args.get('after'))
+    before = _decode_cursor(request.args.get('before'))
+
+    # Keyset pagination on (generated_at, id); the list never loads proposal bodies
+    query = db.session.query(Proposal)\
+              .options(load_only(Proposal.id, Proposal.title, Proposal.project_type, Proposal.generated_at))\
+              .filter(Proposal.user_id == current_user.id)
+
+    if before:
+        # Walking back towards newer proposals: scan ascending, then flip
+        query = query.filter(Proposal.generated_at >= before[0],
+                             or_(Proposal.generated_at > before[0], Proposal.id > before[1]))\
+                     .order_by(Proposal.generated_at.asc(), Proposal.id.asc())
+    else:
+        if after:
+            query = query.filter(Proposal.generated_at <= after[0],
+                                 or_(Proposal.generated_at < after[0], Proposal.id < after[1]))
+        query = query.order_by(Proposal.generated_at.desc(), Proposal.id.desc())
+
+    proposals = query.limit(page_size + 1).all()
+    has_more = len(proposals) > page_size
+    proposals = proposals[:page_size]
+    if before:
+        proposals.reverse()
+
+    next_cursor = prev_cursor = None
+    if proposals:
+        # Coming back from an older page means there is always an older page
+        if has_more or before:
+            next_cursor = _encode_cursor(proposals[-1])
+        if (before and has_more) or after:
+            prev_cursor = _encode_cursor(proposals[0])
+
+    total = db.session.query(func.count(Proposal.id))\
+              .filter(Proposal.user_id == current_user.id)\
+              .scalar()
+
+    return render_template('main/dashboard.html', proposals=proposals, total=total,
+                           next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+
+@main_bp.route('/search')
+@login_required
+def search_proposals():
+    form = SearchForm(request.args)
+    page = request.args.get('page', 1, type=int)
+    results, has_more = [], False
+    if request.args and form.validate():
+        try:
+            with timed('search', 'query') as stage:
+                results, has_more = proposal_search.search(
+                    current_user.id, form.q.data, project_type=form.project_type.data or None,
+                    date_from=form.date_from.data, date_to=form.date_to.data, page=page)
+                stage['results'] = len(results)
+        except Exception as e:
+            flash(f'Error: {str(e)}', 'danger')
+
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({
+            'results': [dict(r, snippet=str(r['snippet']), generated_at=r['generated_at'].isoformat(),
+                             url=url_for('main.view_proposal', proposal_id=r['id'], _external=True))
+                        for r in results],
+            'page': page,
+            'has_more': has_more,
+            'errors': form.errors,
+        })
+    return render_template('main/search.html', form=form, results=results, page=page, has_more=has_more)
 
 
 @main_bp.route('/proposal/<int:proposal_id>')
@@ -91,53 +344,211 @@ def view_proposal(proposal_id):
     if proposal.user_id != current_user.id:
         flash('You are not authorized to view this proposal.', 'danger')
         return redirect(url_for('main.dashboard'))
-    return render_template('main/proposal.html', proposal=proposal, datetime=datetime)
+
+    # The page only changes with the proposal, the viewer's name, the locale and the footer year
+    etag = http_cache.etag_for('view', proposal.id, proposal.title, proposal.content, current_user.username,
+                               get_locale(), datetime.utcnow().year)
+    not_modified = http_cache.not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    response = make_response(render_template('main/proposal.html', proposal=proposal, datetime=datetime))
+    response.set_etag(etag)
+    return response
 
 
 @main_bp.route('/download/<int:proposal_id>/<format>')
 @login_required
 def download_proposal(proposal_id, format):
-    proposal = Proposal.query.get_or_404(proposal_id)
+    with timed('download', 'load', proposal_id=proposal_id):
+        proposal = Proposal.query.get_or_404(proposal_id)
     # Ensure only the owner can download their proposals
     if proposal.user_id != current_user.id:
         flash('You are not authorized to download this proposal.', 'danger')
         return redirect(url_for('main.dashboard'))
 
-    filename = f"proposal_{proposal_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}.{format}" # Added timestamp for unique filenames
     valid_formats = ['pdf', 'docx', 'md']
 
     if format not in valid_formats:
         flash(f'Invalid format requested: {format}', 'danger') # Show invalid format
         return redirect(url_for('main.view_proposal', proposal_id=proposal_id))
 
+    etag = http_cache.etag_for('download', proposal.id, proposal.content, format)
+    not_modified = http_cache.not_modified(etag)
+    if not_modified:
+        return not_modified
+
     try:
-        export_methods = {
-            'pdf': ProposalExporter.export_pdf,
-            'docx': ProposalExporter.export_docx,
-            'md': ProposalExporter.export_markdown
+        render_methods = {
+            'pdf': ProposalExporter.render_pdf,
+            'docx': ProposalExporter.render_docx,
+            'md': ProposalExporter.render_markdown
         }
 
-        # Ensure the output directory exists
-        output_dir = current_app.config.get('UPLOAD_FOLDER', 'temp_downloads')
-        makedirs(output_dir, exist_ok=True)
+        # Renders are cached in memory per content hash: repeat downloads of
+        # unchanged content are served without re-rendering or touching disk.
+        # A miss renders PDF/DOCX from the document parsed when the proposal
+        # was saved; Markdown is the stored text as is
+        with timed('download', 'export', proposal_id=proposal_id, format=format) as stage:
+            data = export_cache.fetch(proposal.id, proposal.content, format,
+                                      lambda content: render_methods[format](
+                                          content if format == 'md' else proposal.load_document()))
+            stage['bytes'] = len(data)
 
-        filepath = export_methods[format](
-            content=proposal.content,
-            filename=filename, # Pass the full filename with extension
-            output_dir=output_dir
-        )
-
-        return send_from_directory(
-            directory=output_dir, # Use the actual directory where the file is saved
-            path=path.basename(filepath), # Only the filename
-            as_attachment=True
-        )
+        response = current_app.response_class(data, mimetype=ProposalExporter.MIMETYPES[format])
+        response.headers['Content-Disposition'] = f'attachment; filename=proposal_{proposal_id}.{format}'
+        response.set_etag(etag)
+        return response
 
     except Exception as e:
         current_app.logger.error(f"Export failed for proposal {proposal_id}, format {format}: {str(e)}")
         flash('Failed to generate download file. Please try again.', 'danger')
         return redirect(url_for('main.view_proposal', proposal_id=proposal_id))
 
+
+def _owned_proposal(proposal_id):
+    proposal = Proposal.query.get_or_404(proposal_id)
+    if proposal.user_id != current_user.id:
+        abort(404)
+    return proposal
+
+
+def _wants_json():
+    # A JSON body or an Accept header preferring JSON; answered in kind on every branch
+    return request.is_json or request.accept_mimetypes.best == 'application/json'
+
+
+def _edit_conflict(proposal_id, message):
+    """409 (JSON) or a warning back on the revise page, when an edit was based on an outdated version."""
+    if _wants_json():
+        return jsonify({'status': 'error', 'message': message}), 409
+    flash(message, 'warning')
+    return redirect(url_for('main.revise_proposal', proposal_id=proposal_id))
+
+
+def _section_choices(content):
+    # The title heading spans the whole document, so offer the sections under it
+    sections = list_sections(content)
+    top = min((level for _, level, _, _ in sections), default=1)
+    nested = [title for title, level, _, _ in sections if level > top]
+    return [(title, title) for title in (nested or [title for title, _, _, _ in sections])]
+
+
+@main_bp.route('/proposal/<int:proposal_id>/revise')
+@login_required
+def revise_proposal(proposal_id):
+    proposal = _owned_proposal(proposal_id)
+    form = SectionRegenerateForm(version=proposal.version)
+    form.section.choices = _section_choices(proposal.content)
+    revisions = proposal.revisions.options(load_only(ProposalRevision.number, ProposalRevision.section,
+                                                     ProposalRevision.content_length,
+                                                     ProposalRevision.created_at)).all()
+    return render_template('main/revise.html', proposal=proposal, form=form, revisions=revisions,
+                           restore_form=RevisionRestoreForm(version=proposal.version))
+
+
+@main_bp.route('/proposal/<int:proposal_id>/sections/regenerate', methods=['POST'])
+@login_required
+def regenerate_proposal_section(proposal_id):
+    proposal = _owned_proposal(proposal_id)
+    form = SectionRegenerateForm()
+    form.section.choices = _section_choices(proposal.content)
+    if not form.validate_on_submit():
+        if _wants_json():
+            return jsonify({'status': 'error', 'errors': form.errors}), 400
+        flash('Choose a section to regenerate.', 'warning')
+        return redirect(url_for('main.revise_proposal', proposal_id=proposal_id))
+    if form.version.data != str(proposal.version):
+        return _edit_conflict(proposal_id, 'The proposal has changed since this page was opened. '
+                                           'Please review it and try again.')
+
+    section = find_section(proposal.content, form.section.data)
+    if section is None:
+        if _wants_json():
+            return jsonify({'status': 'error', 'message': 'Section not found'}), 400
+        flash('That section is no longer in the proposal. Choose another one.', 'warning')
+        return redirect(url_for('main.revise_proposal', proposal_id=proposal_id))
+
+    try:
+        new_section = regenerate_section(proposal.content, section[0], form.instructions.data or None,
+                                         locale=get_locale(), user_id=current_user.id)
+        # The splice is based on the version read above; the save fails (stale
+        # Proposal.version, or a revision number taken) if another edit was saved
+        # while the model was writing, rather than silently discarding that edit
+        with timed('regenerate_section', 'save', proposal_id=proposal_id):
+            revision = save_revision(db, proposal, replace_section(proposal.content, section, new_section),
+                                     section=section[0])
+            db.session.commit()
+    except (StaleDataError, IntegrityError):
+        db.session.rollback()
+        return _edit_conflict(proposal_id, 'The proposal was changed while this section was being regenerated. '
+                                           'Please try again.')
+    except Exception as e:
+        db.session.rollback()
+        if _wants_json():
+            return jsonify({'status': 'error', 'message': str(e)}), 500
+        flash(f'Error: {str(e)}', 'danger')
+        return redirect(url_for('main.revise_proposal', proposal_id=proposal_id))
+
+    if _wants_json():
+        return jsonify({'status': 'done', 'section': section[0], 'revision': revision.number if revision else None,
+                        'redirect': url_for('main.view_proposal', proposal_id=proposal_id, _external=True)})
+    flash(f'"{section[0]}" was regenerated. The previous version is kept in the history.', 'success')
+    return redirect(url_for('main.view_proposal', proposal_id=proposal_id))
+
+
+@main_bp.route('/proposal/<int:proposal_id>/revisions/<int:number>')
+@login_required
+def proposal_revision(proposal_id, number):
+    proposal = _owned_proposal(proposal_id)
+    content = revision_content(db, proposal, number)
+    if content is None:
+        abort(404)
+    return current_app.response_class(content, mimetype='text/markdown')
+
+
+@main_bp.route('/proposal/<int:proposal_id>/revisions/<int:number>/restore', methods=['POST'])
+@login_required
+def restore_proposal_revision(proposal_id, number):
+    proposal = _owned_proposal(proposal_id)
+    form = RevisionRestoreForm()
+    if not form.validate_on_submit():
+        abort(400)
+    if form.version.data != str(proposal.version):
+        return _edit_conflict(proposal_id, 'The proposal has changed since this page was opened. '
+                                           'Please review it and try again.')
+    content = revision_content(db, proposal, number)
+    if content is None:
+        abort(404)
+    # Restoring is itself an edit, so the version being replaced stays in the history
+    try:
+        save_revision(db, proposal, content, section=None)
+        db.session.commit()
+    except (StaleDataError, IntegrityError):
+        db.session.rollback()
+        return _edit_conflict(proposal_id, 'The proposal was changed while restoring. Please try again.')
+    flash(f'Version {number} restored.', 'success')
+    return redirect(url_for('main.view_proposal', proposal_id=proposal_id))
+
+@main_bp.route('/proposals/export')
+@login_required
+def export_all_proposals():
+    """Streams a ZIP of all the user's proposals, e.g. /proposals/export?format=pdf&format=docx"""
+    valid_formats = ['pdf', 'docx', 'md']
+    formats = [fmt for fmt in valid_formats if fmt in request.args.getlist('format')] or ['pdf', 'docx']
+
+    # Rows are fetched in batches while the archive is written, never all bodies at once
+    rows = db.session.query(Proposal.id, Proposal.title, Proposal.content, Proposal.document, Proposal.generated_at)\
+                     .filter(Proposal.user_id == current_user.id)\
+                     .order_by(Proposal.generated_at.asc(), Proposal.id.asc())\
+                     .yield_per(50)
+
+    filename = f"proposals_{current_user.username}_{datetime.utcnow():%Y%m%d}.zip"
+    response = Response(stream_with_context(bulk_exporter.stream_zip(rows, formats)),
+                        mimetype='application/zip')
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
 @main_bp.route('/favicon.ico')
 def favicon():
     return send_from_directory(
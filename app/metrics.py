@@ -0,0 +1,256 @@
+# app/metrics.py
+"""
+In-process latency/usage metrics with a Prometheus text endpoint.
+
+Stages are timed with `timed(pipeline, stage)`; each timing is observed into
+the proposal_stage_seconds histogram and written as a one-line JSON record on
+the 'app.metrics' logger. Values are per process: with several workers, let
+Prometheus scrape each one (or aggregate in the collector).
+"""
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+logger = logging.getLogger('app.metrics')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 1500, 2000, 3000, 4000, 8000)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, key, (), value
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f'{self.name}_bucket', key, (('le', _format_value(float(bound))),), cumulative
+            yield f'{self.name}_bucket', key, (('le', '+Inf'),), series[-1]
+            yield f'{self.name}_sum', key, (), series[-2]
+            yield f'{self.name}_count', key, (), series[-1]
+
+
+class Gauge:
+    """Read at scrape time from a callback returning {label values tuple: value}."""
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def samples(self):
+        if self.callback is None:
+            return
+        for key, value in sorted(self.callback().items()):
+            yield self.name, key, (), value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, key, extra, value in metric.samples():
+                lines.append(f'{name}{_format_labels(metric.labelnames, key, extra)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'proposal_stage_seconds', 'Time spent in each stage of the generation and export pipelines.',
+    ('pipeline', 'stage', 'outcome')))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'proposal_http_request_seconds', 'Request handling time by endpoint.', ('endpoint', 'method', 'status')))
+LLM_TOKENS = REGISTRY.register(Histogram(
+    'proposal_llm_tokens', 'Tokens per LLM completion, from the provider usage report.', ('model', 'kind'),
+    buckets=TOKEN_BUCKETS))
+LLM_TOKENS_TOTAL = REGISTRY.register(Counter(
+    'proposal_llm_tokens_total', 'Tokens used across all LLM completions.', ('model', 'kind')))
+LLM_RETRIES = REGISTRY.register(Counter(
+    'proposal_llm_retries_total', 'LLM calls retried after a rate limit or transient failure.', ('reason',)))
+
+
+def log_event(event, **fields):
+    """Writes one structured (JSON) record on the app.metrics logger."""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(dict(event=event, **fields), default=str, sort_keys=True))
+
+
+def observe_stage(pipeline, stage, seconds, outcome='ok', **fields):
+    STAGE_SECONDS.observe(seconds, pipeline=pipeline, stage=stage, outcome=outcome)
+    log_event('stage', pipeline=pipeline, stage=stage, outcome=outcome, seconds=round(seconds, 6), **fields)
+
+
+@contextmanager
+def timed(pipeline, stage, **fields):
+    """
+    Times the block as one stage. Yields the dict of log fields, so the block
+    can add details it only learns while running (sizes, ids, cache hits).
+    """
+    outcome = 'ok'
+    started = time.perf_counter()
+    try:
+        yield fields
+    except BaseException as e:
+        outcome = 'error'
+        fields.setdefault('error', type(e).__name__)
+        raise
+    finally:
+        observe_stage(pipeline, stage, time.perf_counter() - started, outcome, **fields)
+
+
+def record_usage(model, prompt_tokens=None, completion_tokens=None):
+    """Records a completion's token counts (response.usage)."""
+    for kind, tokens in (('prompt', prompt_tokens), ('completion', completion_tokens)):
+        if tokens is not None:
+            LLM_TOKENS.observe(tokens, model=model, kind=kind)
+            LLM_TOKENS_TOTAL.inc(tokens, model=model, kind=kind)
+    log_event('llm_usage', model=model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+
+class Metrics:
+    """
+    Flask extension: request timing, the /metrics endpoint (METRICS_ENDPOINT)
+    and the structured log destination (METRICS_LOG_FILE, else the app logger's
+    handlers). With METRICS_TOKEN set, /metrics requires
+    'Authorization: Bearer <token>'; without it, only direct requests from
+    this host (loopback, not forwarded by a proxy) are answered.
+    """
+
+    def __init__(self, app=None):
+        self._app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_ENDPOINT', '/metrics')
+        app.config.setdefault('METRICS_TOKEN', os.getenv('METRICS_TOKEN'))
+        app.config.setdefault('METRICS_LOG_LEVEL', 'INFO')
+        app.config.setdefault('METRICS_LOG_FILE', os.getenv('METRICS_LOG_FILE'))  # e.g. logs/metrics.log
+
+        self._app = app
+        app.extensions['metrics'] = self
+        if not app.config['METRICS_ENABLED']:
+            logger.disabled = True
+            return
+
+        logger.setLevel(app.config['METRICS_LOG_LEVEL'])
+        if app.config['METRICS_LOG_FILE'] and not logger.handlers:
+            from logging.handlers import RotatingFileHandler
+            handler = RotatingFileHandler(app.config['METRICS_LOG_FILE'], maxBytes=10 * 1024 * 1024, backupCount=5)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            logger.propagate = False
+
+        app.before_request(self._start_timer)
+        app.after_request(self._observe_request)
+        app.add_url_rule(app.config['METRICS_ENDPOINT'], 'metrics', self._metrics_view)
+
+    def register_gauge(self, name, documentation, labelnames, callback):
+        return REGISTRY.register(Gauge(name, documentation, labelnames, callback))
+
+    @staticmethod
+    def _start_timer():
+        from flask import g
+        g._metrics_started = time.perf_counter()
+
+    @staticmethod
+    def _observe_request(response):
+        from flask import g, request
+        started = g.pop('_metrics_started', None)
+        if started is not None and request.endpoint != 'metrics':
+            REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=request.endpoint or 'unknown',
+                                    method=request.method, status=response.status_code)
+        return response
+
+    def _metrics_view(self):
+        from flask import Response, abort, request
+        token = self._app.config['METRICS_TOKEN']
+        if token:
+            if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+                abort(401)
+        elif request.remote_addr not in ('127.0.0.1', '::1') or 'X-Forwarded-For' in request.headers:
+            # Deny by default: a proxy on this host would otherwise expose it to everyone
+            abort(403)
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
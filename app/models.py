@@ -1,11 +1,14 @@
 # app/models.py
-from app import db, login_manager
+from app import db, login_manager, fragment_cache
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 from datetime import datetime, timedelta
 import secrets
+import uuid
 from app import db
+from app.search import FTS_DDL
+from app import document as proposal_document
 
 @login_manager.user_loader
 def load_user(user_id):
@@ -16,6 +19,8 @@ class User(db.Model, UserMixin):
     username = db.Column(db.String(20), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128))
+    reset_token = db.Column(db.String(32), index=True, unique=True)
+    reset_token_expiration = db.Column(db.DateTime)
     proposals = db.relationship('Proposal', backref='author', lazy=True)
 
     def set_password(self, password):
@@ -42,10 +47,143 @@ class User(db.Model, UserMixin):
         return f'<User {self.username}>'
 
 class Proposal(db.Model):
+    __table_args__ = (
+        # Serves the dashboard's per-user, newest-first keyset pagination
+        db.Index('ix_proposal_user_id_generated_at', 'user_id', 'generated_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     content = db.Column(db.Text, nullable=False)
     project_type = db.Column(db.String(50))
     generated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # content parsed into blocks (app/document.py), kept in step by the events below
+    document = db.Column(db.LargeBinary)
+    # Bumped by every ORM update, which only applies if the row is still at the
+    # version that was read: a stale edit raises StaleDataError instead of
+    # overwriting a newer one
+    version = db.Column(db.Integer, nullable=False, server_default='1')
+    revisions = db.relationship('ProposalRevision', backref='proposal', lazy='dynamic',
+                                cascade='all, delete-orphan', order_by='ProposalRevision.number.desc()')
+
+    __mapper_args__ = {'version_id_col': version}
+
+    def load_document(self):
+        """The parsed document every renderer works from."""
+        return proposal_document.load(self.document, self.content)
+
+
+# Full-text index and its sync triggers for databases built with db.create_all()
+for _statement in FTS_DDL:
+    db.event.listen(Proposal.__table__, 'after_create', db.DDL(_statement).execute_if(dialect='sqlite'))
+
+
+@db.event.listens_for(Proposal, 'before_insert')
+@db.event.listens_for(Proposal, 'before_update')
+def _parse_document(mapper, connection, proposal):
+    # Parsed once per saved version of the text, never on the way out
+    if proposal.document is None or db.inspect(proposal).attrs.content.history.has_changes():
+        proposal.document = proposal_document.parse(proposal.content).to_bytes()
+
+
+@db.event.listens_for(Proposal, 'after_insert')
+@db.event.listens_for(Proposal, 'after_update')
+@db.event.listens_for(Proposal, 'after_delete')
+def _retire_cached_fragments(mapper, connection, proposal):
+    # The owner's cached dashboard rows and layout fragments are out of date
+    fragment_cache.invalidate_user(proposal.user_id)
+
+
+class ProposalRevision(db.Model):
+    """
+    An earlier version of a proposal, stored as a compressed reverse delta
+    against the next version (see app/revisions.py). Revision k is version k;
+    the current version is Proposal.content.
+    """
+    __table_args__ = (
+        db.UniqueConstraint('proposal_id', 'number', name='uq_proposal_revision_proposal_id_number'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    proposal_id = db.Column(db.Integer, db.ForeignKey('proposal.id'), nullable=False)
+    number = db.Column(db.Integer, nullable=False)
+    delta = db.Column(db.LargeBinary, nullable=False)
+    content_length = db.Column(db.Integer, nullable=False)  # characters in this version
+    section = db.Column(db.String(100))  # the section whose edit replaced this version, if any
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # when it was replaced
+
 
+class GenerationJob(db.Model):
+    """A queued proposal generation, persisted so pending work survives a restart."""
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued, running, done, failed
+    proposal_data = db.Column(db.JSON, nullable=False)
+    content = db.Column(db.Text, nullable=False, default='')  # partial output, saved as it streams in
+    locale = db.Column(db.String(10))
+    bypass_cache = db.Column(db.Boolean, nullable=False, default=False)
+    proposal_id = db.Column(db.Integer, db.ForeignKey('proposal.id'))
+    error = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ProposalBatch(db.Model):
+    """A set of proposals generated from one uploaded CSV/JSON file."""
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    filename = db.Column(db.String(255))
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued, running, done
+    locale = db.Column(db.String(10))
+    bypass_cache = db.Column(db.Boolean, nullable=False, default=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    rows = db.relationship('ProposalBatchRow', backref='batch', lazy=True,
+                           order_by='ProposalBatchRow.row_number')
+
+
+class ProposalBatchRow(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    batch_id = db.Column(db.String(32), db.ForeignKey('proposal_batch.id'), nullable=False, index=True)
+    row_number = db.Column(db.Integer, nullable=False)  # 1-based data row in the uploaded file
+    proposal_data = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, done, failed
+    proposal_id = db.Column(db.Integer, db.ForeignKey('proposal.id'))
+    error = db.Column(db.String(255))
+
+
+class LLMResponseCache(db.Model):
+    """Completion text cached per normalized prompt, locale and sampling parameters."""
+    key = db.Column(db.String(64), primary_key=True)  # sha256, see ResponseCache.make_key
+    response = db.Column(db.Text, nullable=False)
+    model = db.Column(db.String(50))
+    size = db.Column(db.Integer, nullable=False, default=0)
+    hits = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+class OutboundEmail(db.Model):
+    """A message in the mail outbox; the background sender delivers queued ones."""
+    __table_args__ = (
+        # The sender's "what is due" scan
+        db.Index('ix_outbound_email_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipients = db.Column(db.JSON, nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    html = db.Column(db.Text)
+    sender = db.Column(db.String(255))  # None means MAIL_DEFAULT_SENDER
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.String(255))
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
@@ -0,0 +1,176 @@
+# app/pdf_engine.py
+import copy
+import io
+import os
+import shutil
+import threading
+
+# Unicode fonts tried in order when PDF_FONT_* is not configured (Windows, then Linux)
+FONT_CANDIDATES = [
+    {'': r'C:\Windows\Fonts\arial.ttf', 'B': r'C:\Windows\Fonts\arialbd.ttf',
+     'I': r'C:\Windows\Fonts\ariali.ttf', 'BI': r'C:\Windows\Fonts\arialbi.ttf'},
+    {'': '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+     'B': '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
+     'I': '/usr/share/fonts/truetype/dejavu/DejaVuSans-Oblique.ttf',
+     'BI': '/usr/share/fonts/truetype/dejavu/DejaVuSans-BoldOblique.ttf'},
+]
+
+# Core PDF fonts are latin-1 only; map the punctuation LLMs like to use
+LATIN1_REPLACEMENTS = str.maketrans({
+    '\u2013': '-', '\u2014': '-', '\u2018': "'", '\u2019': "'", '\u201c': '"', '\u201d': '"',
+    '\u2022': '*', '\u2026': '...', '\u00a0': ' ',
+})
+
+PDF_HTML_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <style>
+        body {{ font-family: Arial, sans-serif; line-height: 1.6; margin: 2cm; }}
+        h1 {{ color: #2c3e50; border-bottom: 1px solid #eee; }}
+        h2 {{ color: #34495e; }}
+        .header {{ margin-bottom: 2em; }}
+    </style>
+</head>
+<body>
+    {content}
+</body>
+</html>
+"""
+
+
+class FpdfEngine:
+    """
+    Pure-Python, in-process PDF rendering with fpdf2.
+
+    Fonts are parsed once into a blank template document; each export works
+    on a deep copy of it, which is several times cheaper than re-reading the
+    TTF files. fpdf2's deep copy shares the underlying fontTools font, which
+    subsetting mutates, so each copy gets its own (lazily parsed) font from
+    bytes kept in memory.
+    """
+
+    name = 'fpdf'
+    FAMILY = 'ProposalSans'
+
+    def __init__(self, font_files=None):
+        self._font_files = font_files
+        self._template = None
+        self._font_data = {}  # TTF path -> file contents
+        self.family = None
+        self.unicode = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        font_files = None
+        if config.get('PDF_FONT_REGULAR'):
+            font_files = {'': config['PDF_FONT_REGULAR'], 'B': config.get('PDF_FONT_BOLD'),
+                          'I': config.get('PDF_FONT_ITALIC'), 'BI': config.get('PDF_FONT_BOLD_ITALIC')}
+        return cls(font_files)
+
+    def _build_template(self):
+        from fpdf import FPDF
+
+        pdf = FPDF(format='A4')
+        pdf.set_margins(20, 20, 20)
+        pdf.set_auto_page_break(True, margin=20)
+
+        fonts = self._font_files or next(
+            (candidate for candidate in FONT_CANDIDATES if os.path.exists(candidate[''])), None)
+        if fonts and fonts.get('') and os.path.exists(fonts['']):
+            # Fall back to the nearest available face for missing styles
+            regular = fonts['']
+            bold = fonts.get('B') if fonts.get('B') and os.path.exists(fonts['B']) else regular
+            for style, fallback in (('', regular), ('B', bold), ('I', regular), ('BI', bold)):
+                path = fonts.get(style)
+                pdf.add_font(self.FAMILY, style, path if path and os.path.exists(path) else fallback)
+            self.family, self.unicode = self.FAMILY, True
+        else:
+            self.family, self.unicode = 'helvetica', False
+        return pdf
+
+    def _new_document(self):
+        from fontTools import ttLib
+
+        if self._template is None:
+            with self._lock:
+                if self._template is None:
+                    template = self._build_template()
+                    for font in template.fonts.values():
+                        if getattr(font, 'ttffile', None) and font.ttffile not in self._font_data:
+                            with open(font.ttffile, 'rb') as f:
+                                self._font_data[font.ttffile] = f.read()
+                    self._template = template
+
+        pdf = copy.deepcopy(self._template)
+        for font in pdf.fonts.values():
+            if getattr(font, 'ttffile', None) in self._font_data:
+                font.ttfont = ttLib.TTFont(io.BytesIO(self._font_data[font.ttffile]),
+                                           recalcTimestamp=False, lazy=True)
+        return pdf
+
+    def warm(self):
+        """Loads fonts ahead of the first export."""
+        self._new_document()
+
+    def render(self, html: str) -> bytes:
+        pdf = self._new_document()
+        if not self.unicode:
+            html = html.translate(LATIN1_REPLACEMENTS).encode('latin-1', 'replace').decode('latin-1')
+        pdf.add_page()
+        pdf.set_font(self.family, size=11)
+        pdf.write_html(html, font_family=self.family, table_line_separators=True,
+                       heading_sizes={'h1': 18, 'h2': 14, 'h3': 12, 'h4': 11})
+        return bytes(pdf.output())
+
+
+class WkhtmltopdfEngine:
+    """The original pdfkit/wkhtmltopdf path: one subprocess per export."""
+
+    name = 'wkhtmltopdf'
+
+    def __init__(self, binary=None):
+        self.binary = binary or shutil.which('wkhtmltopdf')
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.get('WKHTMLTOPDF_PATH'))
+
+    def warm(self):
+        pass
+
+    def render(self, html: str) -> bytes:
+        import pdfkit
+
+        if not self.binary:
+            raise RuntimeError("wkhtmltopdf not found; set WKHTMLTOPDF_PATH or use PDF_ENGINE='fpdf'")
+        config = pdfkit.configuration(wkhtmltopdf=self.binary)
+        options = {
+            'encoding': 'UTF-8',
+            'quiet': ''
+        }
+        return pdfkit.from_string(PDF_HTML_TEMPLATE.format(content=html), False,
+                                  configuration=config, options=options)
+
+
+PDF_ENGINES = {
+    FpdfEngine.name: FpdfEngine,
+    WkhtmltopdfEngine.name: WkhtmltopdfEngine,
+}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_pdf_engine(config):
+    """Returns the process-wide engine selected by PDF_ENGINE (default 'fpdf')."""
+    name = config.get('PDF_ENGINE', 'fpdf')
+    engine = _engines.get(name)
+    if engine is None:
+        if name not in PDF_ENGINES:
+            raise ValueError(f"Unknown PDF engine: {name}")
+        with _engines_lock:
+            engine = _engines.setdefault(name, PDF_ENGINES[name].from_config(config))
+    return engine
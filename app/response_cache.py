@@ -0,0 +1,147 @@
+# app/response_cache.py
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from app.metrics import REGISTRY, Gauge
+
+# proposal_data fields that end up in the prompt (contact_email only feeds the metadata header)
+PROMPT_FIELDS = ('project_name', 'project_type', 'description', 'budget', 'duration_weeks',
+                 'writing_style', 'complexity', 'audience', 'mobile_number')
+PARAM_FIELDS = ('model', 'seed', 'temperature', 'max_tokens', 'top_p', 'response_format')
+
+
+class ResponseCache:
+    """
+    Persistent cache of LLM completions for identical generation requests,
+    stored in the LLMResponseCache table with a TTL and an entry cap
+    (least recently used rows are evicted first).
+    """
+
+    def __init__(self, app=None, db=None):
+        self._app = None
+        self._db = None
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'bypassed': 0}
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        app.config.setdefault('LLM_CACHE_ENABLED', True)
+        app.config.setdefault('LLM_CACHE_TTL', timedelta(days=7))
+        app.config.setdefault('LLM_CACHE_MAX_ENTRIES', 5000)
+
+        self._app = app
+        self._db = db
+        app.extensions['response_cache'] = self
+
+    @staticmethod
+    def make_key(proposal_data, locale, params) -> str:
+        """Hash of the normalized prompt inputs, locale and sampling parameters."""
+        normalized = {}
+        for field in PROMPT_FIELDS:
+            value = proposal_data.get(field)
+            if isinstance(value, str):
+                value = ' '.join(value.split())
+            elif isinstance(value, float):
+                value = round(value, 2)
+            normalized[field] = value
+        payload = {
+            'data': normalized,
+            'locale': str(locale),
+            'params': {name: params.get(name) for name in PARAM_FIELDS},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def get(self, key, bypass=False):
+        """Returns the cached completion, or None on a miss, expiry or bypass."""
+        from app.models import LLMResponseCache
+
+        if bypass or not self._app.config['LLM_CACHE_ENABLED']:
+            self._count('bypassed')
+            return None
+
+        db = self._db
+        entry = db.session.get(LLMResponseCache, key)
+        if entry is None or entry.created_at < datetime.utcnow() - self._app.config['LLM_CACHE_TTL']:
+            self._count('misses')
+            return None
+
+        entry.hits += 1
+        entry.last_used_at = datetime.utcnow()
+        db.session.commit()
+        self._count('hits')
+        return entry.response
+
+    def put(self, key, response, model=None):
+        from app.models import LLMResponseCache
+
+        if not self._app.config['LLM_CACHE_ENABLED']:
+            return
+
+        db = self._db
+        now = datetime.utcnow()
+        try:
+            db.session.merge(LLMResponseCache(key=key, response=response, model=model, size=len(response),
+                                              hits=0, created_at=now, last_used_at=now))
+            db.session.commit()
+        except IntegrityError:
+            # Another worker stored the same completion first
+            db.session.rollback()
+            return
+        self._evict()
+
+    def _evict(self):
+        from app.models import LLMResponseCache
+
+        db = self._db
+        expired_before = datetime.utcnow() - self._app.config['LLM_CACHE_TTL']
+        db.session.query(LLMResponseCache) \
+            .filter(LLMResponseCache.created_at < expired_before) \
+            .delete(synchronize_session=False)
+
+        overflow = db.session.query(LLMResponseCache).count() - self._app.config['LLM_CACHE_MAX_ENTRIES']
+        if overflow > 0:
+            oldest = db.session.query(LLMResponseCache.key) \
+                .order_by(LLMResponseCache.last_used_at) \
+                .limit(overflow) \
+                .subquery()
+            db.session.query(LLMResponseCache) \
+                .filter(LLMResponseCache.key.in_(db.session.query(oldest.c.key))) \
+                .delete(synchronize_session=False)
+        db.session.commit()
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process plus the size of the shared table."""
+        from app.models import LLMResponseCache
+
+        db = self._db
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['entries'] = db.session.query(LLMResponseCache).count()
+        stats['total_hits'] = db.session.query(db.func.coalesce(db.func.sum(LLMResponseCache.hits), 0)).scalar()
+        return stats
+
+
+def _cache_samples():
+    # Read at scrape time from the app serving /metrics (and behind its METRICS_TOKEN)
+    from flask import current_app, has_app_context
+
+    if not has_app_context() or 'response_cache' not in current_app.extensions:
+        return {}
+    stats = current_app.extensions['response_cache'].stats()
+    return {(stat,): stats[stat] for stat in ('hits', 'misses', 'bypassed', 'hit_ratio', 'entries', 'total_hits')}
+
+
+REGISTRY.register(Gauge('proposal_llm_response_cache',
+                        'LLM response cache: lookups by this process, and entries/hits across the shared table.',
+                        ('stat',), callback=_cache_samples))
@@ -0,0 +1,152 @@
+# app/revisions.py
+"""
+Proposal revision history and markdown section helpers.
+
+Proposal.content always holds the current text. Each ProposalRevision holds
+a zlib-compressed reverse delta that turns the next version back into the
+one before it, so a proposal that is never edited stores nothing extra and
+every edit stores only the lines it changed. Version N (the current one) is
+Proposal.content, and version k is rebuilt by applying the deltas of
+revisions N-1, N-2, ..., k in turn.
+"""
+import difflib
+import json
+import re
+import zlib
+from datetime import datetime
+
+from app.document import HEADING_RE, parse_inline, plain_text
+
+# Section names are matched without numbering ("5. Budget") or emphasis ("**Budget**")
+_NAME_NOISE = re.compile(r'^[\d.)\s]+|[*_`]')
+
+
+def make_delta(new, old) -> bytes:
+    """Compressed line delta that rebuilds old from new."""
+    new_lines, old_lines = new.splitlines(True), old.splitlines(True)
+    ops = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, new_lines, old_lines, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])  # copy new_lines[i1:i2]
+        elif j2 > j1:
+            ops.append(''.join(old_lines[j1:j2]))  # literal text of the old version
+    return zlib.compress(json.dumps(ops, separators=(',', ':')).encode('utf-8'), 9)
+
+
+def apply_delta(new, delta) -> str:
+    new_lines = new.splitlines(True)
+    parts = []
+    for op in json.loads(zlib.decompress(delta)):
+        parts.append(''.join(new_lines[op[0]:op[1]]) if isinstance(op, list) else op)
+    return ''.join(parts)
+
+
+def _normalize(name):
+    return ' '.join(_NAME_NOISE.sub('', name).split()).casefold()
+
+
+def list_sections(content):
+    """
+    [(title, level, start, end)] for every markdown heading, where content[start:end]
+    is the heading line plus everything up to the next heading of the same or a higher level.
+    Headings are recognised as app/document.py parses them, and title is the
+    heading's text as the proposal page shows it, so this is the one section
+    model for both the section picker and the splice.
+    """
+    headings, offset, in_code = [], 0, False
+    for line in content.splitlines(True):
+        stripped = line.strip()
+        if stripped.startswith('```'):
+            in_code = not in_code
+        match = None if in_code else HEADING_RE.match(stripped)
+        if match:
+            headings.append((plain_text(parse_inline(match.group(2))), len(match.group(1)), offset))
+        offset += len(line)
+
+    sections = []
+    for index, (title, level, start) in enumerate(headings):
+        end = len(content)
+        for _, next_level, next_start in headings[index + 1:]:
+            if next_level <= level:
+                end = next_start
+                break
+        sections.append((title, level, start, end))
+    return sections
+
+
+def find_section(content, name):
+    """The (title, level, start, end) of the first section called name, or None."""
+    wanted = _normalize(name)
+    for section in list_sections(content):
+        if _normalize(section[0]) == wanted:
+            return section
+    return None
+
+
+def replace_section(content, section, new_text):
+    """
+    Splices new_text in place of section. new_text is cut down to its first
+    section and keeps the original heading, so a model that answers with extra
+    sections or renames the heading can't reshape the rest of the document.
+    """
+    _, _, start, end = section
+    heading = content[start:].split('\n', 1)[0].rstrip('\r')
+
+    new_text = new_text.strip('\n')
+    own = list_sections(new_text)
+    if own and not new_text[:own[0][2]].strip():
+        # Starts with a heading: keep that section's body only
+        _, _, own_start, own_end = own[0]
+        body = new_text[own_start:own_end].partition('\n')[2]
+    elif own:
+        # A bare body: stop at the first heading the model added after it
+        body = new_text[:own[0][2]]
+    else:
+        body = new_text
+    body = body.strip('\n')
+
+    replacement = f'{heading}\n\n{body}\n' if body else f'{heading}\n'
+    if end < len(content):
+        replacement += '\n'
+    return content[:start] + replacement + content[end:]
+
+
+def save_revision(db, proposal, new_content, section=None):
+    """
+    Records the current text as a revision and makes new_content current.
+    Adds to the session; the caller commits. Returns the new ProposalRevision,
+    or None if nothing changed.
+    """
+    from app.models import ProposalRevision
+
+    if new_content == proposal.content:
+        return None
+    number = (db.session.query(db.func.max(ProposalRevision.number))
+              .filter_by(proposal_id=proposal.id).scalar() or 0) + 1
+    revision = ProposalRevision(proposal_id=proposal.id, number=number, section=section,
+                                delta=make_delta(new_content, proposal.content),
+                                content_length=len(proposal.content), created_at=datetime.utcnow())
+    db.session.add(revision)
+    proposal.content = new_content
+    return revision
+
+
+def revision_content(db, proposal, number):
+    """The text of version `number` (1 is the original); None if there is no such version."""
+    from app.models import ProposalRevision
+
+    latest = db.session.query(db.func.max(ProposalRevision.number)) \
+        .filter_by(proposal_id=proposal.id).scalar() or 0
+    if number == latest + 1:
+        return proposal.content
+    if not 1 <= number <= latest:
+        return None
+
+    deltas = db.session.query(ProposalRevision.delta) \
+        .filter(ProposalRevision.proposal_id == proposal.id, ProposalRevision.number >= number) \
+        .order_by(ProposalRevision.number.desc()) \
+        .all()
+    content = proposal.content
+    for (delta,) in deltas:
+        content = apply_delta(content, delta)
+    return content
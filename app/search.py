@@ -0,0 +1,194 @@
+# app/search.py
+"""
+Full-text search over proposal titles and bodies.
+
+On SQLite this is an FTS5 table, proposal_fts, that indexes the proposal table
+as external content (the text is not stored twice). Triggers keep it current
+on every insert, update and delete, including bulk and raw SQL writes that
+never go through the ORM. Each row also gets an 'owner' token ('u<user_id>').
+A search ANDs that token with the user's terms, so FTS5 only ranks the
+searching user's documents, however many proposals other users have.
+
+`flask search rebuild` (re)creates the index and backfills it from the
+proposal table. On other databases search falls back to LIKE filters.
+"""
+import re
+from datetime import datetime, time as dt_time
+
+import click
+from markupsafe import Markup, escape
+from sqlalchemy import text
+
+# Also run on db.create_all() (see models.py) and by the add_proposal_search migration
+FTS_DDL = (
+    # FTS5 reads the external content through this view, which supplies the owner column
+    "CREATE VIEW IF NOT EXISTS proposal_fts_source AS "
+    "SELECT id, title, content, 'u' || user_id AS owner FROM proposal",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS proposal_fts USING fts5("
+    "title, content, owner, content='proposal_fts_source', content_rowid='id', "
+    "tokenize='porter unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS proposal_fts_ai AFTER INSERT ON proposal BEGIN "
+    "INSERT INTO proposal_fts(rowid, title, content, owner) "
+    "VALUES (new.id, new.title, new.content, 'u' || new.user_id); END",
+    "CREATE TRIGGER IF NOT EXISTS proposal_fts_ad AFTER DELETE ON proposal BEGIN "
+    "INSERT INTO proposal_fts(proposal_fts, rowid, title, content, owner) "
+    "VALUES ('delete', old.id, old.title, old.content, 'u' || old.user_id); END",
+    "CREATE TRIGGER IF NOT EXISTS proposal_fts_au AFTER UPDATE OF title, content, user_id ON proposal BEGIN "
+    "INSERT INTO proposal_fts(proposal_fts, rowid, title, content, owner) "
+    "VALUES ('delete', old.id, old.title, old.content, 'u' || old.user_id); "
+    "INSERT INTO proposal_fts(rowid, title, content, owner) "
+    "VALUES (new.id, new.title, new.content, 'u' || new.user_id); END",
+)
+
+FTS_DROP = (
+    "DROP TRIGGER IF EXISTS proposal_fts_au",
+    "DROP TRIGGER IF EXISTS proposal_fts_ad",
+    "DROP TRIGGER IF EXISTS proposal_fts_ai",
+    "DROP TABLE IF EXISTS proposal_fts",
+    "DROP VIEW IF EXISTS proposal_fts_source",
+)
+
+# snippet() markers; control characters can't occur in a search term, so they survive escaping
+_MARK_START, _MARK_END = '\x02', '\x03'
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_query(user_id, query):
+    """
+    Turns free text into an FTS5 expression: every word must match (the last
+    one as a prefix, for search-as-you-type) in the title or content of one of
+    user_id's proposals. Returns None if the text has no searchable words.
+    """
+    terms = _TERM.findall(query or '')[:20]
+    if not terms:
+        return None
+    words = ' '.join(f'"{term}"' for term in terms[:-1])
+    words = f'{words} "{terms[-1]}"*'.strip()
+    return f'owner : "u{int(user_id)}" AND {{title content}} : ({words})'
+
+
+def highlight(snippet):
+    """Escapes a snippet and turns its match markers into <mark> tags."""
+    return Markup(str(escape(snippet or ''))
+                  .replace(_MARK_START, Markup('<mark>'))
+                  .replace(_MARK_END, Markup('</mark>')))
+
+
+class ProposalSearch:
+    """Ranked, filtered search over one user's proposals."""
+
+    def __init__(self, app=None, db=None):
+        self._app = None
+        self._db = None
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        app.config.setdefault('SEARCH_PAGE_SIZE', 20)
+        app.config.setdefault('SEARCH_SNIPPET_TOKENS', 24)
+        app.config.setdefault('SEARCH_TITLE_WEIGHT', 10.0)  # bm25 weight of a title match vs a body match
+
+        self._app = app
+        self._db = db
+        app.extensions['proposal_search'] = self
+        app.cli.add_command(search_cli)
+
+    def uses_fts(self) -> bool:
+        return self._db.engine.dialect.name == 'sqlite'
+
+    def install(self):
+        """Creates the FTS table, its source view and the sync triggers if missing."""
+        if not self.uses_fts():
+            return
+        with self._db.engine.begin() as connection:
+            for statement in FTS_DDL:
+                connection.execute(text(statement))
+
+    def rebuild(self) -> int:
+        """Re-indexes every proposal from scratch; returns the number of indexed rows."""
+        if not self.uses_fts():
+            return 0
+        self.install()
+        with self._db.engine.begin() as connection:
+            connection.execute(text("INSERT INTO proposal_fts(proposal_fts) VALUES ('rebuild')"))
+            connection.execute(text("INSERT INTO proposal_fts(proposal_fts) VALUES ('optimize')"))
+            return connection.execute(text("SELECT count(*) FROM proposal")).scalar()
+
+    def search(self, user_id, query, project_type=None, date_from=None, date_to=None, page=1, per_page=None):
+        """
+        Returns (results, has_more). Each result is a dict with id, title,
+        project_type, generated_at and snippet (Markup with <mark> around the
+        matched words). Results are best match first; dates are inclusive.
+        """
+        per_page = per_page or self._app.config['SEARCH_PAGE_SIZE']
+        filters, params = [], {'user_id': user_id, 'limit': per_page + 1, 'offset': (max(page, 1) - 1) * per_page}
+        if project_type:
+            filters.append('p.project_type = :project_type')
+            params['project_type'] = project_type
+        if date_from:
+            filters.append('p.generated_at >= :date_from')
+            params['date_from'] = datetime.combine(date_from, dt_time.min)
+        if date_to:
+            filters.append('p.generated_at <= :date_to')
+            params['date_to'] = datetime.combine(date_to, dt_time.max)
+        where = ''.join(f' AND {condition}' for condition in filters)
+
+        if self.uses_fts():
+            params['match'] = fts_query(user_id, query)
+            if params['match'] is None:
+                return [], False
+            params.update(title_weight=self._app.config['SEARCH_TITLE_WEIGHT'],
+                          tokens=self._app.config['SEARCH_SNIPPET_TOKENS'],
+                          mark_start=_MARK_START, mark_end=_MARK_END)
+            sql = (
+                "SELECT p.id, p.title, p.project_type, p.generated_at, "
+                "snippet(proposal_fts, -1, :mark_start, :mark_end, '…', :tokens) AS snippet "
+                "FROM proposal_fts JOIN proposal p ON p.id = proposal_fts.rowid "
+                "WHERE proposal_fts MATCH :match AND p.user_id = :user_id" + where +
+                " ORDER BY bm25(proposal_fts, :title_weight, 1.0, 0.0), p.id DESC "
+                "LIMIT :limit OFFSET :offset"
+            )
+        else:
+            terms = _TERM.findall(query or '')[:20]
+            if not terms:
+                return [], False
+            for n, term in enumerate(terms):
+                filters.append(f'(lower(p.title) LIKE :term{n} OR lower(p.content) LIKE :term{n})')
+                params[f'term{n}'] = f'%{term.lower()}%'
+            where = ''.join(f' AND {condition}' for condition in filters)
+            sql = (
+                "SELECT p.id, p.title, p.project_type, p.generated_at, substr(p.content, 1, 200) AS snippet "
+                "FROM proposal p WHERE p.user_id = :user_id" + where +
+                " ORDER BY p.generated_at DESC, p.id DESC LIMIT :limit OFFSET :offset"
+            )
+
+        try:
+            rows = self._db.session.execute(text(sql), params).mappings().all()
+        except Exception as e:
+            self._app.logger.error(f"Proposal search failed: {e}")
+            raise Exception("Search is unavailable right now. Please try again later.")
+
+        results = []
+        for row in rows[:per_page]:
+            generated_at = row['generated_at']
+            if isinstance(generated_at, str):  # Raw SQL on SQLite returns the stored text
+                generated_at = datetime.fromisoformat(generated_at)
+            results.append({'id': row['id'], 'title': row['title'], 'project_type': row['project_type'],
+                            'generated_at': generated_at, 'snippet': highlight(row['snippet'])})
+        return results, len(rows) > per_page
+
+
+@click.group('search', help='Manage the proposal full-text search index.')
+def search_cli():
+    pass
+
+
+@search_cli.command('rebuild')
+def rebuild_command():
+    """Create the search index if needed and backfill it from all proposals."""
+    from flask import current_app
+    search = current_app.extensions['proposal_search']
+    if not search.uses_fts():
+        click.echo('This database has no FTS5 index; search uses LIKE filters instead.')
+        return
+    click.echo(f'Indexed {search.rebuild()} proposals.')
@@ -0,0 +1,188 @@
+# app/smtp_stub_server.py
+"""
+Minimal SMTP server for offline testing of outbound mail. It accepts
+everything (optionally after AUTH) and keeps the messages in memory. Point
+the app at it with:
+
+    python -m app.smtp_stub_server --port 8025 --latency 0.2
+    MAIL_SERVER=127.0.0.1 MAIL_PORT=8025 flask run
+
+--fail-every N answers every Nth message with a temporary 451 error, and
+recipients containing 'reject' get a permanent 550, so the outbox's retry and
+give-up paths can be exercised. --max-messages closes the connection after
+that many messages, like servers that cap a session.
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    # Overridden per server by make_server()
+    latency = 0.0
+    username = None
+    password = None
+    fail_every = 0
+    max_messages = 0
+    verbose = False
+    stats = None  # shared counters: connections, logins, messages, temporary_failures, rejected
+    messages = None  # [(sender, recipients, data bytes)]
+    lock = None
+
+    def _reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode('ascii'))
+        self.wfile.flush()
+
+    def _count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+            return self.stats[name]
+
+    def handle(self):
+        self._count('connections')
+        self._reply('220 stub ESMTP ready')
+        authenticated = self.username is None
+        sender, recipients, sent = None, [], 0
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, _, argument = line.decode('utf-8', 'replace').rstrip('\r\n').partition(' ')
+            command = command.upper()
+
+            if command == 'EHLO':
+                self.wfile.write(b'250-stub\r\n250-8BITMIME\r\n250-AUTH PLAIN LOGIN\r\n250 SIZE 10485760\r\n')
+                self.wfile.flush()
+            elif command == 'HELO':
+                self._reply('250 stub')
+            elif command == 'AUTH':
+                authenticated = self._auth(argument)
+            elif command == 'NOOP':
+                self._reply('250 OK')
+            elif command == 'RSET':
+                sender, recipients = None, []
+                self._reply('250 OK')
+            elif command == 'QUIT':
+                self._reply('221 Bye')
+                return
+            elif not authenticated:
+                self._reply('530 Authentication required')
+            elif command == 'MAIL':
+                sender, recipients = argument.partition(':')[2].strip(), []
+                self._reply('250 OK')
+            elif command == 'RCPT':
+                recipient = argument.partition(':')[2].strip()
+                if 'reject' in recipient:
+                    self._count('rejected')
+                    self._reply('550 No such user')
+                else:
+                    recipients.append(recipient)
+                    self._reply('250 OK')
+            elif command == 'DATA':
+                if not recipients:
+                    self._reply('503 No valid recipients')
+                    continue
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                data = self._read_data()
+                if self.latency:
+                    time.sleep(self.latency)
+                if self.fail_every and self._count('attempts') % self.fail_every == 0:
+                    self._count('temporary_failures')
+                    self._reply('451 Temporary failure, try again later')
+                else:
+                    with self.lock:
+                        self.messages.append((sender, recipients, data))
+                        self.stats['messages'] += 1
+                    if self.verbose:
+                        print(f'Message from {sender} to {", ".join(recipients)} ({len(data)} bytes)', flush=True)
+                    self._reply('250 OK queued')
+                sender, recipients = None, []
+                sent += 1
+                if self.max_messages and sent >= self.max_messages:
+                    self._reply('421 Too many messages in this session, closing')
+                    return
+            else:
+                self._reply('502 Command not implemented')
+
+    def _auth(self, argument):
+        import base64
+
+        mechanism, _, initial = argument.partition(' ')
+        if mechanism.upper() == 'PLAIN':
+            if not initial:
+                self._reply('334 ')
+                initial = self.rfile.readline().decode('ascii').strip()
+            _, user, password = base64.b64decode(initial).decode('utf-8').split('\0')
+        elif mechanism.upper() == 'LOGIN':
+            self._reply('334 VXNlcm5hbWU6')
+            user = base64.b64decode(self.rfile.readline().strip()).decode('utf-8')
+            self._reply('334 UGFzc3dvcmQ6')
+            password = base64.b64decode(self.rfile.readline().strip()).decode('utf-8')
+        else:
+            self._reply('504 Unrecognized authentication type')
+            return False
+
+        if self.username is not None and (user, password) != (self.username, self.password):
+            self._reply('535 Authentication credentials invalid')
+            return False
+        self._count('logins')
+        self._reply('235 Authentication successful')
+        return True
+
+    def _read_data(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b'.\r\n', b'.\n'):
+                return b''.join(lines)
+            lines.append(line[1:] if line.startswith(b'..') else line)
+
+
+def make_server(host='127.0.0.1', port=8025, latency=0.0, username=None, password=None, fail_every=0,
+                max_messages=0, verbose=False):
+    """Builds (but does not start) a stub server; port 0 picks a free port."""
+    handler = type('ConfiguredSMTPStubHandler', (SMTPStubHandler,), {
+        'latency': latency,
+        'username': username,
+        'password': password,
+        'fail_every': fail_every,
+        'max_messages': max_messages,
+        'verbose': verbose,
+        'stats': {'connections': 0, 'logins': 0, 'messages': 0, 'attempts': 0, 'temporary_failures': 0,
+                  'rejected': 0},
+        'messages': [],
+        'lock': threading.Lock(),
+    })
+    server = socketserver.ThreadingTCPServer((host, port), handler)
+    server.daemon_threads = True
+    server.handler = handler  # server.handler.stats / .messages for inspection
+    return server
+
+
+def start_in_thread(**kwargs):
+    """Starts a stub server on a daemon thread and returns it."""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stand-in SMTP server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8025)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds to accept each message')
+    parser.add_argument('--username', default=None, help='require AUTH with this user')
+    parser.add_argument('--password', default=None)
+    parser.add_argument('--fail-every', type=int, default=0, help='answer every Nth message with a 451')
+    parser.add_argument('--max-messages', type=int, default=0, help='close the session after this many messages')
+    args = parser.parse_args()
+
+    stub = make_server(args.host, args.port, args.latency, args.username, args.password, args.fail_every,
+                       args.max_messages, verbose=True)
+    print(f'Stub SMTP server listening on {args.host}:{stub.server_address[1]}')
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,47 @@
+// Polls a batch's status and updates the per-row table until every row has finished
+(function () {
+    const container = document.getElementById('batch-progress');
+    if (!container) return;
+
+    function renderRow(tr, row) {
+        const cell = tr.querySelector('.batch-row-status');
+        cell.textContent = '';
+        if (row.url) {
+            const link = document.createElement('a');
+            link.href = row.url;
+            link.textContent = row.status;
+            cell.appendChild(link);
+        } else {
+            cell.textContent = row.status;
+        }
+        if (row.error) {
+            const error = document.createElement('div');
+            error.className = 'text-danger small';
+            error.textContent = row.error;
+            cell.appendChild(error);
+        }
+    }
+
+    async function poll() {
+        try {
+            const response = await fetch(container.dataset.statusUrl, {headers: {'Accept': 'application/json'}});
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const batch = await response.json();
+
+            document.getElementById('batch-completed').textContent = batch.completed;
+            document.getElementById('batch-failed').textContent = batch.failed;
+            const finished = batch.completed + batch.failed;
+            document.getElementById('batch-bar').style.width = batch.total ? `${finished * 100 / batch.total}%` : '0%';
+            for (const row of batch.rows) {
+                const tr = document.querySelector(`#batch-rows tr[data-row="${row.row}"]`);
+                if (tr) renderRow(tr, row);
+            }
+            if (batch.status === 'done') return;
+        } catch (error) {
+            console.error('Batch status error:', error);
+        }
+        setTimeout(poll, 2000);
+    }
+
+    setTimeout(poll, 2000);
+})();
@@ -2,14 +2,16 @@ document.getElementById('proposal-form')?.addEventListener('submit', async (e) =
     e.preventDefault();
     const form = e.target;
     const submitBtn = form.querySelector('button[type="submit"]');
+    const submitLabel = submitBtn.innerHTML;
     const errorEl = document.getElementById('proposal-error') || createErrorElement(form);
 
     submitBtn.disabled = true;
+    submitBtn.innerHTML = '<span class="spinner-border spinner-border-sm"></span> Generating...';
     errorEl.textContent = '';
-    errorEl.style.display = 'none';
+    errorEl.classList.add('d-none');
 
     try {
-        const response = await fetch(form.action, {
+        const response = await fetch(form.dataset.submitUrl || form.action, {
             method: 'POST',
             body: new FormData(form),
             headers: {
@@ -18,30 +20,120 @@ document.getElementById('proposal-form')?.addEventListener('submit', async (e) =
             }
         });
 
+        const data = await response.json();
         if (!response.ok) {
-            const errorData = await response.json();
-            throw new Error(errorData.message || 'Proposal generation failed');
+            throw new Error(data.message || formatErrors(data.errors) || 'Proposal generation failed');
         }
 
-        const data = await response.json();
-        if (data.redirect) {
-            window.location.href = data.redirect;
-        } else if (data.content) {
-            displayProposalResult(data.content);
+        const result = (window.EventSource && data.stream_url)
+            ? await streamJob(data.stream_url, data.status_url)
+            : await pollJob(data.status_url);
+        if (result.redirect) {
+            window.location.href = result.redirect;
+        } else if (result.content) {
+            displayProposalResult(result.content);
         }
     } catch (error) {
         console.error('Proposal error:', error);
         errorEl.textContent = error.message || 'A network error occurred. Please try again.';
-        errorEl.style.display = 'block';
-    } finally {
+        errorEl.classList.remove('d-none');
         submitBtn.disabled = false;
+        submitBtn.innerHTML = submitLabel;
     }
 });
 
+// Consecutive connection errors before the stream is given up for polling
+const MAX_STREAM_FAILURES = 5;
+
+function streamJob(streamUrl, statusUrl) {
+    // Show the proposal as it is generated. EventSource reconnects on its own
+    // and resumes from the last received offset, so a dropped connection loses nothing.
+    // Formatting comes from the server's 'html' events, rendered by the same
+    // escaping renderer as the proposal page; model output itself is only ever
+    // shown as text, until the first of those arrives.
+    const preview = document.getElementById('proposal-preview');
+    let markdownText = '';
+    let renderPending = false;
+    let formatted = false;
+
+    preview.classList.remove('d-none');
+
+    const render = () => {
+        renderPending = false;
+        if (!formatted) {
+            preview.textContent = markdownText;
+        }
+    };
+
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(streamUrl);
+        let failures = 0;
+
+        source.addEventListener('delta', (event) => {
+            failures = 0;
+            markdownText += JSON.parse(event.data).text;
+            if (!renderPending) {
+                renderPending = true;
+                requestAnimationFrame(render);
+            }
+        });
+        source.addEventListener('html', (event) => {
+            formatted = true;
+            preview.classList.remove('proposal-preview-text');
+            preview.innerHTML = JSON.parse(event.data).html;
+        });
+        source.addEventListener('done', (event) => {
+            source.close();
+            render();
+            resolve(JSON.parse(event.data));
+        });
+        source.addEventListener('failed', (event) => {
+            source.close();
+            reject(new Error(JSON.parse(event.data).message || 'Proposal generation failed'));
+        });
+        source.onerror = () => {
+            failures += 1;
+            // CLOSED: the endpoint answered with an error (404, 500) and EventSource
+            // won't retry. Either way, follow the job through its status URL instead
+            if (source.readyState === EventSource.CLOSED || failures >= MAX_STREAM_FAILURES) {
+                source.close();
+                pollJob(statusUrl).then(resolve, reject);
+            }
+        };
+    });
+}
+
+async function pollJob(statusUrl) {
+    // Back off gently: generation usually takes tens of seconds
+    let delay = 1000;
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, delay));
+        const response = await fetch(statusUrl, { headers: { 'Accept': 'application/json' } });
+        const data = await response.json();
+
+        if (data.status === 'done') {
+            return data;
+        }
+        if (data.status === 'failed' || data.status === 'error') {
+            throw new Error(data.message || 'Proposal generation failed');
+        }
+        delay = Math.min(delay * 1.5, 5000);
+    }
+}
+
+function formatErrors(errors) {
+    if (!errors) {
+        return '';
+    }
+    return Object.entries(errors)
+        .map(([field, messages]) => `${field}: ${messages.join(', ')}`)
+        .join('\n');
+}
+
 function createErrorElement(form) {
     const div = document.createElement('div');
     div.id = 'proposal-error';
     div.className = 'alert alert-danger mt-3';
     form.prepend(div);
     return div;
-}
\ No newline at end of file
+}
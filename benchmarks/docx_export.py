@@ -0,0 +1,81 @@
+# benchmarks/docx_export.py
+"""
+Micro-benchmark of DOCX export for proposals of 2k-50k tokens.
+
+    python -m benchmarks.docx_export [--runs 5] [--sizes 2000,10000,50000]
+
+Compares DocxRenderer (preloaded template, walking the document parsed when
+the proposal was saved, in-memory output) with the previous line-by-line
+exporter that called Document() per export. The parse itself is reported
+separately, since requests no longer pay for it.
+"""
+import argparse
+import io
+import statistics
+import time
+
+from app.docx_engine import DocxRenderer
+from app.document import parse
+from app.llm import stub_tokens
+
+
+def make_content(tokens):
+    messages = [{'role': 'user', 'content': 'cooperative **fish** farming cages feed training market budget'}]
+    block = stub_tokens(messages)
+    table = ['\n| Item | Qty | Cost (Tsh) |\n', '|---|---|---|\n'] + [f'| Item {i} | {i} | **{i * 1000:,}** |\n'
+                                                                  for i in range(10)]
+    bullets = [f'- point *{i}* with `detail`\n' for i in range(10)]
+    unit = block + table + ['\n'] + bullets
+    out = []
+    while len(out) < tokens:
+        out.extend(unit)
+    return '# Benchmark Proposal\n\n' + ''.join(out[:tokens])
+
+
+def legacy_export(content):
+    from docx import Document
+
+    document = Document()
+    for line in content.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#'):
+            level = line.count('#')
+            document.add_heading(line.replace('#', '').strip(), level=min(level, 3))
+        else:
+            document.add_paragraph().add_run(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def measure(func, content, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(content)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--sizes', default='2000,5000,10000,25000,50000')
+    args = parser.parse_args()
+
+    renderer = DocxRenderer()
+    renderer.warm()
+
+    print(f"{'tokens':>8} {'chars':>9} {'parse ms':>9} {'renderer ms':>12} {'legacy ms':>10}")
+    for size in [int(s) for s in args.sizes.split(',')]:
+        content = make_content(size)
+        parse_ms = measure(parse, content, args.runs)
+        new_ms = measure(renderer.render, parse(content), args.runs)
+        legacy_ms = measure(legacy_export, content, args.runs)
+        print(f"{size:>8} {len(content):>9} {parse_ms:>9.1f} {new_ms:>12.1f} {legacy_ms:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
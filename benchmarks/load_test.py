@@ -0,0 +1,426 @@
+# benchmarks/load_test.py
+"""
+End-to-end load test: the real app (create_app) served over HTTP against the
+stub OpenAI-compatible server, driven by concurrent logged-in clients.
+
+    python -m benchmarks.load_test [--users 5] [--proposals 20] [--concurrency 1,4,16]
+                                   [--requests 200] [--llm-latency 0.5] [--llm-tokens-per-second 200]
+                                   [--scenarios index,generate,dashboard,view,download_pdf,...]
+                                   [--workers 4] [--async-generation] [--json results.json]
+                                   [--baseline previous.json --tolerance 0.25]
+
+Three processes: the stub LLM (python -m app.llm_stub_server), the app on a
+threaded WSGI server with a throw-away SQLite database seeded with --users
+users of --proposals proposals each, and this load generator. For every
+scenario and concurrency level it reports throughput, p50/p95/p99 latency,
+errors and the app process's peak RSS during that run.
+
+With --workers N the app is served by gunicorn with gunicorn.conf.py (the
+production setup: preloaded app, N forked workers) instead; compare runs
+with different N to check how throughput scales. Peak RSS is then that of
+whichever worker answers the probe.
+
+--async-generation runs generation jobs as coroutines on the async LLM
+client (GENERATION_ASYNC) instead of the GENERATION_WORKERS thread pool;
+compare the generate scenario at high concurrency with and without it.
+
+Scenarios:
+    index          POST / (form submit; measures enqueueing, not generation)
+    generate       POST /proposals/jobs, then poll until the proposal exists
+    dashboard      GET /dashboard
+    view           GET /proposal/<id>
+    download_<fmt> GET /download/<id>/<fmt> for pdf, docx and md
+
+With --baseline, p95 or throughput worse than the baseline by more than
+--tolerance fails the run (exit status 1), so it can gate a deploy.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+SCENARIOS = ('index', 'generate', 'dashboard', 'view', 'download_pdf', 'download_docx', 'download_md')
+PASSWORD = 'benchmark-password'
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FORM_DATA = {
+    'project_name': 'Benchmark Fish Farm', 'project_type': 'Fishing',
+    'description': 'Cage fish farming for a lakeside cooperative, with training and market links.',
+    'budget': '2500000', 'duration_weeks': '12', 'writing_style': 'Professional', 'complexity': 'Medium',
+    'audience': 'Village council', 'mobile_number': '255717000000', 'contact_email': 'bench@example.com',
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port, path, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', path)
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Nothing answered on port {port} within {timeout}s")
+
+
+# --- app process --------------------------------------------------------------
+
+def _memory():
+    """(current RSS MB, peak RSS MB) of this process."""
+    values = {}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(('VmRSS:', 'VmHWM:')):
+                    key, value = line.split(':')
+                    values[key] = int(value.split()[0]) / 1024
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        values = {'VmRSS': peak, 'VmHWM': peak}
+    return round(values['VmRSS'], 1), round(values['VmHWM'], 1)
+
+
+def seed(db, users, proposals):
+    from datetime import datetime, timedelta
+    from app.ai_generator import _proposal_meta
+    from app.llm import stub_tokens
+    from app.models import User, Proposal
+
+    body = ''.join(stub_tokens([{'role': 'user', 'content': FORM_DATA['description']}]))
+    content = _proposal_meta(dict(FORM_DATA, budget=2500000.0, duration_weeks=12)) + body
+    start = datetime.utcnow() - timedelta(days=30)
+    for n in range(users):
+        user = User(username=f'bench{n}', email=f'bench{n}@example.com')
+        user.set_password(PASSWORD)
+        db.session.add(user)
+        db.session.flush()
+        db.session.add_all([
+            Proposal(title=f'Benchmark proposal {n}-{i}', content=f'{content}\n\nVariant {i}\n',
+                     project_type='Fishing', user_id=user.id, generated_at=start + timedelta(minutes=i))
+            for i in range(proposals)
+        ])
+    db.session.commit()
+
+
+def build_app(llm_url, users, proposals, cold_exports=False):
+    """The app under test: seeded, warmed up, plus a /__bench__/memory probe."""
+    from flask import jsonify
+    from app import create_app, db, export_cache
+    from app.deployment import warm_up
+    from app.metrics import logger as metrics_logger
+
+    app = create_app()
+    app.config.update(
+        WTF_CSRF_ENABLED=False,  # the load generator doesn't scrape CSRF tokens
+        SESSION_COOKIE_SECURE=False,  # plain HTTP on localhost
+        LLM_PROVIDER='openai',
+        LLM_BASE_URL=llm_url,
+        OPENAI_API_KEY='bench-key',
+    )
+    # Per-request stage logs would drown the report
+    metrics_logger.setLevel('WARNING')
+    if cold_exports:
+        export_cache.max_entries = 0
+        export_cache.directory = None
+
+    @app.route('/__bench__/memory', methods=['GET', 'POST'])
+    def bench_memory():
+        from flask import request
+        if request.method == 'POST':
+            try:
+                # Writing 5 to clear_refs resets VmHWM, so each run gets its own peak
+                with open('/proc/self/clear_refs', 'w') as f:
+                    f.write('5')
+            except OSError:
+                pass
+        rss, peak = _memory()
+        return jsonify(rss_mb=rss, peak_rss_mb=peak)
+
+    with app.app_context():
+        db.create_all()
+        seed(db, users, proposals)
+    # Templates, catalogs and the PDF/DOCX engines, so the first requests aren't billed for loading them
+    warm_up(app)
+    return app
+
+
+def gunicorn_app():
+    """App factory for --workers: gunicorn runs it once, in its master process."""
+    return build_app(os.environ['BENCH_LLM_URL'], int(os.environ['BENCH_USERS']),
+                     int(os.environ['BENCH_PROPOSALS']), bool(os.environ.get('BENCH_COLD_EXPORTS')))
+
+
+def serve(args):
+    """Runs in the app subprocess: seeds the database and serves until killed."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    app = build_app(args.llm_url, args.users, args.proposals, args.cold_exports)
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', args.port, app, threaded=True, request_handler=QuietHandler)
+    print(f'ready on {args.port}', flush=True)
+    server.serve_forever()
+
+
+# --- load generator -----------------------------------------------------------
+
+class Client:
+    """One keep-alive connection with its own session cookie."""
+
+    def __init__(self, port):
+        self.port = port
+        self.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+        self.cookies = {}
+
+    def request(self, method, path, form=None, headers=None):
+        headers = dict(headers or {})
+        body = None
+        if form is not None:
+            body = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            # The server may close idle keep-alive connections; reconnect once
+            self.conn.close()
+            self.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=120)
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+        data = response.read()
+        for header, value in response.getheaders():
+            if header.lower() == 'set-cookie':
+                name, _, rest = value.partition('=')
+                self.cookies[name] = rest.split(';', 1)[0]
+        return response.status, data
+
+    def login(self, user_number):
+        status, _ = self.request('POST', '/auth/login', form={
+            'email': f'bench{user_number}@example.com', 'password': PASSWORD})
+        if status != 302:
+            raise RuntimeError(f'Login failed for bench{user_number} (HTTP {status})')
+
+
+def make_request(client, scenario, proposal_ids):
+    """Performs one scenario iteration; returns True on success."""
+    if scenario == 'index':
+        status, _ = client.request('POST', '/', form=FORM_DATA)
+        return status == 302
+    if scenario == 'generate':
+        # Unique project names keep the response cache from short-circuiting the LLM
+        form = dict(FORM_DATA, project_name=f'Benchmark {random.getrandbits(48):x}')
+        status, body = client.request('POST', '/proposals/jobs', form=form, headers={'Accept': 'application/json'})
+        if status != 202:
+            return False
+        status_url = json.loads(body)['status_url']
+        path = status_url[status_url.index('/proposals/'):]
+        while True:
+            status, body = client.request('GET', path)
+            job = json.loads(body)
+            if job['status'] in ('done', 'failed'):
+                return job['status'] == 'done'
+            time.sleep(0.05)
+    if scenario == 'dashboard':
+        return client.request('GET', '/dashboard')[0] == 200
+    if scenario == 'view':
+        return client.request('GET', f'/proposal/{random.choice(proposal_ids)}')[0] == 200
+    if scenario.startswith('download_'):
+        fmt = scenario.split('_', 1)[1]
+        return client.request('GET', f'/download/{random.choice(proposal_ids)}/{fmt}')[0] == 200
+    raise ValueError(f'Unknown scenario: {scenario}')
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(port, scenario, concurrency, total_requests, users, proposals):
+    clients = []
+    for n in range(concurrency):
+        client = Client(port)
+        client.login(n % users)
+        clients.append(client)
+    # Seeded ids are sequential per user; each client only touches its own user's proposals
+    ids_for = {n: list(range(n * proposals + 1, (n + 1) * proposals + 1)) for n in range(users)}
+
+    Client(port).request('POST', '/__bench__/memory')
+    latencies, errors = [], []
+    remaining = [total_requests]
+    lock = threading.Lock()
+
+    def worker(client, user_number):
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            started = time.perf_counter()
+            try:
+                error = None if make_request(client, scenario, ids_for[user_number]) else 'unexpected response'
+            except Exception as e:
+                error = repr(e)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if error:
+                    errors.append(error)
+
+    threads = [threading.Thread(target=worker, args=(client, n % users)) for n, client in enumerate(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    _, body = Client(port).request('GET', '/__bench__/memory')
+    memory = json.loads(body)
+    latencies.sort()
+    return {
+        'scenario': scenario,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'peak_rss_mb': memory['peak_rss_mb'],
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of regressions against a previous --json output."""
+    previous = {(r['scenario'], r['concurrency']): r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        before = previous.get((r['scenario'], r['concurrency']))
+        if before is None:
+            continue
+        if before['p95_ms'] and r['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{r['scenario']} x{r['concurrency']}: p95 {before['p95_ms']} -> {r['p95_ms']} ms")
+        if before['throughput_rps'] and r['throughput_rps'] < before['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"{r['scenario']} x{r['concurrency']}: "
+                               f"{before['throughput_rps']} -> {r['throughput_rps']} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--proposals', type=int, default=20, help='seeded proposals per user')
+    parser.add_argument('--concurrency', default='1,4,16')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario and concurrency level')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='stub LLM seconds before the first token')
+    parser.add_argument('--llm-tokens-per-second', type=float, default=200)
+    parser.add_argument('--cold-exports', action='store_true', help='disable the export cache')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='serve with gunicorn.conf.py and this many worker processes')
+    parser.add_argument('--async-generation', action='store_true',
+                        help='run generation jobs on the event loop (GENERATION_ASYNC)')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--baseline', help='results file from an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative regression')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--llm-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    scenarios = [s for s in args.scenarios.split(',') if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    levels = [int(c) for c in args.concurrency.split(',')]
+
+    workdir = tempfile.mkdtemp(prefix='proposal-bench-')
+    llm_port, app_port = free_port(), free_port()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+               SECRET_KEY='benchmark-secret', GENERATION_ASYNC='1' if args.async_generation else '')
+    processes = []
+    try:
+        processes.append(subprocess.Popen(
+            [sys.executable, '-m', 'app.llm_stub_server', '--port', str(llm_port),
+             '--latency', str(args.llm_latency), '--tokens-per-second', str(args.llm_tokens_per_second)]))
+        wait_for(llm_port, '/v1/models')
+
+        if args.workers:
+            env.update(BENCH_LLM_URL=f'http://127.0.0.1:{llm_port}/v1', BENCH_USERS=str(args.users),
+                       BENCH_PROPOSALS=str(args.proposals), BENCH_COLD_EXPORTS='1' if args.cold_exports else '',
+                       EXPORT_CACHE_DIR=os.path.join(workdir, 'export_cache'))
+            command = [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'),
+                       '--bind', f'127.0.0.1:{app_port}', '--workers', str(args.workers),
+                       '--log-level', 'warning', 'benchmarks.load_test:gunicorn_app()']
+        else:
+            command = [sys.executable, '-m', 'benchmarks.load_test', '--serve', '--port', str(app_port),
+                       '--llm-url', f'http://127.0.0.1:{llm_port}/v1',
+                       '--users', str(args.users), '--proposals', str(args.proposals)]
+            if args.cold_exports:
+                command.append('--cold-exports')
+        processes.append(subprocess.Popen(command, env=env, cwd=ROOT))
+        wait_for(app_port, '/auth/login', timeout=300)
+
+        print(f"{'scenario':<14} {'conc':>4} {'reqs':>5} {'errors':>6} {'req/s':>8} "
+              f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak MB':>8}")
+        results = []
+        for scenario in scenarios:
+            for concurrency in levels:
+                requests = args.requests if scenario != 'generate' else max(concurrency, args.requests // 10)
+                r = run_scenario(app_port, scenario, concurrency, requests, args.users, args.proposals)
+                results.append(r)
+                print(f"{r['scenario']:<14} {r['concurrency']:>4} {r['requests']:>5} {r['errors']:>6} "
+                      f"{r['throughput_rps']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} "
+                      f"{r['peak_rss_mb']:>8}", flush=True)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait()
+
+    report = {
+        'settings': {key: value for key, value in vars(args).items() if key not in ('serve', 'port', 'llm_url')},
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
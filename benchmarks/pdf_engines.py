@@ -0,0 +1,97 @@
+# benchmarks/pdf_engines.py
+"""
+Compares PDF export latency and memory between the in-process fpdf2 engine
+and the wkhtmltopdf subprocess path.
+
+    python -m benchmarks.pdf_engines --runs 50 [--input proposal.md]
+
+Each engine runs in its own Python process so peak RSS figures are not
+polluted by the other. For wkhtmltopdf the peak RSS of the spawned
+children is reported as well.
+"""
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+from app.ai_generator import _proposal_meta
+from app.llm import stub_tokens
+
+SAMPLE_DATA = {
+    'project_name': 'Benchmark Fish Farm', 'project_type': 'Fishing', 'contact_email': 'bench@example.com',
+    'budget': 2500000.0, 'duration_weeks': 12,
+}
+
+
+def sample_content():
+    messages = [{'role': 'user', 'content': 'fish farming cooperative lake cages feed training market budget'}]
+    body = ''.join(stub_tokens(messages))
+    table = '\n## Budget Table\n\n| Item | Cost (Tsh) |\n|---|---|\n' + \
+            ''.join(f'| Item {i} | {i * 1000:,} |\n' for i in range(1, 21))
+    return _proposal_meta(SAMPLE_DATA) + body + table
+
+
+def run_engine(engine_name, content, runs):
+    from app.document import parse, render_html
+    from app.pdf_engine import PDF_ENGINES
+
+    engine = PDF_ENGINES[engine_name].from_config({})
+    html = render_html(parse(content))
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    engine.render(html)  # first call pays for imports / font loading
+    cold = time.perf_counter() - start
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        engine.render(html)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+
+    return {
+        'engine': engine_name,
+        'cold_ms': round(cold * 1000, 1),
+        'mean_ms': round(statistics.mean(timings) * 1000, 1),
+        'p50_ms': round(timings[len(timings) // 2] * 1000, 1),
+        'p95_ms': round(timings[int(len(timings) * 0.95) - 1] * 1000, 1),
+        'baseline_rss_mb': round(baseline_rss / 1024, 1),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'children_peak_rss_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--input', help='markdown file to render (defaults to a synthetic proposal)')
+    parser.add_argument('--engines', default='fpdf,wkhtmltopdf')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    content = open(args.input, encoding='utf-8').read() if args.input else sample_content()
+
+    if args.worker:
+        print(json.dumps(run_engine(args.worker, content, args.runs)))
+        return
+
+    print(f"{'engine':<12} {'cold ms':>8} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'RSS MB':>8} {'child MB':>9}")
+    for engine_name in args.engines.split(','):
+        command = [sys.executable, '-m', 'benchmarks.pdf_engines', '--worker', engine_name, '--runs', str(args.runs)]
+        if args.input:
+            command += ['--input', args.input]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"{engine_name:<12} skipped: {result.stderr.strip().splitlines()[-1]}")
+            continue
+        r = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{r['engine']:<12} {r['cold_ms']:>8} {r['mean_ms']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+              f"{r['peak_rss_mb'] - r['baseline_rss_mb']:>8.1f} {r['children_peak_rss_mb']:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+# benchmarks/startup.py
+"""
+Cold-start report: how long a fresh process takes to import the app, build
+it with create_app() and serve its first request, and which imports that
+time goes to (from python -X importtime).
+
+    python -m benchmarks.startup [--runs 5] [--top 15] [--json startup.json]
+
+Timings are the median of --runs fresh processes without -X importtime,
+which inflates them. One more process runs with it for the breakdown: the
+import time of each package per phase, and which heavy optional modules
+(LLM SDK, export backends, Alembic, ...) each phase loaded. Those should
+only show up in the phase that actually uses them.
+The `flask` CLI is timed as well (`flask routes`, which loads the app).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASES = ('import', 'create_app', 'first_request')
+# Loaded on first use only; none of them is needed to boot the app
+HEAVY_MODULES = ('openai', 'httpx', 'docx', 'fpdf', 'fontTools', 'pdfkit', 'alembic', 'flask_migrate', 'PIL',
+                 'lxml')
+
+# Runs in the measured process; phase marks go to stderr, in line with -X importtime's output
+CHILD = """
+import sys, time
+start = time.perf_counter()
+def mark(phase):
+    print(f'--- {phase} {(time.perf_counter() - start) * 1000:.2f}', file=sys.stderr, flush=True)
+from app import create_app
+mark('import')
+app = create_app()
+mark('create_app')
+response = app.test_client().get('/auth/login')
+assert response.status_code == 200, response.status_code
+mark('first_request')
+"""
+
+SETUP = """
+from app import create_app, db
+with create_app().app_context():
+    db.create_all()
+"""
+
+
+def run_child(env, importtime=False):
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', CHILD]
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+    wall = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return wall, result.stderr
+
+
+def parse_marks(stderr):
+    return {line.split()[1]: float(line.split()[2]) for line in stderr.splitlines() if line.startswith('--- ')}
+
+
+def parse_importtime(stderr):
+    """{phase: [(module, self_us, cumulative_us, depth)]}, in import order."""
+    phases = {phase: [] for phase in PHASES}
+    current = iter(PHASES)
+    phase = next(current)
+    for line in stderr.splitlines():
+        if line.startswith('--- '):
+            phase = next(current, phase)
+        elif line.startswith('import time:'):
+            fields = line[len('import time:'):].split('|')
+            if len(fields) != 3 or not fields[0].strip().isdigit():
+                continue  # the header line
+            name = fields[2]
+            depth = (len(name) - len(name.lstrip()) - 1) // 2  # nesting is shown as two spaces per level
+            phases[phase].append((name.strip(), int(fields[0]), int(fields[1]), depth))
+    return phases
+
+
+def phase_report(imports, top):
+    # Self time summed per top-level package: what each dependency costs, however deep it was pulled in
+    by_package = {}
+    for module, self_us, _, _ in imports:
+        package = module.split('.')[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+    return {
+        'import_ms': round(sum(by_package.values()) / 1000, 1),
+        'modules': len(imports),
+        'slowest': [(package, round(us / 1000, 1))
+                    for package, us in sorted(by_package.items(), key=lambda item: -item[1])[:top]],
+        'heavy_modules': sorted(set(by_package) & set(HEAVY_MODULES)),
+    }
+
+
+def time_cli(env, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'run.py', 'routes'], cwd=ROOT, env=env,
+                       capture_output=True, check=True)
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='most expensive packages listed per phase')
+    parser.add_argument('--json', help='write the report to this file')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='proposal-startup-')
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+               SECRET_KEY='startup-secret')
+
+    subprocess.run([sys.executable, '-c', SETUP], cwd=ROOT, env=env, check=True)
+
+    walls, marks = [], {phase: [] for phase in PHASES}
+    run_child(env)  # the first process also pays for writing .pyc files
+    for _ in range(args.runs):
+        wall, stderr = run_child(env)
+        walls.append(wall)
+        for phase, ms in parse_marks(stderr).items():
+            marks[phase].append(ms)
+    _, stderr = run_child(env, importtime=True)
+    breakdown = parse_importtime(stderr)
+
+    report = {
+        'process_ms': round(statistics.median(walls), 1),
+        'phases_ms': {phase: round(statistics.median(marks[phase]), 1) for phase in PHASES},
+        'cli_ms': time_cli(env, args.runs),
+        'imports': {phase: phase_report(breakdown[phase], args.top) for phase in PHASES},
+    }
+
+    print(f"process start to first response: {report['process_ms']} ms (median of {args.runs})")
+    previous = 0.0
+    for phase in PHASES:
+        at = report['phases_ms'][phase]
+        info = report['imports'][phase]
+        print(f"  {phase:<14} +{at - previous:>7.1f} ms   imports {info['import_ms']:>7.1f} ms "
+              f"({info['modules']} modules)   heavy: {', '.join(info['heavy_modules']) or '-'}")
+        previous = at
+    print(f"flask routes (CLI): {report['cli_ms']} ms")
+    for phase in PHASES:
+        print(f"\nimport time by package during {phase}:")
+        for module, ms in report['imports'][phase]['slowest']:
+            print(f"  {module:<40} {ms:>8.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
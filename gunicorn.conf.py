@@ -0,0 +1,36 @@
+# gunicorn.conf.py
+"""
+Multi-worker server settings, see wsgi.py:
+
+    gunicorn -c gunicorn.conf.py
+
+Environment: GUNICORN_BIND (default 0.0.0.0:8000), WEB_CONCURRENCY (worker
+processes, default 2 x CPUs + 1), GUNICORN_THREADS (threads per worker,
+default 4), GUNICORN_TIMEOUT (seconds, default 120). Set METRICS_TOKEN to
+scrape /metrics through the bind address; without it only loopback
+requests that did not come through a proxy get an answer.
+"""
+import multiprocessing
+import os
+
+wsgi_app = 'wsgi:app'
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Threads keep a worker serving while some of its requests wait on the LLM
+# or stream generation progress
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+# Build and warm the app once in the master; workers are forked from it
+preload_app = True
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+
+def post_fork(server, worker):
+    # Pooled connections opened while preloading belong to the master; the
+    # worker must open its own rather than share the sockets
+    from app import db
+
+    with worker.app.wsgi().app_context():
+        db.engine.dispose(close=False)
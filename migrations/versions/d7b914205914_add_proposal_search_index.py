@@ -0,0 +1,56 @@
+"""add proposal search index
+
+Revision ID: d7b914205914
+Revises: 4f38a2bff88e
+Create Date: 2026-10-18 18:05:17.916430
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7b914205914'
+down_revision = '4f38a2bff88e'
+branch_labels = None
+depends_on = None
+
+
+# Copied from app/search.py at the time of this revision
+FTS_DDL = (
+    "CREATE VIEW IF NOT EXISTS proposal_fts_source AS "
+    "SELECT id, title, content, 'u' || user_id AS owner FROM proposal",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS proposal_fts USING fts5("
+    "title, content, owner, content='proposal_fts_source', content_rowid='id', "
+    "tokenize='porter unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS proposal_fts_ai AFTER INSERT ON proposal BEGIN "
+    "INSERT INTO proposal_fts(rowid, title, content, owner) "
+    "VALUES (new.id, new.title, new.content, 'u' || new.user_id); END",
+    "CREATE TRIGGER IF NOT EXISTS proposal_fts_ad AFTER DELETE ON proposal BEGIN "
+    "INSERT INTO proposal_fts(proposal_fts, rowid, title, content, owner) "
+    "VALUES ('delete', old.id, old.title, old.content, 'u' || old.user_id); END",
+    "CREATE TRIGGER IF NOT EXISTS proposal_fts_au AFTER UPDATE OF title, content, user_id ON proposal BEGIN "
+    "INSERT INTO proposal_fts(proposal_fts, rowid, title, content, owner) "
+    "VALUES ('delete', old.id, old.title, old.content, 'u' || old.user_id); "
+    "INSERT INTO proposal_fts(rowid, title, content, owner) "
+    "VALUES (new.id, new.title, new.content, 'u' || new.user_id); END",
+)
+
+
+def upgrade():
+    # FTS5 is SQLite-only; other databases search with LIKE filters
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in FTS_DDL:
+        op.execute(statement)
+    # Backfill existing proposals
+    op.execute("INSERT INTO proposal_fts(proposal_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TRIGGER IF EXISTS proposal_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS proposal_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS proposal_fts_ai")
+    op.execute("DROP TABLE IF EXISTS proposal_fts")
+    op.execute("DROP VIEW IF EXISTS proposal_fts_source")
@@ -1,4 +1,5 @@
 # run.py
+# Development server. For production (several worker processes) see wsgi.py
 from app import create_app, db
 
 app = create_app()
@@ -0,0 +1,50 @@
+# tests/conftest.py
+import os
+
+# Before app is imported: its load_dotenv() must not point the tests at a real database or LLM
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['LLM_PROVIDER'] = 'stub'
+os.environ.setdefault('SECRET_KEY', 'test-secret-key')
+os.environ.pop('EXPORT_CACHE_DIR', None)
+
+import pytest
+
+from app import create_app, db as _db
+from app.models import User
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        WTF_CSRF_ENABLED=False,
+        SESSION_COOKIE_SECURE=False,
+    )
+    with app.app_context():
+        _db.create_all()
+        yield app
+        _db.session.remove()
+
+
+@pytest.fixture
+def db(app):
+    return _db
+
+
+@pytest.fixture
+def user(db):
+    user = User(username='alice', email='alice@example.com')
+    user.set_password('password123')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def client(app, user):
+    """A test client logged in as `user`."""
+    client = app.test_client()
+    response = client.post('/auth/login', data={'email': user.email, 'password': 'password123'})
+    assert response.status_code == 302
+    return client
@@ -0,0 +1,46 @@
+# tests/test_batch.py
+import io
+import json
+
+import pytest
+
+from app.batch import BATCH_FIELDS, parse_batch_file
+
+HEADER = ','.join(BATCH_FIELDS) + '\n'
+ROW = 'Borehole,Agriculture,A borehole for the village school,1000,4,Professional,Low,Parents,255700000000,a@example.com\n'
+
+
+def test_parse_csv():
+    rows = parse_batch_file('rows.csv', io.BytesIO(('﻿' + HEADER + ROW).encode('utf-8')))
+    assert rows == [dict(zip(BATCH_FIELDS, ROW.strip().split(',')))]
+
+
+def test_parse_csv_stops_after_max_rows():
+    rows = parse_batch_file('rows.csv', io.BytesIO((HEADER + ROW * 1000).encode('utf-8')), max_rows=5)
+    assert len(rows) == 6
+
+
+def test_parse_csv_missing_columns():
+    with pytest.raises(ValueError, match='Missing CSV column'):
+        parse_batch_file('rows.csv', io.BytesIO(b'project_name\nx\n'))
+
+
+def test_parse_csv_not_utf8():
+    with pytest.raises(ValueError, match='UTF-8'):
+        parse_batch_file('rows.csv', io.BytesIO(HEADER.encode('utf-8') + b'\xff\xfe\xff\n'))
+
+
+def test_parse_json_list_and_rows_object():
+    row = {'project_name': ' Borehole ', 'budget': 1000, 'mobile_number': None}
+    for data in ([row], {'rows': [row]}):
+        rows = parse_batch_file('rows.json', io.BytesIO(json.dumps(data).encode('utf-8')), max_rows=3)
+        assert rows[0]['project_name'] == 'Borehole'
+        assert rows[0]['budget'] == '1000'
+        assert rows[0]['mobile_number'] == ''
+        assert set(rows[0]) == set(BATCH_FIELDS)
+
+
+def test_parse_json_rejects_other_shapes():
+    for raw in (b'{"rows": 1}', b'[1, 2]', b'not json'):
+        with pytest.raises(ValueError):
+            parse_batch_file('rows.json', io.BytesIO(raw))
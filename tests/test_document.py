@@ -0,0 +1,43 @@
+# tests/test_document.py
+from app.document import parse, render_html, Document
+
+
+def test_headings_and_inline_markup():
+    html = render_html(parse('# Title\n\nSome **bold** and `code`.\n\n## Budget\n\n- one\n- two\n'))
+    assert '<h1>Title</h1>' in html
+    assert '<strong>bold</strong>' in html
+    assert '<code>code</code>' in html
+    assert '<h2>Budget</h2>' in html
+    assert '<li>one</li>' in html
+
+
+def test_raw_html_is_escaped():
+    html = render_html(parse('<script>alert(1)</script>\n\n## <img src=x onerror=alert(1)>'))
+    assert '<script>' not in html
+    assert '&lt;script&gt;' in html
+    assert '<img' not in html
+
+
+def test_javascript_links_are_dropped():
+    html = render_html(parse('[click](javascript:alert) and [also](JavaScript:void)'))
+    assert 'href' not in html
+    assert 'javascript:' not in html.lower()
+
+
+def test_link_attributes_cannot_be_injected():
+    html = render_html(parse('[x](https://example.com/" onmouseover="alert(1))'))
+    assert 'onmouseover="' not in html
+    assert '&#34;' in html
+
+
+def test_safe_links_are_kept():
+    html = render_html(parse('[site](https://example.com) [mail](mailto:a@example.com) [page](/dashboard)'))
+    assert '<a href="https://example.com">site</a>' in html
+    assert 'href="mailto:a@example.com"' in html
+    assert 'href="/dashboard"' in html
+
+
+def test_document_round_trips_through_bytes():
+    document = parse('# Title\n\n| a | b |\n|---|---|\n| 1 | 2 |\n')
+    assert render_html(Document.from_bytes(document.to_bytes())) == render_html(document)
+    assert document.title == 'Title'
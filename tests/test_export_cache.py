@@ -0,0 +1,49 @@
+# tests/test_export_cache.py
+import os
+
+from flask import Flask
+
+from app.export_cache import ExportCache
+
+
+def _cache(tmp_path=None):
+    app = Flask(__name__)
+    app.config['EXPORT_CACHE_DIR'] = str(tmp_path) if tmp_path else None
+    return ExportCache(app)
+
+
+def _renderer(calls):
+    def render(content):
+        calls.append(content)
+        return content.encode('utf-8')
+    return render
+
+
+def test_fetch_renders_once_per_content():
+    cache, calls = _cache(), []
+    assert cache.fetch(1, 'v1', 'pdf', _renderer(calls)) == b'v1'
+    assert cache.fetch(1, 'v1', 'pdf', _renderer(calls)) == b'v1'
+    assert calls == ['v1']
+
+
+def test_changed_content_replaces_stale_render():
+    cache, calls = _cache(), []
+    cache.fetch(1, 'v1', 'pdf', _renderer(calls))
+    assert cache.fetch(1, 'v2', 'pdf', _renderer(calls)) == b'v2'
+    assert cache.get(1, 'v1', 'pdf') is None
+    assert calls == ['v1', 'v2']
+    assert cache.stats()['entries'] == 1
+
+
+def test_invalidate_drops_every_format(tmp_path):
+    cache, calls = _cache(tmp_path), []
+    for fmt in ('pdf', 'docx'):
+        cache.fetch(1, 'v1', fmt, _renderer(calls))
+    cache.fetch(2, 'other', 'pdf', _renderer(calls))
+    assert len(os.listdir(tmp_path)) == 3
+
+    cache.invalidate(1)
+    assert cache.get(1, 'v1', 'pdf') is None
+    assert cache.get(1, 'v1', 'docx') is None
+    assert cache.get(2, 'other', 'pdf') == b'other'
+    assert len(os.listdir(tmp_path)) == 1
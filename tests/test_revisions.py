@@ -0,0 +1,74 @@
+# tests/test_revisions.py
+from datetime import datetime
+
+from app.models import Proposal, ProposalRevision
+from app.revisions import (apply_delta, find_section, list_sections, make_delta, replace_section,
+                           revision_content, save_revision)
+
+CONTENT = (
+    '# Water Project\n\n'
+    'Intro text.\n\n'
+    '## 1. **Objectives**\n\n'
+    'Old objectives.\n\n'
+    '### Detail\n\n'
+    'Nested.\n\n'
+    '```\n## not a heading\n```\n\n'
+    '## Budget\n\n'
+    'Old budget.\n'
+)
+
+
+def test_make_and_apply_delta_round_trip():
+    old = 'a\nb\nc\nd\n'
+    new = 'a\nB\nc\nd\ne\n'
+    assert apply_delta(new, make_delta(new, old)) == old
+    assert apply_delta(old, make_delta(old, '')) == ''
+    assert apply_delta('', make_delta('', old)) == old
+
+
+def test_list_sections_follows_document_headings():
+    sections = list_sections(CONTENT)
+    assert [(title, level) for title, level, _, _ in sections] == [
+        ('Water Project', 1), ('1. Objectives', 2), ('Detail', 3), ('Budget', 2)]
+    _, _, start, end = sections[1]
+    assert CONTENT[start:end].startswith('## 1. **Objectives**')
+    assert '### Detail' in CONTENT[start:end]
+    assert '## Budget' not in CONTENT[start:end]
+
+
+def test_find_section_ignores_numbering_and_emphasis():
+    assert find_section(CONTENT, 'objectives')[0] == '1. Objectives'
+    assert find_section(CONTENT, 'Missing') is None
+
+
+def test_replace_section_keeps_heading_and_rest_of_document():
+    section = find_section(CONTENT, 'Objectives')
+    new = replace_section(CONTENT, section, '## Renamed\n\nNew objectives.\n\n## Extra\n\nInjected.')
+    assert '## 1. **Objectives**\n\nNew objectives.\n\n## Budget' in new
+    assert 'Renamed' not in new and 'Injected' not in new
+    assert new.startswith('# Water Project\n\nIntro text.\n\n')
+    assert new.endswith('## Budget\n\nOld budget.\n')
+
+
+def test_replace_last_section_with_bare_body():
+    new = replace_section(CONTENT, find_section(CONTENT, 'Budget'), 'New budget.')
+    assert new.endswith('## Budget\n\nNew budget.\n')
+
+
+def test_save_revision_and_revision_content(db, user):
+    proposal = Proposal(title='Water Project', content='v1\n', user_id=user.id,
+                        generated_at=datetime.utcnow(), project_type='Agriculture')
+    db.session.add(proposal)
+    db.session.commit()
+
+    assert save_revision(db, proposal, 'v1\n') is None
+    for text in ('v2\n', 'v3\nmore\n'):
+        save_revision(db, proposal, text, section='Intro')
+        db.session.commit()
+
+    assert db.session.query(ProposalRevision).filter_by(proposal_id=proposal.id).count() == 2
+    assert revision_content(db, proposal, 1) == 'v1\n'
+    assert revision_content(db, proposal, 2) == 'v2\n'
+    assert revision_content(db, proposal, 3) == 'v3\nmore\n'
+    assert revision_content(db, proposal, 4) is None
+    assert revision_content(db, proposal, 0) is None
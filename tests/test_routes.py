@@ -0,0 +1,122 @@
+# tests/test_routes.py
+import io
+import time
+import zipfile
+from datetime import datetime
+
+from app.main.routes import _decode_cursor, _encode_cursor
+from app.models import Proposal, ProposalRevision, User
+
+PROPOSAL_FORM = {
+    'project_name': 'Village Borehole',
+    'project_type': 'Agriculture',
+    'description': 'A borehole and storage tank for the village school.',
+    'budget': '1000',
+    'duration_weeks': '4',
+    'writing_style': 'Professional',
+    'complexity': 'Low',
+    'audience': 'Parents',
+    'contact_email': 'alice@example.com',
+    'mobile_number': '255700000000',
+}
+
+
+def _proposal(db, user, content='# Borehole\n\n## Intro\n\nHello.\n\n## Budget\n\nCheap.\n', title='Borehole'):
+    proposal = Proposal(title=title, content=content, user_id=user.id, generated_at=datetime.utcnow(),
+                        project_type='Agriculture')
+    db.session.add(proposal)
+    db.session.commit()
+    return proposal
+
+
+def test_cursor_round_trip(db, user):
+    proposal = _proposal(db, user)
+    assert _decode_cursor(_encode_cursor(proposal)) == (proposal.generated_at, proposal.id)
+
+
+def test_malformed_cursors():
+    for cursor in (None, '', 'nope', '2024-01-01T00:00:00_x', 'x_1'):
+        assert _decode_cursor(cursor) is None
+
+
+def test_dashboard_pages_with_cursors(app, db, user, client):
+    app.config['DASHBOARD_PAGE_SIZE'] = 2
+    for number in range(5):
+        _proposal(db, user, title=f'Proposal {number}')
+    first = client.get('/dashboard')
+    assert first.status_code == 200
+    newest = db.session.query(Proposal).order_by(Proposal.generated_at.desc(), Proposal.id.desc()).all()
+    second = client.get('/dashboard', query_string={'after': _encode_cursor(newest[1])})
+    assert second.status_code == 200
+    assert b'Proposal 2' in second.data and b'Proposal 4' not in second.data
+
+
+def test_generate_view_and_download(app, db, client):
+    response = client.post('/proposals/jobs', data=PROPOSAL_FORM)
+    assert response.status_code == 202
+    status_url = response.get_json()['status_url']
+    for _ in range(100):
+        payload = client.get(status_url).get_json()
+        if payload['status'] in ('done', 'failed'):
+            break
+        time.sleep(0.05)
+    assert payload['status'] == 'done'
+
+    view = client.get(payload['redirect'])
+    assert view.status_code == 200
+    assert client.get(payload['redirect'], headers={'If-None-Match': view.headers['ETag']}).status_code == 304
+
+    proposal = db.session.query(Proposal).one()
+    for fmt, magic in (('pdf', b'%PDF'), ('docx', b'PK'), ('md', proposal.content[:10].encode())):
+        download = client.get(f'/download/{proposal.id}/{fmt}')
+        assert download.status_code == 200
+        assert download.data.startswith(magic)
+
+    found = client.get('/search', query_string={'q': 'Borehole'}, headers={'Accept': 'application/json'})
+    assert [r['id'] for r in found.get_json()['results']] == [proposal.id]
+    assert client.get('/dashboard').status_code == 200
+
+
+def test_section_regeneration_and_restore(db, user, client):
+    proposal = _proposal(db, user)
+    page = client.get(f'/proposal/{proposal.id}/revise')
+    assert page.status_code == 200
+
+    response = client.post(f'/proposal/{proposal.id}/sections/regenerate',
+                           data={'section': 'Budget', 'version': '1'}, headers={'Accept': 'application/json'})
+    assert response.status_code == 200
+    assert response.get_json()['revision'] == 1
+    db.session.refresh(proposal)
+    assert proposal.content.startswith('# Borehole\n\n## Intro\n\nHello.\n\n## Budget\n\n')
+    assert 'Cheap.' not in proposal.content
+
+    # A form rendered for version 1 is out of date now
+    stale = client.post(f'/proposal/{proposal.id}/sections/regenerate',
+                        data={'section': 'Intro', 'version': '1'}, headers={'Accept': 'application/json'})
+    assert stale.status_code == 409
+
+    restored = client.post(f'/proposal/{proposal.id}/revisions/1/restore', data={'version': str(proposal.version)})
+    assert restored.status_code == 302
+    db.session.refresh(proposal)
+    assert 'Cheap.' in proposal.content
+    assert db.session.query(ProposalRevision).filter_by(proposal_id=proposal.id).count() == 2
+
+
+def test_zip_export(db, user, client):
+    _proposal(db, user, title='First')
+    _proposal(db, user, title='Second')
+    response = client.get('/proposals/export', query_string={'format': ['md', 'pdf']})
+    assert response.status_code == 200
+    names = zipfile.ZipFile(io.BytesIO(response.data)).namelist()
+    assert len(names) == 4
+    assert all(name.endswith(('.md', '.pdf')) for name in names)
+
+
+def test_other_users_proposals_are_hidden(db, user, client):
+    other = User(username='bob', email='bob@example.com')
+    other.set_password('password123')
+    db.session.add(other)
+    db.session.commit()
+    proposal = _proposal(db, other)
+    assert client.get(f'/proposal/{proposal.id}/revise').status_code == 404
+    assert client.get(f'/download/{proposal.id}/md').status_code == 302
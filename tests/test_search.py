@@ -0,0 +1,40 @@
+# tests/test_search.py
+from datetime import datetime
+
+from app import proposal_search
+from app.models import Proposal, User
+from app.search import fts_query, highlight
+
+
+def test_fts_query_scopes_to_owner_and_prefixes_last_term():
+    assert fts_query(7, 'solar pump') == 'owner : "u7" AND {title content} : ("solar" "pump"*)'
+
+
+def test_fts_query_drops_operators_and_quotes():
+    query = fts_query(1, 'water" OR owner:u2 NEAR(')
+    assert query == 'owner : "u1" AND {title content} : ("water" "OR" "owner" "u2" "NEAR"*)'
+
+
+def test_fts_query_without_words():
+    assert fts_query(1, '') is None
+    assert fts_query(1, ' -*" ') is None
+
+
+def test_highlight_escapes_snippet():
+    assert str(highlight('<b>\x02solar\x03</b>')) == '&lt;b&gt;<mark>solar</mark>&lt;/b&gt;'
+
+
+def test_search_only_returns_own_proposals(db, user):
+    other = User(username='bob', email='bob@example.com')
+    other.set_password('password123')
+    db.session.add(other)
+    db.session.flush()
+    for owner, title in ((user, 'Solar irrigation'), (user, 'Fish farming'), (other, 'Solar dryers')):
+        db.session.add(Proposal(title=title, content=f'# {title}\n\nDetails about {title.lower()}.',
+                                user_id=owner.id, generated_at=datetime.utcnow(), project_type='Agriculture'))
+    db.session.commit()
+
+    results, has_more = proposal_search.search(user.id, 'sol')
+    assert [r['title'] for r in results] == ['Solar irrigation']
+    assert not has_more
+    assert '<mark>' in str(results[0]['snippet'])
@@ -0,0 +1,33 @@
+# wsgi.py
+"""
+Production entry point for multi-worker servers:
+
+    gunicorn -c gunicorn.conf.py
+
+The app is created and warmed up here, once, in the server's master process
+(gunicorn.conf.py sets preload_app), and the forked workers share it
+copy-on-write. For sessions to work in every worker, SECRET_KEY must be the
+same everywhere. Set it in the environment, or on a single host let the
+workers share instance/secret_key. Rendered exports are shared through
+EXPORT_CACHE_DIR. /metrics only answers requests from this host unless
+METRICS_TOKEN is set; then scrapers send 'Authorization: Bearer <token>'.
+Generation jobs run on each worker's event loop (GENERATION_ASYNC, see
+app/jobs.py), so a worker keeps as many in flight as the LLM concurrency
+limit allows. Use run.py for local development.
+"""
+import gc
+import os
+
+os.environ.setdefault('EXPORT_CACHE_DIR',
+                      os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'export_cache'))
+os.environ.setdefault('GENERATION_ASYNC', '1')
+
+from app import create_app
+from app.deployment import warm_up
+
+app = create_app()
+warm_up(app)
+
+# Move everything loaded so far out of the collector's reach: collections in
+# the workers would otherwise write to (and so copy) every shared page
+gc.freeze()